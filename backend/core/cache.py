@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Optional
+
+
+def content_key(*parts: Any) -> str:
+    """Stable SHA-256 key for JSON-serializable parts."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Key/value store for JSON strings with per-entry expiry."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.time():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        self.entries[key] = (value, time.time() + ttl_seconds)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self.entries.pop(key, None)
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache shared across restarts and worker processes."""
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _get(self, key: str) -> Optional[str]:
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < time.time():
+                connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            return value
+
+    def _set(self, key: str, value: str, ttl_seconds: float):
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+
+    def _delete(self, key: str):
+        with closing(self._connect()) as connection, connection:
+            connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    # sqlite3 is blocking, so queries run off the event loop
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        await asyncio.to_thread(self._set, key, value, ttl_seconds)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._delete, key)
+
+
+def create_cache(
+    backend: str, path: str, table: str = "cache", max_size: int = 256
+) -> CacheBackend:
+    """Build a cache backend by name ("memory" or "sqlite")."""
+    if backend == "sqlite":
+        return SQLiteCache(path, table=table)
+    if backend == "memory":
+        return MemoryCache(max_size=max_size)
+    raise ValueError(f"Unknown cache backend: {backend}")
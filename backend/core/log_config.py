@@ -0,0 +1,97 @@
+# The relay scripts at the repository root and the backend are separate
+# projects, deployed on their own, so each ships this module: log_config.py
+# and backend/core/log_config.py are kept identical (see test_log_config.py)
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from collections import defaultdict
+
+# Minimum level written, e.g. DEBUG to see every message
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Keep 1 in N of the per-message records logged with `extra=SAMPLED`
+LOG_SAMPLE_EVERY = int(os.environ.get("LOG_SAMPLE_EVERY", "100"))
+# Records waiting for the writer thread; further records are dropped
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+# Libraries that log every frame or request at DEBUG; kept at INFO or above
+QUIET_LOGGERS = ("websockets", "httpx", "httpcore", "openai")
+
+# Pass as `extra=` on hot-path records that only need to be sampled
+SAMPLED = {"sampled": True}
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every record, except 1 in `every` of those marked as sampled."""
+
+    def __init__(self, every: int = LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = max(every, 1)
+        self.seen = defaultdict(int)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        key = (record.name, record.msg)
+        self.seen[key] += 1
+        return (self.seen[key] - 1) % self.every == 0
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hand records to the writer thread, dropping them when it falls behind."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+listener = None
+# Arguments of the active setup_logging() call, for child processes to reuse
+settings = {}
+
+
+def setup_logging(
+    level: str = LOG_LEVEL, stream=None, sample_every: int = LOG_SAMPLE_EVERY
+):
+    """
+    Route all logging through a bounded queue to a background writer thread,
+    so the event loop never blocks on stdout.
+    """
+    global listener
+    if listener is not None:
+        return
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    handler.addFilter(SamplingFilter(sample_every))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(root.level, logging.INFO))
+
+    settings.update(level=level, sample_every=sample_every)
+    listener = logging.handlers.QueueListener(handler.queue, writer)
+    listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush the queue and stop the writer thread."""
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
@@ -0,0 +1,158 @@
+import bisect
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from agents import Agent, RunContextWrapper, RunHooks
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# Agent whose run the current task is part of, used to label nested spans
+current_agent: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "metrics_agent", default=""
+)
+# Wall-clock time the transcript being processed was completed
+current_transcript_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "metrics_transcript_at", default=None
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One extra slot for +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class StageMetrics:
+    """
+    Latency histograms per pipeline stage and agent, rendered in the
+    Prometheus text format.
+
+    Stages of the transcription pipeline:
+      frame_forward         client frame received -> forwarded upstream
+      transcript_batch      transcript completed -> handed to the agent
+      llm_queue             enqueued at the scheduler -> slot granted
+      llm_run               Runner.run start -> end
+      tool_call             tool start -> end
+      ws_send               websocket send to the client
+      transcript_to_output  transcript completed -> agent output sent
+    """
+
+    def __init__(self):
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+
+    def observe(self, stage: str, seconds: float, agent: Optional[str] = None):
+        if agent is None:
+            agent = current_agent.get()
+        key = (stage, agent)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str, agent: Optional[str] = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, agent)
+
+    def render(self) -> str:
+        name = "pipeline_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Latency of each transcription pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage, agent), histogram in sorted(self.histograms.items()):
+            labels = f'stage="{stage}",agent="{agent}"'
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = StageMetrics()
+
+
+@contextmanager
+def agent_span(agent: str, transcript_at: Optional[float] = None):
+    """Attribute the spans recorded inside to `agent` and its transcript."""
+    agent_token = current_agent.set(agent)
+    transcript_token = current_transcript_at.set(transcript_at)
+    try:
+        yield
+    finally:
+        current_transcript_at.reset(transcript_token)
+        current_agent.reset(agent_token)
+
+
+async def send_json(websocket, data: dict[str, Any]):
+    """Send to the client, recording the send and end-to-end latency."""
+    with metrics.span("ws_send"):
+        result = await websocket.send_json(data)
+    transcript_at = current_transcript_at.get()
+    if transcript_at is not None:
+        metrics.observe("transcript_to_output", time.time() - transcript_at)
+    return result
+
+
+def tool_call_key(context: RunContextWrapper, tool) -> tuple[Any, str]:
+    """
+    Key of one tool call. Function tools get a context per call carrying its
+    id, so concurrent runs of the same agent, parallel calls of the same tool
+    and a guardrail sharing its parent's context never collide.
+    """
+    return getattr(context, "tool_call_id", None) or id(context), tool.name
+
+
+class MetricsHooks(RunHooks):
+    """Run hooks recording the duration of every tool call."""
+
+    def __init__(self):
+        self.started: dict[tuple[Any, str], float] = {}
+
+    async def on_tool_start(self, context: RunContextWrapper, agent: Agent, tool):
+        self.started[tool_call_key(context, tool)] = time.perf_counter()
+
+    async def on_tool_end(
+        self, context: RunContextWrapper, agent: Agent, tool, result: object
+    ):
+        start = self.started.pop(tool_call_key(context, tool), None)
+        if start is not None:
+            metrics.observe(
+                "tool_call",
+                time.perf_counter() - start,
+                current_agent.get() or agent.name,
+            )
+
+
+metrics_hooks = MetricsHooks()
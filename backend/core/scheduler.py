@@ -0,0 +1,328 @@
+import asyncio
+import contextvars
+import itertools
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, Hashable, Optional
+
+from agents import Agent, Runner
+
+from core.metrics import current_agent, metrics, metrics_hooks
+
+# Sustained rate of model runs across the whole process, and the burst allowed
+# on top of it before requests start queueing
+LLM_REQUESTS_PER_SECOND = float(os.environ.get("LLM_REQUESTS_PER_SECOND", "8"))
+LLM_BURST = int(os.environ.get("LLM_BURST", "16"))
+# Model runs in flight at once
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+
+
+class Priority(IntEnum):
+    # Time-sensitive meeting feedback (off-topic warnings, checkpoints)
+    HIGH = 0
+    # Interactive requests and everything else
+    NORMAL = 1
+    # Nice-to-have output (conversation tips, background research)
+    LOW = 2
+
+
+class RequestExpired(Exception):
+    """A queued model run was dropped because its deadline passed."""
+
+
+# Fairness key of the current session, inherited by the tasks it spawns
+current_session: contextvars.ContextVar[Optional[Hashable]] = contextvars.ContextVar(
+    "llm_session", default=None
+)
+# Whether the current task already holds a slot, e.g. a guardrail run from a tool
+holding_slot: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "llm_holding_slot", default=False
+)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def delay(self, cost: float = 1.0) -> float:
+        """Take `cost` tokens and return 0, or return how long until they exist."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class Request:
+    def __init__(self, future: asyncio.Future, deadline: Optional[float]):
+        self.future = future
+        self.deadline = deadline
+
+
+class StreamedRun:
+    """
+    A streamed model run admitted by the scheduler.
+
+    Events are buffered as the model produces them, so the slot is released
+    when the run finishes rather than when a slow reader has caught up.
+    """
+
+    DONE = object()
+
+    def __init__(self):
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.result = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def stream_events(self):
+        while (event := await self.events.get()) is not self.DONE:
+            yield event
+        # Surfaces RequestExpired and model errors
+        await self.task
+
+    @property
+    def final_output(self) -> Any:
+        return self.result.final_output
+
+    def cancel(self):
+        """Stop the run, or drop it from the queue if it hasn't started."""
+        self.task.cancel()
+
+
+class LLMScheduler:
+    """
+    Process-wide gate in front of Runner.run.
+
+    Runs are admitted under a token bucket and a concurrency limit. Waiting
+    runs are served by priority class, round-robin across sessions within a
+    class, and dropped with RequestExpired once their deadline has passed.
+    """
+
+    def __init__(
+        self,
+        rate: float = LLM_REQUESTS_PER_SECOND,
+        burst: int = LLM_BURST,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.running = 0
+        # Priority -> session -> requests of that session in arrival order
+        self.queues: dict[Priority, OrderedDict[Hashable, deque[Request]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.ids = itertools.count()
+        self.dispatched = 0
+        self.expired = 0
+
+    def _ensure_dispatcher(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # First use, or a new event loop (e.g. separate asyncio.run calls)
+            self.loop = loop
+            self.wakeup = asyncio.Event()
+            self.running = 0
+            for sessions in self.queues.values():
+                sessions.clear()
+            self.dispatcher = None
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = loop.create_task(self._dispatch())
+
+    def _next(self) -> Optional[Request]:
+        """Pop the next live request, failing the ones that have expired."""
+        now = self.loop.time()
+        for sessions in self.queues.values():
+            while sessions:
+                session, requests = next(iter(sessions.items()))
+                request = requests.popleft()
+                if requests:
+                    # Let the other sessions of this class go first next time
+                    sessions.move_to_end(session)
+                else:
+                    del sessions[session]
+
+                if request.future.done():
+                    # The caller gave up waiting
+                    continue
+                if request.deadline is not None and now > request.deadline:
+                    self.expired += 1
+                    request.future.set_exception(RequestExpired())
+                    continue
+                return request
+        return None
+
+    def _pending(self) -> bool:
+        return any(self.queues.values())
+
+    async def _dispatch(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self._pending() and self.running < self.max_concurrency:
+                delay = self.bucket.delay()
+                if delay:
+                    await asyncio.sleep(delay)
+                    continue
+                request = self._next()
+                if request is None:
+                    # Give the token back, nothing was sent
+                    self.bucket.tokens += 1
+                    break
+                self.running += 1
+                self.dispatched += 1
+                request.future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Priority = Priority.NORMAL,
+        session: Optional[Hashable] = None,
+        deadline_seconds: Optional[float] = None,
+    ):
+        """
+        Wait for permission to call the model. Raises RequestExpired when no
+        slot was granted within `deadline_seconds`.
+        """
+        if holding_slot.get():
+            # Nested run inside a granted slot: only respect the rate limit,
+            # waiting for a second slot could deadlock
+            while delay := self.bucket.delay():
+                await asyncio.sleep(delay)
+            yield
+            return
+
+        self._ensure_dispatcher()
+        if session is None:
+            session = current_session.get()
+        if session is None:
+            # Unrelated requests are each their own session
+            session = ("request", next(self.ids))
+
+        future = self.loop.create_future()
+        deadline = None
+        if deadline_seconds is not None:
+            deadline = self.loop.time() + deadline_seconds
+        self.queues[priority].setdefault(session, deque()).append(
+            Request(future, deadline)
+        )
+        self.wakeup.set()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), deadline_seconds)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self.expired += 1
+                raise RequestExpired() from None
+            if future.cancelled() or future.exception() is not None:
+                # Expired by the dispatcher in the same tick, no slot was taken
+                raise RequestExpired() from None
+            # Otherwise the slot was granted right at the deadline
+        except BaseException:
+            if future.done() and not future.cancelled() and not future.exception():
+                # Granted just as the caller was cancelled
+                self._release()
+            else:
+                future.cancel()
+            raise
+
+        token = holding_slot.set(True)
+        try:
+            yield
+        finally:
+            holding_slot.reset(token)
+            self._release()
+
+    def _release(self):
+        self.running -= 1
+        self.wakeup.set()
+
+    async def run(
+        self,
+        starting_agent: Agent,
+        input: Any,
+        *,
+        priority: Priority = Priority.NORMAL,
+        session: Optional[Hashable] = None,
+        deadline_seconds: Optional[float] = None,
+        **kwargs,
+    ):
+        """Runner.run through the scheduler."""
+        agent = current_agent.get() or starting_agent.name
+        kwargs.setdefault("hooks", metrics_hooks)
+        queued_at = time.perf_counter()
+        async with self.slot(priority, session, deadline_seconds):
+            metrics.observe("llm_queue", time.perf_counter() - queued_at, agent)
+            with metrics.span("llm_run", agent):
+                return await Runner.run(starting_agent, input, **kwargs)
+
+    def run_streamed(
+        self,
+        starting_agent: Agent,
+        input: Any,
+        *,
+        priority: Priority = Priority.NORMAL,
+        session: Optional[Hashable] = None,
+        deadline_seconds: Optional[float] = None,
+        **kwargs,
+    ) -> StreamedRun:
+        """Runner.run_streamed through the scheduler."""
+        run = StreamedRun()
+        run.task = asyncio.create_task(
+            self._stream(
+                run, starting_agent, input, priority, session, deadline_seconds, kwargs
+            )
+        )
+        return run
+
+    async def _stream(
+        self,
+        run: StreamedRun,
+        starting_agent: Agent,
+        input: Any,
+        priority: Priority,
+        session: Optional[Hashable],
+        deadline_seconds: Optional[float],
+        kwargs: dict[str, Any],
+    ):
+        agent = current_agent.get() or starting_agent.name
+        kwargs.setdefault("hooks", metrics_hooks)
+        queued_at = time.perf_counter()
+        try:
+            async with self.slot(priority, session, deadline_seconds):
+                metrics.observe("llm_queue", time.perf_counter() - queued_at, agent)
+                with metrics.span("llm_run", agent):
+                    run.result = Runner.run_streamed(starting_agent, input, **kwargs)
+                    try:
+                        async for event in run.result.stream_events():
+                            run.events.put_nowait(event)
+                    finally:
+                        if not run.result.is_complete:
+                            run.result.cancel()
+        finally:
+            run.events.put_nowait(run.DONE)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": {
+                priority.name.lower(): sum(len(r) for r in sessions.values())
+                for priority, sessions in self.queues.items()
+            },
+            "dispatched": self.dispatched,
+            "expired": self.expired,
+        }
+
+
+scheduler = LLMScheduler()
@@ -1,8 +1,15 @@
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from core.log_config import setup_logging
+from core.metrics import metrics
+from routes.conversation.guardrail import render_metrics as render_guardrail_metrics
 from routes.main import api_router
 
+setup_logging()
+
 app = FastAPI(
     title="Meeting Cue API",
 )
@@ -24,5 +31,14 @@ async def root():
     return {"message": "Hello World"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Per-stage, per-agent latency histograms and guardrail counters in the
+    Prometheus text format.
+    """
+    return metrics.render() + render_guardrail_metrics()
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
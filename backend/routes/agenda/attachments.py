@@ -0,0 +1,184 @@
+import hashlib
+import math
+import os
+import re
+from collections import Counter, OrderedDict
+from typing import Protocol
+
+# Prompt budget for attachment content, in estimated tokens
+ATTACHMENT_TOKEN_BUDGET = int(os.environ.get("ATTACHMENT_TOKEN_BUDGET", "3000"))
+# Target chunk size in words and the maximum number of chunks injected
+ATTACHMENT_CHUNK_WORDS = int(os.environ.get("ATTACHMENT_CHUNK_WORDS", "150"))
+ATTACHMENT_TOP_K = int(os.environ.get("ATTACHMENT_TOP_K", "12"))
+
+# Rough characters-per-token ratio, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Number of attachment chunk indexes kept in memory, keyed by content hash
+INDEX_CACHE_SIZE = 128
+
+WORD_RE = re.compile(r"\w+")
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+class AttachmentLike(Protocol):
+    name: str
+    content: str
+
+
+class Chunk:
+    def __init__(self, position: int, text: str):
+        self.position = position
+        self.text = text
+        self.terms = Counter(tokenize(text))
+        self.length = sum(self.terms.values())
+        self.tokens = len(text) // CHARS_PER_TOKEN + 1
+
+
+def tokenize(text: str) -> list[str]:
+    return WORD_RE.findall(text.lower())
+
+
+def split_chunks(content: str, chunk_words: int = ATTACHMENT_CHUNK_WORDS) -> list[str]:
+    """Pack paragraphs into chunks of about `chunk_words` words."""
+    chunks = []
+    current: list[str] = []
+    current_words = 0
+
+    for paragraph in PARAGRAPH_RE.split(content):
+        words = paragraph.split()
+        if not words:
+            continue
+        # Very long paragraphs are split on word boundaries
+        for start in range(0, len(words), chunk_words):
+            piece = words[start : start + chunk_words]
+            if current and current_words + len(piece) > chunk_words:
+                chunks.append(" ".join(current))
+                current, current_words = [], 0
+            current.extend(piece)
+            current_words += len(piece)
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+# Content hash -> chunks of that attachment
+index_cache: OrderedDict[str, list[Chunk]] = OrderedDict()
+
+
+def chunk_index(content: str) -> list[Chunk]:
+    """Chunk an attachment, reusing the index of identical content."""
+    key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    if key in index_cache:
+        index_cache.move_to_end(key)
+        return index_cache[key]
+
+    chunks = [
+        Chunk(position, text) for position, text in enumerate(split_chunks(content))
+    ]
+    index_cache[key] = chunks
+    while len(index_cache) > INDEX_CACHE_SIZE:
+        index_cache.popitem(last=False)
+    return chunks
+
+
+def bm25_scores(chunks: list[Chunk], query: str) -> list[float]:
+    query_terms = set(tokenize(query))
+    if not chunks or not query_terms:
+        return [0.0] * len(chunks)
+
+    average_length = sum(chunk.length for chunk in chunks) / len(chunks) or 1
+    document_frequency = Counter()
+    for chunk in chunks:
+        document_frequency.update(query_terms & chunk.terms.keys())
+
+    scores = []
+    for chunk in chunks:
+        score = 0.0
+        for term in query_terms:
+            frequency = chunk.terms.get(term, 0)
+            if not frequency:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (len(chunks) - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * chunk.length / average_length)
+            score += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        scores.append(score)
+    return scores
+
+
+def select_attachment_context(
+    attachments: list[AttachmentLike],
+    query: str,
+    token_budget: int = ATTACHMENT_TOKEN_BUDGET,
+    top_k: int = ATTACHMENT_TOP_K,
+) -> str:
+    """
+    Render the attachments for the prompt. When they don't fit in the token
+    budget they are chunked and deduplicated, and only the top-K chunks most
+    relevant to `query` (BM25) that fit are kept, in their original order.
+    """
+    # Identical attachments are only included once
+    unique = {}
+    for attachment in attachments:
+        unique.setdefault(attachment.content, attachment)
+    attachments = list(unique.values())
+
+    parts = ["\n\nAttachments provided for reference:\n"]
+
+    total_tokens = sum(len(a.content) for a in attachments) // CHARS_PER_TOKEN
+    if total_tokens <= token_budget:
+        # Everything fits, include the attachments verbatim
+        for index, attachment in enumerate(attachments, 1):
+            parts.append(f"\n--- Attachment {index}: {attachment.name} ---\n")
+            parts.append(attachment.content)
+            parts.append("\n--- End of Attachment ---\n")
+        return "".join(parts)
+
+    candidates: list[tuple[int, Chunk]] = []
+    seen = set()
+    for attachment_index, attachment in enumerate(attachments):
+        for chunk in chunk_index(attachment.content):
+            # Drop chunks repeated within or across attachments
+            fingerprint = " ".join(tokenize(chunk.text))
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            candidates.append((attachment_index, chunk))
+
+    scores = bm25_scores([chunk for _, chunk in candidates], query)
+    ranked = sorted(
+        range(len(candidates)), key=lambda index: scores[index], reverse=True
+    )
+    chosen = []
+    used = 0
+    for index in ranked:
+        if len(chosen) == top_k:
+            break
+        chunk = candidates[index][1]
+        if used + chunk.tokens > token_budget:
+            continue
+        chosen.append(index)
+        used += chunk.tokens
+    selected = [candidates[index] for index in sorted(chosen)]
+
+    for attachment_index, attachment in enumerate(attachments):
+        chunks = [chunk for index, chunk in selected if index == attachment_index]
+        if not chunks:
+            continue
+        parts.append(
+            f"\n--- Attachment {attachment_index + 1}: {attachment.name} ---\n"
+        )
+        previous = -1
+        for chunk in chunks:
+            if chunk.position != previous + 1:
+                parts.append("[...]\n")
+            parts.append(chunk.text + "\n")
+            previous = chunk.position
+        parts.append("--- End of Attachment ---\n")
+    return "".join(parts)
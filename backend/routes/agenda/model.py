@@ -4,6 +4,8 @@ from typing import Literal
 
 from pydantic import BaseModel
 
+from routes.agenda.attachments import select_attachment_context
+
 
 class Attachment(BaseModel):
     name: str
@@ -38,16 +40,11 @@ class AgendaForm(BaseModel):
             seconds = int(total_seconds % 60)
             data["meeting_duration"] = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
-        # Process attachments if they exist
-        attachments_content = ""
+        # Process attachments if they exist, keeping only what fits the budget
         if self.attachments:
-            attachments_content = "\n\nAttachments provided for reference:\n"
-            for idx, attachment in enumerate(self.attachments, 1):
-                attachments_content += (
-                    f"\n--- Attachment {idx}: {attachment.name} ---\n"
-                )
-                attachments_content += attachment.content
-                attachments_content += "\n--- End of Attachment ---\n"
+            attachments_content = select_attachment_context(
+                self.attachments, query=f"{self.title} {self.purpose}"
+            )
 
             # Include attachments in the context
             if data.get("context"):
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import Optional
+
+from agents import Agent, WebSearchTool, function_tool
+
+from core.cache import CacheBackend, create_cache
+from core.scheduler import Priority, scheduler
+from routes.agenda.prompts import PROFILER_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Researched participant profiles are kept in "memory" unless deployments
+# persist them with "sqlite" at PROFILE_CACHE_PATH
+PROFILE_CACHE_BACKEND = os.environ.get("PROFILE_CACHE_BACKEND", "memory")
+PROFILE_CACHE_PATH = os.environ.get(
+    "PROFILE_CACHE_PATH", "participant_profiles.sqlite3"
+)
+# Profiles are dropped after the TTL and refreshed in the background once
+# older than PROFILE_REFRESH_AFTER_SECONDS
+PROFILE_TTL_SECONDS = int(os.environ.get("PROFILE_TTL_SECONDS", str(30 * 86400)))
+PROFILE_REFRESH_AFTER_SECONDS = int(
+    os.environ.get("PROFILE_REFRESH_AFTER_SECONDS", str(7 * 86400))
+)
+
+profiler_agent = Agent(
+    name="ParticipantProfiler",
+    model="gpt-4.1-mini",
+    instructions=PROFILER_PROMPT,
+    tools=[WebSearchTool()],
+)
+
+# Created on first use, so importing the module doesn't create a database file
+profile_store: Optional[CacheBackend] = None
+
+# Keys being researched right now, shared by concurrent requests
+in_flight: dict[str, asyncio.Task] = {}
+
+# The meeting host is listed as "Me (...)" and doesn't need researching
+SELF_RE = re.compile(r"^me\b", re.IGNORECASE)
+
+
+def get_profile_store() -> CacheBackend:
+    global profile_store
+    if profile_store is None:
+        profile_store = create_cache(
+            PROFILE_CACHE_BACKEND, PROFILE_CACHE_PATH, table="participant_profiles"
+        )
+    return profile_store
+
+
+def normalize_participant(participant: str) -> str:
+    return " ".join(participant.lower().split())
+
+
+async def research(participant: str, priority: Priority = Priority.NORMAL) -> str:
+    """Research a participant with the profiler agent and store the profile."""
+    result = await scheduler.run(profiler_agent, participant, priority=priority)
+    profile = str(result.final_output)
+    await get_profile_store().set(
+        normalize_participant(participant),
+        json.dumps({"profile": profile, "fetched_at": time.time()}),
+        PROFILE_TTL_SECONDS,
+    )
+    return profile
+
+
+def start_research(
+    participant: str, priority: Priority = Priority.NORMAL
+) -> asyncio.Task:
+    key = normalize_participant(participant)
+    if key in in_flight:
+        return in_flight[key]
+
+    def finished(task: asyncio.Task):
+        in_flight.pop(key, None)
+        if not task.cancelled() and task.exception():
+            logger.error(
+                "Error researching participant %s: %s",
+                participant,
+                task.exception(),
+                exc_info=task.exception(),
+            )
+
+    task = asyncio.create_task(research(participant, priority))
+    task.add_done_callback(finished)
+    in_flight[key] = task
+    return task
+
+
+async def get_profile(participant: str) -> str:
+    """
+    Return the stored profile of a participant, researching it if missing.
+    Stale profiles are returned immediately and refreshed in the background.
+    """
+    cached = await get_profile_store().get(normalize_participant(participant))
+    if cached is None:
+        return await asyncio.shield(start_research(participant))
+
+    entry = json.loads(cached)
+    if time.time() - entry["fetched_at"] > PROFILE_REFRESH_AFTER_SECONDS:
+        # Nobody waits for the refresh
+        start_research(participant, Priority.LOW)
+    return entry["profile"]
+
+
+async def profile_participants(participants: Optional[list[str]]) -> dict[str, str]:
+    """Profile all participants concurrently, skipping the host and failures."""
+    participants = [p for p in participants or [] if not SELF_RE.match(p.strip())]
+    results = await asyncio.gather(
+        *(get_profile(participant) for participant in participants),
+        return_exceptions=True,
+    )
+
+    profiles = {}
+    for participant, result in zip(participants, results):
+        if isinstance(result, Exception):
+            logger.warning("Error profiling participant %s: %s", participant, result)
+            continue
+        profiles[participant] = result
+    return profiles
+
+
+def profiles_to_prompt(profiles: dict[str, str]) -> str:
+    content = "Research on meeting participants:\n"
+    for participant, profile in profiles.items():
+        content += f"\n--- {participant} ---\n{profile}\n"
+    return content
+
+
+@function_tool
+async def profile_meeting_participants(participants: list[str]) -> str:
+    """Search for information about the given meeting participants."""
+    return profiles_to_prompt(await profile_participants(participants))
@@ -1,29 +1,126 @@
 import json
+import logging
+import os
 
 from agents import (
     Agent,
     GuardrailFunctionOutput,
     InputGuardrailTripwireTriggered,
     RunContextWrapper,
-    Runner,
     TResponseInputItem,
-    WebSearchTool,
     input_guardrail,
 )
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, Response
+from fastapi.responses import StreamingResponse
+from openai.types.responses import ResponseCreatedEvent, ResponseTextDeltaEvent
+
+from core.cache import content_key, create_cache
+from core.scheduler import scheduler
 from routes.agenda.model import (
     Agenda,
     AgendaForm,
     ChatRequest,
     IsAgendaTopic,
 )
-from routes.agenda.prompts import AGENDA_CREATION_PROMPT, PROFILER_PROMPT
+from routes.agenda.profiles import (
+    profile_meeting_participants,
+    profile_participants,
+    profiles_to_prompt,
+)
+from routes.agenda.prompts import AGENDA_CREATION_PROMPT
+from routes.agenda.streaming import SectionParser
+
+logger = logging.getLogger(__name__)
 
 agenda_router = APIRouter(prefix="/agenda", tags=["agenda"])
 
+# Generated agendas are cached by the content of the form ("memory" or "sqlite")
+AGENDA_CACHE_BACKEND = os.environ.get("AGENDA_CACHE_BACKEND", "memory")
+AGENDA_CACHE_PATH = os.environ.get("AGENDA_CACHE_PATH", "agenda_cache.sqlite3")
+AGENDA_CACHE_TTL_SECONDS = int(os.environ.get("AGENDA_CACHE_TTL_SECONDS", "86400"))
+
+agenda_cache = create_cache(AGENDA_CACHE_BACKEND, AGENDA_CACHE_PATH, table="agendas")
+
+# Agents are stateless, so they are built once and shared across requests
+agenda_agent = Agent(
+    name="AgendaCreator",
+    model="gpt-4.1-mini",
+    instructions=AGENDA_CREATION_PROMPT,
+    tools=[],
+    output_type=Agenda,
+)
+
+# Listed participants are profiled up front; the tool covers anyone else
+sales_agenda_agent = agenda_agent.clone(tools=[profile_meeting_participants])
+
+guardrail_agent = Agent(
+    name="Guardrail check",
+    instructions="Check if the user is asking specific question about agenda. It can be question or requestion for change or even conversation about it.",
+    output_type=IsAgendaTopic,
+)
+
+
+@input_guardrail
+async def agenda_guardrail(
+    ctx: RunContextWrapper[None],
+    agent: Agent,
+    input: str | list[TResponseInputItem],
+) -> GuardrailFunctionOutput:
+    # Nested in the chat run's slot, so it only waits on the rate limit
+    result = await scheduler.run(guardrail_agent, input, context=ctx.context)
+    return GuardrailFunctionOutput(
+        output_info=result.final_output,
+        tripwire_triggered=not result.final_output.is_about_agenda,
+    )
+
+
+# The SDK runs the guardrail alongside the first model turn and, since
+# openai-agents 0.8.0 (the floor in pyproject.toml), cancels the turn when it
+# trips
+chat_agenda_agent = agenda_agent.clone(input_guardrails=[agenda_guardrail])
+
+
+def prepare_agenda_run(agenda: AgendaForm) -> tuple[Agent, list[dict], str]:
+    """Pick the creator agent and build its input and cache key."""
+    # Use the to_prompt method to get the JSON with attachments processed
+    user_message = agenda.to_prompt()
+
+    messages = [
+        {"role": "user", "content": user_message},
+    ]
+
+    if agenda.type_of_meeting == "Sales Meeting":
+        starting_agent = sales_agenda_agent
+    else:
+        starting_agent = agenda_agent
+
+    # Identical forms produce the same agenda, so repeats are served from the cache
+    cache_key = content_key(user_message, starting_agent.model)
+    return starting_agent, messages, cache_key
+
+
+async def add_participant_research(agenda: AgendaForm, messages: list[dict]):
+    if agenda.type_of_meeting == "Sales Meeting":
+        # Stored profiles are reused; missing ones are researched concurrently
+        profiles = await profile_participants(agenda.participants)
+        if profiles:
+            messages.append({"role": "user", "content": profiles_to_prompt(profiles)})
+
+
+def cache_headers(cache_key: str) -> dict[str, str]:
+    return {
+        "Cache-Control": f"private, max-age={AGENDA_CACHE_TTL_SECONDS}",
+        "ETag": f'"{cache_key}"',
+    }
+
+
+def ndjson(data: dict) -> str:
+    return json.dumps(data) + "\n"
+
 
 @agenda_router.post("/")
 async def upload_agenda(
+    response: Response,
     agenda: AgendaForm = Body(
         example={
             "title": "Sales Strategy Meeting with MedNova Health",
@@ -39,44 +136,81 @@ async def upload_agenda(
         }
     ),
 ):
-    # Use the to_prompt method to get the JSON with attachments processed
-    user_message = agenda.to_prompt()
-
-    messages = [
-        {"role": "user", "content": user_message},
-    ]
-
-    profiler_agent = Agent(
-        name="ParticipantProfiler",
-        model="gpt-4.1-mini",
-        instructions=PROFILER_PROMPT,
-        tools=[WebSearchTool()],
-    )
+    starting_agent, messages, cache_key = prepare_agenda_run(agenda)
+    response.headers.update(cache_headers(cache_key))
 
-    tools = []
-    if agenda.type_of_meeting == "Sales Meeting":
-        tools.append(
-            profiler_agent.as_tool(
-                tool_name="profile_meeting_participants",
-                tool_description="Search for participant information",
-            )
-        )
+    cached = await agenda_cache.get(cache_key)
+    if cached is not None:
+        response.headers["X-Cache"] = "HIT"
+        return Agenda.model_validate_json(cached)
 
-    agenda_agent = Agent(
-        name="AgendaCreator",
-        model="gpt-4.1-mini",
-        instructions=AGENDA_CREATION_PROMPT,
-        tools=tools,
-        output_type=Agenda,
-    )
+    await add_participant_research(agenda, messages)
 
-    result = await Runner.run(
-        starting_agent=agenda_agent,
+    result = await scheduler.run(
+        starting_agent=starting_agent,
         input=messages,
     )
-    response = result.final_output
+    generated = result.final_output
 
-    return response
+    await agenda_cache.set(
+        cache_key, generated.model_dump_json(), AGENDA_CACHE_TTL_SECONDS
+    )
+    response.headers["X-Cache"] = "MISS"
+    return generated
+
+
+@agenda_router.post("/stream")
+async def stream_agenda(agenda: AgendaForm):
+    """
+    Generate an agenda as newline-delimited JSON events: one
+    {"type": "section"} event per Agenda field as soon as it is complete,
+    then {"type": "agenda"} with the validated Agenda.
+    """
+    starting_agent, messages, cache_key = prepare_agenda_run(agenda)
+    cached = await agenda_cache.get(cache_key)
+
+    async def events():
+        if cached is not None:
+            generated = Agenda.model_validate_json(cached)
+            for name, data in generated.model_dump().items():
+                yield ndjson({"type": "section", "name": name, "data": data})
+            yield ndjson({"type": "agenda", "data": generated.model_dump()})
+            return
+
+        run = None
+        try:
+            await add_participant_research(agenda, messages)
+
+            run = scheduler.run_streamed(starting_agent=starting_agent, input=messages)
+            parser = SectionParser()
+            async for event in run.stream_events():
+                if event.type != "raw_response_event":
+                    continue
+                if isinstance(event.data, ResponseCreatedEvent):
+                    # Only the text of the latest model response is the Agenda
+                    parser = SectionParser()
+                elif isinstance(event.data, ResponseTextDeltaEvent):
+                    for name, data in parser.feed(event.data.delta):
+                        yield ndjson({"type": "section", "name": name, "data": data})
+
+            generated = run.final_output
+            await agenda_cache.set(
+                cache_key, generated.model_dump_json(), AGENDA_CACHE_TTL_SECONDS
+            )
+            yield ndjson({"type": "agenda", "data": generated.model_dump()})
+        except Exception as e:
+            logger.exception("Error streaming agenda: %s", e)
+            yield ndjson({"type": "error", "error": str(e)})
+        finally:
+            # The client went away or the stream failed before the run ended
+            if run is not None:
+                run.cancel()
+
+    headers = cache_headers(cache_key)
+    headers["X-Cache"] = "HIT" if cached is not None else "MISS"
+    return StreamingResponse(
+        events(), media_type="application/x-ndjson", headers=headers
+    )
 
 
 @agenda_router.post("/chat")
@@ -98,39 +232,13 @@ async def chat_with_agenda(chat_request: ChatRequest):
     for message in chat_request.messages:
         user_messages.append({"role": message.role, "content": message.content})
 
-    guardrail_agent = Agent(
-        name="Guardrail check",
-        instructions="Check if the user is asking specific question about agenda. It can be question or requestion for change or even conversation about it.",
-        output_type=IsAgendaTopic,
-    )
-
-    @input_guardrail
-    async def agenda_guardrail(
-        ctx: RunContextWrapper[None],
-        agent: Agent,
-        input: str | list[TResponseInputItem],
-    ) -> GuardrailFunctionOutput:
-        result = await Runner.run(guardrail_agent, input, context=ctx.context)
-        return GuardrailFunctionOutput(
-            output_info=result.final_output,
-            tripwire_triggered=not result.final_output.is_about_agenda,
-        )
-
-    agenda_agent = Agent(
-        name="AgendaCreator",
-        model="gpt-4.1-mini",
-        instructions=AGENDA_CREATION_PROMPT,
-        tools=[],
-        output_type=Agenda,
-        input_guardrails=[agenda_guardrail],
-    )
     try:
-        result = await Runner.run(
-            starting_agent=agenda_agent,
+        result = await scheduler.run(
+            starting_agent=chat_agenda_agent,
             input=user_messages,
         )
         response = result.final_output
         return response
 
-    except InputGuardrailTripwireTriggered as e:
+    except InputGuardrailTripwireTriggered:
         return chat_request.agenda
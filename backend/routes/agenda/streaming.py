@@ -0,0 +1,71 @@
+import json
+from typing import Any, Optional
+
+
+class SectionParser:
+    """
+    Incremental parser for a JSON object streamed as text deltas.
+
+    Each top-level field is returned as soon as its value is complete, so the
+    sections of an Agenda can be shown before the whole object has arrived.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        # "key" -> expecting a field name, "colon", "value" -> inside a value
+        self.state = "key"
+        self.key_start = 0
+        self.key: Optional[str] = None
+        self.value_start = 0
+
+    def feed(self, delta: str) -> list[tuple[str, Any]]:
+        """Add a text delta and return the fields it completed."""
+        self.buffer += delta
+        completed = []
+
+        for index in range(self.position, len(self.buffer)):
+            char = self.buffer[index]
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.state == "key":
+                        self.key = json.loads(self.buffer[self.key_start : index + 1])
+                        self.state = "colon"
+                continue
+
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.state == "key":
+                    self.key_start = index
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0 and self.state == "value":
+                    completed.extend(self._complete_field(index))
+            elif self.depth == 1:
+                if char == ":" and self.state == "colon":
+                    self.state = "value"
+                    self.value_start = index + 1
+                elif char == "," and self.state == "value":
+                    completed.extend(self._complete_field(index))
+                    self.state = "key"
+
+        self.position = len(self.buffer)
+        return completed
+
+    def _complete_field(self, end: int) -> list[tuple[str, Any]]:
+        try:
+            value = json.loads(self.buffer[self.value_start : end])
+        except json.JSONDecodeError:
+            return []
+        return [(self.key, value)]
@@ -1,27 +1,53 @@
 import asyncio
+import logging
+import os
+import time
 from typing import Any, Dict, Optional
 
 from agents import (
     Agent,
     RunContextWrapper,
-    Runner,
     function_tool,
 )
 from fastapi import WebSocket
-from pydantic import BaseModel
 
+from core.metrics import agent_span, metrics, send_json
+from core.scheduler import Priority, RequestExpired, scheduler
+from routes.conversation.checkpoints import CHECKPOINT_PRESCREEN, CheckpointPrescreen
+from routes.conversation.guardrail import (
+    checkpoint_guardrail,
+    conversation_tip_guardrail,
+)
+from routes.conversation.history import (
+    HISTORY_MAX_TURNS,
+    HISTORY_TOKEN_BUDGET,
+    ChatHistory,
+)
 from routes.conversation.prompts import CHECKLIST_PROMPT, OFFTOPIC_PROMPT
+from routes.conversation.speaker import USER_TYPES, SpeakerAttributor
+from routes.conversation.topic import OFFTOPIC_TRACKER, TopicTracker
+from routes.conversation.transcript import (
+    TranscriptLog,
+    TranscriptSegment,
+    join_partials,
+)
 
+logger = logging.getLogger(__name__)
 
-class IsWrong(BaseModel):
-    is_wrong: bool
-    reasoning: str
+# Seconds to wait for further transcripts before running an agent over a batch
+AGENT_DEBOUNCE_SECONDS = float(os.environ.get("AGENT_DEBOUNCE_SECONDS", "1.5"))
+# Upper bound on how long the oldest pending transcript waits for its batch
+AGENT_MAX_STALENESS_SECONDS = float(os.environ.get("AGENT_MAX_STALENESS_SECONDS", "5"))
 
 
 @function_tool
 async def send_via_websocket(ctx: RunContextWrapper, checkpoint_fulfilled: int) -> str:
     websocket = ctx.context["websocket"]
-    return await websocket.send_json({"checkpoint_fulfilled": checkpoint_fulfilled})
+    # Stop pre-screening for an item once it is reached
+    fulfilled = ctx.context.get("fulfilled")
+    if fulfilled is not None:
+        fulfilled.add(checkpoint_fulfilled)
+    return await send_json(websocket, {"checkpoint_fulfilled": checkpoint_fulfilled})
 
 
 @function_tool
@@ -30,7 +56,7 @@ async def send_offtopic_warning(
 ) -> str:
     """Send an off-topic warning notification via WebSocket if the conversation is off-topic."""
     websocket = ctx.context["websocket"]
-    return await websocket.send_json({"is_offtopic": is_offtopic, "off_topic": topic})
+    return await send_json(websocket, {"is_offtopic": is_offtopic, "off_topic": topic})
 
 
 @function_tool
@@ -43,35 +69,55 @@ async def send_topic_status(
 ) -> str:
     """Send a comprehensive topic status update via WebSocket with information about the current discussion."""
     websocket = ctx.context["websocket"]
-    return await websocket.send_json(
-        {
-            "is_offtopic": is_offtopic,
-            "topic_summary": topic_summary,
-            "relevant_agenda_item": relevant_agenda_item,
-            "recommendation": recommendation,
-        }
-    )
+    status = {
+        "is_offtopic": is_offtopic,
+        "topic_summary": topic_summary,
+        "relevant_agenda_item": relevant_agenda_item,
+        "recommendation": recommendation,
+    }
+    # Keep the agent's view of the topic in step with what the client sees
+    topic_state = ctx.context.get("topic_state")
+    if topic_state is not None:
+        topic_state.update(status)
+    return await send_json(websocket, status)
 
 
 class TranscriptionAgent:
-    def __init__(self, websocket: WebSocket):
+    debounce_seconds = AGENT_DEBOUNCE_SECONDS
+    max_staleness_seconds = AGENT_MAX_STALENESS_SECONDS
+    history_max_turns = HISTORY_MAX_TURNS
+    history_token_budget = HISTORY_TOKEN_BUDGET
+    # Scheduling class of this agent's model runs, and how long a run may
+    # wait for a slot before it is too stale to be worth making
+    priority = Priority.NORMAL
+    deadline_seconds: Optional[float] = 10
+    # Whether the partial transcript of an utterance still being spoken starts
+    # a run, or the agent waits for the utterance to complete
+    partial_transcripts = False
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        transcript_log: TranscriptLog,
+        position: Optional[int] = None,
+    ):
         self.websocket = websocket
-        self.chat_history: list[dict[str, Any]] = []
-        self.transcript_queue = asyncio.Queue()
+        self.chat_history = ChatHistory(
+            max_turns=self.history_max_turns,
+            token_budget=self.history_token_budget,
+        )
+        # Read the shared session transcript from `position` (default: live)
+        self.transcript = transcript_log.cursor(position)
         self.agenda_info: Optional[Dict[str, Any]] = None
 
-    async def add_transcript(self, transcript: str):
-        """Add a transcript to the queue for processing"""
-        await self.transcript_queue.put({"text": transcript})
-
-        # Update current transcript
-        self.chat_history.append({"role": "user", "content": transcript})
-        print(f"Added to chat history: {transcript}")
+    @property
+    def name(self) -> str:
+        return type(self).__name__
 
     async def add_agenda_info(self, agenda_data: Dict[str, Any]):
         """Add agenda information received from the frontend"""
         self.agenda_info = agenda_data
-        print(f"Received agenda information: {agenda_data}")
+        logger.debug("Received agenda information: %s", agenda_data)
 
         # Update the chat history with agenda information
         if self.agenda_info:
@@ -85,126 +131,286 @@ class TranscriptionAgent:
                 for i, tip in enumerate(self.agenda_info["checklist_items"], 1):
                     agenda_content += f"{i}. {tip}\n"
 
-            self.chat_history.append({"role": "system", "content": agenda_content})
-            print(f"Added agenda to chat history: {agenda_content}")
+            self.chat_history.set_system(agenda_content)
+            logger.debug("Pinned agenda in chat history: %s", agenda_content)
+
+    async def next_batch(self) -> list[TranscriptSegment]:
+        """
+        Wait for the next transcript, then keep collecting until no new one
+        arrives within the debounce window or the oldest one gets too stale.
+        """
+        loop = asyncio.get_running_loop()
+        log = self.transcript.log
+        while True:
+            await self.transcript.wait()
+            # Counted from the oldest unread segment, which may have arrived
+            # while the previous run was in flight
+            oldest = log.segments[self.transcript.position]
+            waited = time.time() - oldest.timestamp
+            deadline = loop.time() + self.max_staleness_seconds - waited
+
+            while True:
+                timeout = min(self.debounce_seconds, deadline - loop.time())
+                if timeout <= 0:
+                    break
+                if not await log.wait_past(len(log), timeout):
+                    break
+
+            # Everything that arrived since the last batch, including segments
+            # appended while the previous run was in flight
+            segments = join_partials(
+                self.transcript.read(complete_only=not self.partial_transcripts)
+            )
+            # Final segments can be empty when the partials held all the text
+            segments = [segment for segment in segments if segment.text.strip()]
+            if segments:
+                return segments
+            # Nothing new to say yet, wait for the log to grow
+            await log.wait_past(len(log))
 
     async def process_transcripts(self):
-        """Process transcripts as they come in"""
+        """Process transcripts in debounced batches as they come in"""
         while True:
             try:
-                # Get the next transcript from the queue
-                await self.transcript_queue.get()
-
-                # Example: You could send this to another AI service for further processing
-                await self.process_final_transcript()
-
-                # Mark the task as done
-                self.transcript_queue.task_done()
-
-                await asyncio.sleep(0.01)
-
+                segments = await self.next_batch()
+                transcript_at = segments[0].timestamp
+                metrics.observe(
+                    "transcript_batch", time.time() - transcript_at, self.name
+                )
+
+                self.record_batch(segments)
+                with agent_span(self.name, transcript_at):
+                    await self.process_final_transcript(segments)
+                # Batches the model skipped would otherwise pile up verbatim
+                # until its next run
+                await self.chat_history.compact()
+
+            except RequestExpired:
+                # The batch stays in the history for the next run
+                logger.warning("%s run dropped, it waited too long", self.name)
+                continue
             except Exception as e:
-                print(f"Error in transcript processing: {e}")
+                logger.exception("Error in transcript processing: %s", e)
                 # Don't break the loop on error, continue processing
                 continue
 
-    async def process_final_transcript(self):
-        """Process a final transcript - can be extended with custom logic"""
+    def record_batch(self, segments: list[TranscriptSegment]):
+        """The whole batch becomes a single turn in the chat history"""
+        self.chat_history.append(
+            {
+                "role": "user",
+                "content": "\n".join(segment.text for segment in segments),
+            }
+        )
+
+    async def process_final_transcript(self, segments: list[TranscriptSegment]):
+        """Process a batch of final transcripts - can be extended with custom logic"""
         # This is where you could add additional processing for final transcripts
         # For example, sending to a chatbot service, analyzing sentiment, etc.
         pass
 
+    async def run_agent(self, agent: Agent, context: Dict[str, Any]):
+        """Run an agent over the chat history and record the items it produced"""
+        await self.chat_history.compact()
+        input_items = self.chat_history.as_input()
+
+        result = await scheduler.run(
+            agent,
+            input_items,
+            context=context,
+            priority=self.priority,
+            deadline_seconds=self.deadline_seconds,
+        )
+
+        self.chat_history.extend(result.to_input_list()[len(input_items) :])
+        return result
+
 
 class AgendaAgent(TranscriptionAgent):
-    def __init__(self, websocket: WebSocket):
-        super().__init__(websocket)
+    priority = Priority.HIGH
+    # Checkpoints are often reached mid-monologue
+    partial_transcripts = True
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        transcript_log: TranscriptLog,
+        position: Optional[int] = None,
+    ):
+        super().__init__(websocket, transcript_log, position)
         self.agenda_agent = Agent(
             name="Agenda Agent",
             model="gpt-4.1",
             instructions=(CHECKLIST_PROMPT),
             tools=[send_via_websocket],
         )
-        # Initial chat history will be updated when we receive the agenda info
-        self.chat_history = []
+        # Skips model runs over batches unrelated to any open checklist item
+        self.prescreen: Optional[CheckpointPrescreen] = None
 
-    async def process_final_transcript(self):
+    async def add_agenda_info(self, agenda_data: Dict[str, Any]):
+        await super().add_agenda_info(agenda_data)
+        items = agenda_data.get("checklist_items") if agenda_data else None
+        # Item numbers and fulfilled items belong to the previous agenda
+        self.prescreen = (
+            CheckpointPrescreen(items) if CHECKPOINT_PRESCREEN and items else None
+        )
+
+    async def process_final_transcript(self, segments: list[TranscriptSegment]):
         # Only process if we have received agenda information
-        if not self.agenda_info and not self.chat_history:
-            print("Waiting for agenda information before processing transcripts...")
+        if not self.agenda_info and not self.chat_history.turns:
+            logger.debug(
+                "Waiting for agenda information before processing transcripts..."
+            )
             return
 
-        result = await Runner.run(
-            self.agenda_agent,
-            self.chat_history,
-            context={"websocket": self.websocket},
-        )
-        print("Agenda Agent output:", result.final_output)
+        # The batch stays in the chat history for the next run either way,
+        # compacted with the rest after every batch
+        text = " ".join(segment.text for segment in segments)
+        if self.prescreen is not None and not self.prescreen.should_run(text):
+            logger.debug("No open checklist item mentioned, skipping the model run")
+            return
 
-        self.chat_history = result.to_input_list()
+        context = {"websocket": self.websocket}
+        if self.prescreen is not None:
+            context["fulfilled"] = self.prescreen.fulfilled
+        result = await self.run_agent(self.agenda_agent, context)
+        logger.debug("Agenda Agent output: %s", result.final_output)
 
 
 @function_tool
-async def send_via_websocket_words_count(ctx: RunContextWrapper, user_type: str) -> str:
-    """Sends the classification result to the WebSocket server. It gets as user_type
-    'host' or 'guest' as string"""
+async def send_via_websocket_words_count(
+    ctx: RunContextWrapper, chunk: int, user_type: str
+) -> str:
+    """Sends the classification result of one chunk to the WebSocket server. It gets
+    the chunk number and as user_type 'host' or 'guest' as string"""
     websocket = ctx.context["websocket"]
-    n_words = ctx.context["n_words"]
-    return await websocket.send_json({"words_count": n_words, "user_type": user_type})
+    segments = ctx.context["segments"]
+    if not 1 <= chunk <= len(segments):
+        return f"There is no chunk {chunk}, chunks are numbered 1 to {len(segments)}"
+    if user_type not in USER_TYPES:
+        return f"user_type must be one of {', '.join(USER_TYPES)}"
+    # Let the caller learn from the verdict
+    ctx.context["labels"][chunk - 1] = user_type
+    n_words = len(segments[chunk - 1].text.split())
+    return await send_json(websocket, {"words_count": n_words, "user_type": user_type})
 
 
 class EngagementAgent(TranscriptionAgent):
-    def __init__(self, websocket: WebSocket):
-        super().__init__(websocket)
+    # Word counts are emitted per turn as soon as it arrives
+    debounce_seconds = 0
+    max_staleness_seconds = 0
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        transcript_log: TranscriptLog,
+        position: Optional[int] = None,
+    ):
+        super().__init__(websocket, transcript_log, position)
         self.engagement_agent = Agent(
             name="Engagement Agent",
             model="gpt-4.1",
             instructions=(
                 "You will be given transcriptions of running meeting, "
-                "it will be passed to you in chunks. "
+                "it will be passed to you in numbered chunks. "
                 "For each chunk, you need to "
                 "classify if the text was said by host of the meeting or the guest. "
-                "Then send the classification result to the WebSocket server. "
+                "Then send the classification result of every chunk, with its "
+                "number, to the WebSocket server. "
             ),
             tools=[send_via_websocket_words_count],
         )
-        self.chat_history = []
+        # Local host/guest attribution; only ambiguous turns reach the LLM
+        self.speakers = SpeakerAttributor()
+        self.escalations: asyncio.Queue[list[TranscriptSegment]] = asyncio.Queue()
 
-    async def process_final_transcript(self):
-        # Only process if we have received agenda information
-        if not self.agenda_info and not self.chat_history:
-            print("Waiting for agenda information before processing transcripts...")
-            return
+    async def process_transcripts(self):
+        await asyncio.gather(super().process_transcripts(), self.process_escalations())
 
-        for i, message in enumerate(self.chat_history[::-1]):
-            print(message)
-            if "role" in message and message["role"] == "user":
-                n_words = len(message["content"].split())
-                break
+    def record_batch(self, segments: list[TranscriptSegment]):
+        # Escalations give the model exactly the turns to label, so the chat
+        # history is never read and would only grow with the meeting
+        pass
 
-        result = await Runner.run(
-            self.engagement_agent,
-            self.chat_history,
-            context={
+    async def process_final_transcript(self, segments: list[TranscriptSegment]):
+        # Word counts don't depend on the agenda
+        ambiguous = []
+        for segment in segments:
+            if segment.speaker:
+                # Speaker known from channel/diarization metadata
+                user_type = segment.speaker
+                self.speakers.learn(segment.text, user_type)
+            else:
+                user_type, _ = self.speakers.classify(segment.text)
+                if user_type is None:
+                    ambiguous.append(segment)
+                    continue
+                self.speakers.last_user_type = user_type
+
+            await send_json(
+                self.websocket,
+                {"words_count": len(segment.text.split()), "user_type": user_type},
+            )
+
+        if ambiguous:
+            # Don't hold back the next turns while the LLM decides
+            self.escalations.put_nowait(ambiguous)
+
+    async def process_escalations(self):
+        """Classify ambiguous turns with the Engagement Agent LLM"""
+        while True:
+            segments = await self.escalations.get()
+            # Merge everything that piled up while the previous run was in flight
+            while not self.escalations.empty():
+                segments.extend(self.escalations.get_nowait())
+
+            # The shared chat history has moved on since these turns were
+            # escalated, so the model is given exactly the turns to label
+            chunks = "\n".join(
+                f"{number}. {segment.text}"
+                for number, segment in enumerate(segments, 1)
+            )
+            context = {
                 "websocket": self.websocket,
-                "n_words": n_words,
-            },
-        )
-        print("Engagement Agent output:", result.final_output)
+                "segments": segments,
+                "labels": [None] * len(segments),
+            }
+            try:
+                with agent_span(self.name, segments[0].timestamp):
+                    result = await scheduler.run(
+                        self.engagement_agent,
+                        [{"role": "user", "content": chunks}],
+                        context=context,
+                        priority=self.priority,
+                        deadline_seconds=self.deadline_seconds,
+                    )
+                logger.debug("Engagement Agent output: %s", result.final_output)
+            except Exception as e:
+                logger.exception("Error in engagement escalation: %s", e)
+                continue
 
-        self.chat_history = result.to_input_list()
+            # Only learn from the turns the model actually labelled
+            for segment, user_type in zip(segments, context["labels"]):
+                if user_type is not None:
+                    self.speakers.learn(segment.text, user_type)
 
 
 class OfftopicAgent(TranscriptionAgent):
-    def __init__(self, websocket: WebSocket):
-        super().__init__(websocket)
+    priority = Priority.HIGH
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        transcript_log: TranscriptLog,
+        position: Optional[int] = None,
+    ):
+        super().__init__(websocket, transcript_log, position)
         self.offtopic_agent = Agent(
             name="Offtopic Agent",
             model="gpt-4.1",
             instructions=(OFFTOPIC_PROMPT),
             tools=[send_topic_status],
         )
-        # Initial chat history will be updated when we receive the agenda info
-        self.chat_history = []
         # Track the current topic state
         self.current_topic_state = {
             "is_offtopic": False,
@@ -212,41 +418,74 @@ class OfftopicAgent(TranscriptionAgent):
             "relevant_agenda_item": None,
             "recommendation": None,
         }
+        # Scores segments locally so the model is only asked when the
+        # discussion seems to leave the agenda
+        self.tracker: Optional[TopicTracker] = None
+        # (is_offtopic, agenda item number) last sent to the client
+        self.reported_topic: tuple[bool, Optional[int]] = (False, None)
+
+    async def add_agenda_info(self, agenda_data: Dict[str, Any]):
+        await super().add_agenda_info(agenda_data)
+        items = agenda_data.get("checklist_items") if agenda_data else None
+        # A new agenda invalidates the item numbers tracked so far
+        self.tracker = TopicTracker(items) if OFFTOPIC_TRACKER and items else None
+        self.reported_topic = (False, None)
 
-    async def process_final_transcript(self):
+    async def process_final_transcript(self, segments: list[TranscriptSegment]):
         # Only process if we have received agenda information
-        if not self.agenda_info and not self.chat_history:
-            print("Waiting for agenda information before processing transcripts...")
+        if not self.agenda_info and not self.chat_history.turns:
+            logger.debug(
+                "Waiting for agenda information before processing transcripts..."
+            )
             return
 
-        result = await Runner.run(
-            self.offtopic_agent,
-            self.chat_history,
-            context={"websocket": self.websocket},
-        )
-        print("Offtopic Agent output:", result.final_output)
+        context = {"websocket": self.websocket, "topic_state": self.current_topic_state}
+        if self.tracker is None:
+            result = await self.run_agent(self.offtopic_agent, context)
+            logger.debug("Offtopic Agent output: %s", result.final_output)
+            return
+
+        for segment in segments:
+            self.tracker.observe(segment.text)
+        topic = (self.tracker.is_offtopic, self.tracker.relevant_item)
+        if topic == self.reported_topic:
+            return
 
-        self.chat_history = result.to_input_list()
+        if self.tracker.is_offtopic:
+            # Drifting away from the agenda is the model's call, it also
+            # writes the summary and the recommendation
+            result = await self.run_agent(self.offtopic_agent, context)
+            logger.debug("Offtopic Agent output: %s", result.final_output)
+            # A model that stays silent is not sure, which counts as on-topic
+            self.tracker.reset(self.current_topic_state["is_offtopic"])
+        else:
+            item_number = self.tracker.relevant_item
+            self.current_topic_state.update(
+                {
+                    "is_offtopic": False,
+                    "topic_summary": (
+                        self.tracker.index.items[item_number - 1]
+                        if item_number
+                        else "Back on the agenda"
+                    ),
+                    "relevant_agenda_item": str(item_number) if item_number else None,
+                    "recommendation": None,
+                }
+            )
+            await send_json(self.websocket, dict(self.current_topic_state))
+        self.reported_topic = (self.tracker.is_offtopic, self.tracker.relevant_item)
 
 
 @function_tool
 async def send_checkpoint_via_websocket(
     ctx: RunContextWrapper, new_checkpoint_content: str
 ) -> str:
-    guard_agent = Agent(
-        name="Guardrail check",
-        instructions="Check if the new checkpoint content is aggressive, harmful, dangerous or unrelated.",
-        output_type=IsWrong,
-    )
-
-    result = await Runner.run(guard_agent, new_checkpoint_content, context=ctx.context)
-
-    if result.final_output.is_wrong:
+    if await checkpoint_guardrail.is_wrong(new_checkpoint_content, ctx.context):
         return
     else:
         websocket = ctx.context["websocket"]
-        return await websocket.send_json(
-            {"new_checkpoint_content": new_checkpoint_content}
+        return await send_json(
+            websocket, {"new_checkpoint_content": new_checkpoint_content}
         )
 
 
@@ -254,24 +493,26 @@ async def send_checkpoint_via_websocket(
 async def send_conversation_tip_via_websocket(
     ctx: RunContextWrapper, new_conversation_tip: str
 ) -> str:
-    guard_agent = Agent(
-        name="Guardrail check",
-        instructions="Check if the new conversation tip is aggressive, harmful, dangerous or unrelated.",
-        output_type=IsWrong,
-    )
-
-    result = await Runner.run(guard_agent, new_conversation_tip, context=ctx.context)
-
-    if result.final_output.is_wrong:
+    if await conversation_tip_guardrail.is_wrong(new_conversation_tip, ctx.context):
         return
     else:
         websocket = ctx.context["websocket"]
-        return await websocket.send_json({"new_conversation_tip": new_conversation_tip})
+        return await send_json(
+            websocket, {"new_conversation_tip": new_conversation_tip}
+        )
 
 
 class ConversationTipsAgent(TranscriptionAgent):
-    def __init__(self, websocket: WebSocket):
-        super().__init__(websocket)
+    priority = Priority.LOW
+    deadline_seconds = 20
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        transcript_log: TranscriptLog,
+        position: Optional[int] = None,
+    ):
+        super().__init__(websocket, transcript_log, position)
         self.agenda_agent = Agent(
             name="Conversation Tips",
             model="gpt-4.1",
@@ -286,20 +527,14 @@ class ConversationTipsAgent(TranscriptionAgent):
             ),
             tools=[send_conversation_tip_via_websocket],
         )
-        # Initial chat history will be updated when we receive the agenda info
-        self.chat_history = []
 
-    async def process_final_transcript(self):
+    async def process_final_transcript(self, segments: list[TranscriptSegment]):
         # Only process if we have received agenda information
-        if not self.agenda_info and not self.chat_history:
-            print("Waiting for agenda information before processing transcripts...")
+        if not self.agenda_info and not self.chat_history.turns:
+            logger.debug(
+                "Waiting for agenda information before processing transcripts..."
+            )
             return
 
-        result = await Runner.run(
-            self.agenda_agent,
-            self.chat_history,
-            context={"websocket": self.websocket},
-        )
-        print("Conversation Tips Agent output:", result.final_output)
-
-        self.chat_history = result.to_input_list()
+        result = await self.run_agent(self.agenda_agent, {"websocket": self.websocket})
+        logger.debug("Conversation Tips Agent output: %s", result.final_output)
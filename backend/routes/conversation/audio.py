@@ -0,0 +1,131 @@
+import asyncio
+import base64
+import json
+import os
+import time
+from typing import Awaitable, Callable
+
+from core.metrics import metrics
+
+# Input audio format expected by the realtime transcription API (pcm16)
+AUDIO_SAMPLE_RATE = 24000
+AUDIO_SAMPLE_WIDTH = 2
+
+# Length of audio gathered into one `input_audio_buffer.append` message.
+# Set to 0 to forward every client frame as it arrives.
+AUDIO_COALESCE_MS = int(os.environ.get("AUDIO_COALESCE_MS", "100"))
+
+# JSON overhead of a single append message, excluding the audio itself
+APPEND_ENVELOPE_BYTES = len(
+    json.dumps({"type": "input_audio_buffer.append", "audio": ""})
+)
+
+
+class AudioCoalescer:
+    """
+    Accumulate PCM frames from the client and forward them upstream as one
+    `input_audio_buffer.append` message per window.
+
+    A window closes when `window_ms` of audio has been buffered or when the
+    oldest buffered byte is `window_ms` old, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        window_ms: int = AUDIO_COALESCE_MS,
+        max_bytes: int | None = None,
+    ):
+        self.send = send
+        self.window_seconds = window_ms / 1000
+        if max_bytes is None:
+            max_bytes = int(
+                AUDIO_SAMPLE_RATE * AUDIO_SAMPLE_WIDTH * self.window_seconds
+            )
+        self.max_bytes = max(max_bytes, 1)
+
+        self.buffer = bytearray(self.max_bytes)
+        self.size = 0
+        self.first_frame_at: float | None = None
+        # Arrival times of the frames in the current window
+        self.frame_times: list[float] = []
+
+        # Metrics
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.messages_out = 0
+
+    async def push(self, data: bytes):
+        """Buffer a client frame, flushing whenever a window fills up."""
+        self.frames_in += 1
+        self.bytes_in += len(data)
+        self.frame_times.append(time.perf_counter())
+
+        if self.window_seconds <= 0:
+            await self._send(self._encode(data))
+            return
+
+        view = memoryview(data)
+        while view:
+            if self.first_frame_at is None:
+                self.first_frame_at = time.monotonic()
+            n = min(len(view), self.max_bytes - self.size)
+            self.buffer[self.size : self.size + n] = view[:n]
+            self.size += n
+            view = view[n:]
+            if self.size >= self.max_bytes:
+                await self.flush()
+
+        if self.is_due():
+            await self.flush()
+
+    def is_due(self) -> bool:
+        return (
+            self.size > 0
+            and time.monotonic() - self.first_frame_at >= self.window_seconds
+        )
+
+    async def flush(self):
+        """Send whatever is buffered as a single append message."""
+        if not self.size:
+            return
+        # Encode and reset before awaiting so concurrent pushes start a new window
+        message = self._encode(memoryview(self.buffer)[: self.size])
+        self.size = 0
+        self.first_frame_at = None
+        await self._send(message)
+
+    async def run(self):
+        """Flush windows that aged out while no new frames arrived."""
+        if self.window_seconds <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.window_seconds / 2)
+            if self.is_due():
+                await self.flush()
+
+    def _encode(self, audio) -> str:
+        # For the transcription API, audio data must be sent as base64 in a JSON message
+        audio_message = {
+            "type": "input_audio_buffer.append",
+            "audio": base64.b64encode(audio).decode("utf-8"),
+        }
+        return json.dumps(audio_message)
+
+    async def _send(self, message: str):
+        self.messages_out += 1
+        frame_times, self.frame_times = self.frame_times, []
+        await self.send(message)
+        forwarded_at = time.perf_counter()
+        for received_at in frame_times:
+            metrics.observe("frame_forward", forwarded_at - received_at, "")
+
+    def stats(self) -> dict[str, int]:
+        messages_saved = max(self.frames_in - self.messages_out, 0)
+        return {
+            "frames_in": self.frames_in,
+            "bytes_in": self.bytes_in,
+            "messages_out": self.messages_out,
+            "messages_saved": messages_saved,
+            "bytes_saved": messages_saved * APPEND_ENVELOPE_BYTES,
+        }
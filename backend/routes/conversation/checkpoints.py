@@ -0,0 +1,242 @@
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Callable, Optional
+
+import numpy as np
+
+# Set to 0 to run the agenda agent on every transcript batch
+CHECKPOINT_PRESCREEN = os.environ.get("CHECKPOINT_PRESCREEN", "1") != "0"
+# Score a batch needs against an unfulfilled checklist item before the agenda
+# agent asks the model whether it was fulfilled
+CHECKPOINT_THRESHOLD = float(os.environ.get("CHECKPOINT_THRESHOLD", "0.4"))
+# Set to 1 to also score on character n-gram vectors
+CHECKPOINT_EMBEDDINGS = os.environ.get("CHECKPOINT_EMBEDDINGS", "0") != "0"
+# Batches skipped in a row after which the model runs anyway, so items
+# fulfilled in words the matcher doesn't know are still caught (0 disables)
+CHECKPOINT_MAX_SKIPPED = int(os.environ.get("CHECKPOINT_MAX_SKIPPED", "5"))
+
+# Size of the hashed character n-gram vectors
+EMBEDDING_DIMENSIONS = 1024
+NGRAM = 3
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Words that say nothing about which item is being discussed
+STOPWORDS = {
+    "a",
+    "about",
+    "all",
+    "an",
+    "and",
+    "any",
+    "are",
+    "as",
+    "at",
+    "be",
+    "by",
+    "can",
+    "do",
+    "for",
+    "from",
+    "get",
+    "have",
+    "how",
+    "i",
+    "if",
+    "in",
+    "is",
+    "it",
+    "its",
+    "let",
+    "lets",
+    "me",
+    "of",
+    "on",
+    "or",
+    "our",
+    "so",
+    "that",
+    "the",
+    "their",
+    "them",
+    "this",
+    "to",
+    "us",
+    "was",
+    "we",
+    "what",
+    "when",
+    "which",
+    "will",
+    "with",
+    "would",
+    "you",
+    "your",
+}
+
+SUFFIXES = ("ations", "ation", "ments", "ment", "ings", "ing", "ies", "ed", "es", "s")
+
+# Meeting vocabulary with the same meaning for checklist matching, by stem
+SYNONYMS = [
+    {"pric", "cost", "budget", "fee", "discount", "quot"},
+    {"schedul", "meet", "invit", "calendar", "monday", "tuesday", "wednesday"}
+    | {"thursday", "friday"},
+    {"decision", "decid", "maker", "sign", "approv", "cfo", "ceo"},
+    {"owner", "own", "assign", "tak"},
+    {"hir", "headcount", "recruit", "candidat"},
+    {"releas", "ship", "launch"},
+    {"follow", "next", "step", "proposal"},
+    {"demo", "show", "screen"},
+]
+CANONICAL = {word: sorted(group)[0] for group in SYNONYMS for word in group}
+
+
+def stem(word: str) -> str:
+    """Strip a common suffix so "pricing" and "prices" share a term."""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)]
+            if word[-1] == word[-2]:
+                # "shipp" from "shipping"
+                word = word[:-1]
+            return word
+    if word.endswith("e") and len(word) >= 4:
+        word = word[:-1]
+    return word
+
+
+def terms(text: str) -> list[str]:
+    return [
+        CANONICAL.get(stem(word), stem(word))
+        for word in WORD_RE.findall(text.lower())
+        if word not in STOPWORDS
+    ]
+
+
+def ngram_vector(words: list[str]) -> np.ndarray:
+    """Unit vector of hashed character n-grams, a small local stand-in for an embedding."""
+    vector = np.zeros(EMBEDDING_DIMENSIONS)
+    for word in words:
+        padded = f" {word} "
+        for start in range(len(padded) - NGRAM + 1):
+            gram = padded[start : start + NGRAM]
+            vector[zlib.crc32(gram.encode()) % EMBEDDING_DIMENSIONS] += 1
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ChecklistIndex:
+    """
+    Local matcher between transcript text and the agenda's checklist items.
+
+    An item's score is the share of its words (weighted by how specific they
+    are to that item) found in the text, or the cosine similarity of their
+    character n-gram vectors when that is higher, which catches inflections
+    and compounds the word match misses. `embed` can replace the n-gram
+    vectors with a real embedding model.
+    """
+
+    def __init__(
+        self,
+        items: list[str],
+        threshold: float = CHECKPOINT_THRESHOLD,
+        embeddings: bool = CHECKPOINT_EMBEDDINGS,
+        embed: Optional[Callable[[list[str]], np.ndarray]] = None,
+    ):
+        self.items = items
+        self.threshold = threshold
+        self.embed = (embed or ngram_vector) if embeddings else None
+        self.item_terms = [set(terms(item)) for item in items]
+
+        # Words shared by many items say less about any one of them
+        document_frequency = Counter()
+        for item_terms in self.item_terms:
+            document_frequency.update(item_terms)
+        self.weights = {
+            term: math.log(1 + len(items) / frequency)
+            for term, frequency in document_frequency.items()
+        }
+        self.item_vectors = (
+            [self.embed(sorted(item_terms)) for item_terms in self.item_terms]
+            if self.embed
+            else None
+        )
+
+    def scores(self, text: str) -> list[float]:
+        """Similarity of `text` to every checklist item, between 0 and 1."""
+        words = terms(text)
+        present = set(words)
+        vector = self.embed(words) if self.embed else None
+
+        scores = []
+        for index, item_terms in enumerate(self.item_terms):
+            total = sum(self.weights[term] for term in item_terms)
+            found = sum(self.weights[term] for term in item_terms & present)
+            score = found / total if total else 0.0
+            if vector is not None:
+                score = max(score, float(vector @ self.item_vectors[index]))
+            scores.append(score)
+        return scores
+
+    def candidates(self, text: str, fulfilled: set[int] = frozenset()) -> list[int]:
+        """Numbers (1-based, as in the prompt) of unfulfilled items `text` may complete."""
+        return [
+            number
+            for number, score in enumerate(self.scores(text), 1)
+            if number not in fulfilled and score >= self.threshold
+        ]
+
+
+class CheckpointPrescreen:
+    """
+    Decides whether a transcript batch is worth an agenda model run.
+
+    Each batch is scored together with the previous one, since an item is
+    often settled in the answer to a question. Items the agent reported as
+    fulfilled are no longer matched, and after `max_skipped` skipped batches
+    in a row the model runs regardless.
+    """
+
+    def __init__(
+        self,
+        items: list[str],
+        threshold: float = CHECKPOINT_THRESHOLD,
+        embeddings: bool = CHECKPOINT_EMBEDDINGS,
+        max_skipped: int = CHECKPOINT_MAX_SKIPPED,
+    ):
+        self.index = ChecklistIndex(items, threshold=threshold, embeddings=embeddings)
+        self.max_skipped = max_skipped
+        self.fulfilled: set[int] = set()
+        self.previous = ""
+        self.skipped_in_row = 0
+
+        # Metrics
+        self.checked = 0
+        self.matched = 0
+        self.forced = 0
+
+    def should_run(self, text: str) -> bool:
+        self.checked += 1
+        window, self.previous = f"{self.previous} {text}", text
+        if len(self.fulfilled) == len(self.index.items):
+            return False
+        if self.index.candidates(window, self.fulfilled):
+            self.matched += 1
+        elif self.max_skipped and self.skipped_in_row >= self.max_skipped:
+            self.forced += 1
+        else:
+            self.skipped_in_row += 1
+            return False
+        self.skipped_in_row = 0
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "checked": self.checked,
+            "matched": self.matched,
+            "forced": self.forced,
+            "fulfilled": len(self.fulfilled),
+        }
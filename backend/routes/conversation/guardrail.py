@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import re
+from typing import Any, Optional
+
+from agents import Agent
+from pydantic import BaseModel
+
+from core.cache import CacheBackend, MemoryCache
+from core.scheduler import scheduler
+
+GUARDRAIL_CACHE_SIZE = int(os.environ.get("GUARDRAIL_CACHE_SIZE", "512"))
+GUARDRAIL_CACHE_TTL_SECONDS = float(
+    os.environ.get("GUARDRAIL_CACHE_TTL_SECONDS", "3600")
+)
+# Set to 1 to reject content with a blocked term without asking the model;
+# everything else is always checked by the model
+GUARDRAIL_PREFILTER = os.environ.get("GUARDRAIL_PREFILTER", "0") != "0"
+
+# Content containing any of these is rejected without asking the model
+BLOCKED_TERMS = {
+    "idiot",
+    "stupid",
+    "shut up",
+    "violence",
+    "weapon",
+    "suicide",
+    "racist",
+    "sexist",
+    "threaten",
+    "fire them",
+}
+
+PUNCTUATION_RE = re.compile(r"[^\w\s'-]")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+class IsWrong(BaseModel):
+    is_wrong: bool
+    reasoning: str
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = PUNCTUATION_RE.sub(" ", text.lower())
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+def contains_term(normalized: str, terms: set[str]) -> bool:
+    padded = f" {normalized} "
+    return any(f" {term} " in padded for term in terms)
+
+
+class Guardrail:
+    """
+    Decide whether content produced by an agent should be withheld.
+
+    Verdicts are cached by normalized text, identical checks already in
+    flight are shared, and an optional keyword pre-filter rejects clearly
+    harmful content without a model call. Only the model approves content.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        agent: Agent,
+        cache: Optional[CacheBackend] = None,
+        prefilter: bool = GUARDRAIL_PREFILTER,
+    ):
+        self.name = name
+        self.agent = agent
+        self.cache = cache or MemoryCache(max_size=GUARDRAIL_CACHE_SIZE)
+        self.prefilter_enabled = prefilter
+        self.in_flight: dict[str, asyncio.Future] = {}
+
+        # Metrics
+        self.checks = 0
+        self.cache_hits = 0
+        self.prefilter_blocked = 0
+        self.model_calls = 0
+
+    def prefilter(self, normalized: str) -> bool:
+        """Whether the content is clearly harmful, without asking the model."""
+        if contains_term(normalized, BLOCKED_TERMS):
+            self.prefilter_blocked += 1
+            return True
+        return False
+
+    async def is_wrong(self, text: str, context: Optional[Any] = None) -> bool:
+        self.checks += 1
+        key = normalize(text)
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return json.loads(cached)
+
+        if key in self.in_flight:
+            self.cache_hits += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        verdict = True if self.prefilter_enabled and self.prefilter(key) else None
+        if verdict is None:
+            future = asyncio.get_running_loop().create_future()
+            self.in_flight[key] = future
+            try:
+                self.model_calls += 1
+                result = await scheduler.run(self.agent, text, context=context)
+                verdict = result.final_output.is_wrong
+                future.set_result(verdict)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # Mark the exception as retrieved in case nobody else waits
+                future.exception()
+                raise
+            finally:
+                del self.in_flight[key]
+
+        await self.cache.set(key, json.dumps(verdict), GUARDRAIL_CACHE_TTL_SECONDS)
+        return verdict
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "checks": self.checks,
+            "cache_hits": self.cache_hits,
+            "prefilter_blocked": self.prefilter_blocked,
+            "model_calls": self.model_calls,
+            "hit_rate": (
+                (self.checks - self.model_calls) / self.checks if self.checks else 0.0
+            ),
+        }
+
+
+checkpoint_guardrail = Guardrail(
+    "checkpoint",
+    Agent(
+        name="Guardrail check",
+        instructions="Check if the new checkpoint content is aggressive, harmful, dangerous or unrelated.",
+        output_type=IsWrong,
+    ),
+)
+
+conversation_tip_guardrail = Guardrail(
+    "conversation_tip",
+    Agent(
+        name="Guardrail check",
+        instructions="Check if the new conversation tip is aggressive, harmful, dangerous or unrelated.",
+        output_type=IsWrong,
+    ),
+)
+
+guardrails = [checkpoint_guardrail, conversation_tip_guardrail]
+
+# Counters served at /metrics, with the help text of each
+COUNTERS = {
+    "checks": "Guardrail checks requested.",
+    "cache_hits": "Checks answered from the verdict cache or a check in flight.",
+    "prefilter_blocked": "Checks rejected by the keyword pre-filter.",
+    "model_calls": "Checks that asked the guardrail model.",
+}
+
+
+def render_metrics() -> str:
+    """Guardrail counters in the Prometheus text format."""
+    lines = []
+    for counter, help_text in COUNTERS.items():
+        name = f"guardrail_{counter}_total"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for guardrail in guardrails:
+            value = guardrail.stats()[counter]
+            lines.append(f'{name}{{guardrail="{guardrail.name}"}} {value}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+from typing import Any, Optional
+
+from agents import Agent
+
+from core.scheduler import scheduler
+from routes.conversation.prompts import HISTORY_SUMMARY_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio, good enough to keep prompts within budget
+CHARS_PER_TOKEN = 4
+
+# Defaults for how much of the meeting an agent keeps verbatim
+HISTORY_MAX_TURNS = int(os.environ.get("AGENT_HISTORY_MAX_TURNS", "12"))
+HISTORY_TOKEN_BUDGET = int(os.environ.get("AGENT_HISTORY_TOKEN_BUDGET", "4000"))
+
+summarizer_agent = Agent(
+    name="History Summarizer",
+    model="gpt-4.1-mini",
+    instructions=HISTORY_SUMMARY_PROMPT,
+)
+
+
+def estimate_tokens(item: Any) -> int:
+    """Estimate the token count of an input item or string."""
+    text = item if isinstance(item, str) else json.dumps(item, default=str)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def item_to_text(item: dict[str, Any]) -> str:
+    """Render an input item as a transcript line for the summarizer."""
+    if item.get("type") == "function_call":
+        return f"[{item.get('name')}({item.get('arguments')})]"
+    if "role" not in item:
+        # Tool outputs and other bookkeeping items carry no meeting content
+        return ""
+
+    content = item.get("content")
+    if isinstance(content, list):
+        content = " ".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    if not content:
+        return ""
+    return f"{item['role']}: {content}"
+
+
+class ChatHistory:
+    """
+    Sliding-window chat history for a conversation agent.
+
+    The agenda system message is pinned, the most recent turns are kept
+    verbatim, and older turns are rolled into a running summary once the
+    history grows past `max_turns` or `token_budget`. A turn is a user
+    message together with every item the agent produced in response, so tool
+    calls are never split from their outputs.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = HISTORY_MAX_TURNS,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+    ):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.system_message: Optional[dict[str, Any]] = None
+        self.summary = ""
+        self.turns: list[list[dict[str, Any]]] = []
+
+    def set_system(self, content: str):
+        """Pin the system message (e.g. the agenda) at the top of the history."""
+        self.system_message = {"role": "system", "content": content}
+
+    def append(self, item: dict[str, Any]):
+        if item.get("role") == "user" or not self.turns:
+            self.turns.append([item])
+        else:
+            self.turns[-1].append(item)
+
+    def extend(self, items: list[dict[str, Any]]):
+        for item in items:
+            self.append(item)
+
+    def as_input(self) -> list[dict[str, Any]]:
+        """Return the history as input items for Runner.run."""
+        items = []
+        if self.system_message:
+            items.append(self.system_message)
+        if self.summary:
+            items.append(
+                {
+                    "role": "system",
+                    "content": f"Summary of the earlier meeting:\n{self.summary}",
+                }
+            )
+        for turn in self.turns:
+            items.extend(turn)
+        return items
+
+    def token_count(self) -> int:
+        return sum(estimate_tokens(item) for item in self.as_input())
+
+    def is_over_budget(self) -> bool:
+        return len(self.turns) > self.max_turns or (
+            self.token_count() > self.token_budget
+        )
+
+    async def compact(self):
+        """
+        Roll the oldest turns into the summary once the history is over its
+        limits. Turns are evicted down to half the limits so the summarizer
+        runs once per several turns rather than on every new one.
+        """
+        if len(self.turns) <= 1 or not self.is_over_budget():
+            return
+
+        evicted = []
+        while len(self.turns) > 1 and (
+            len(self.turns) > self.max_turns // 2
+            or self.token_count() > self.token_budget // 2
+        ):
+            evicted.extend(self.turns.pop(0))
+
+        lines = [line for line in map(item_to_text, evicted) if line]
+        if lines:
+            self.summary = await self.summarize("\n".join(lines))
+
+    async def summarize(self, evicted_text: str) -> str:
+        prompt = (
+            f"Current summary:\n{self.summary or '(empty)'}\n\n"
+            f"Older meeting content to fold in:\n{evicted_text}"
+        )
+        try:
+            result = await scheduler.run(summarizer_agent, prompt)
+            return str(result.final_output)
+        except Exception as e:
+            logger.exception("Error summarizing chat history: %s", e)
+            # Fall back to keeping the most recent part of the raw text
+            max_chars = self.token_budget // 4 * CHARS_PER_TOKEN
+            return f"{self.summary}\n{evicted_text}".strip()[-max_chars:]
@@ -53,3 +53,18 @@ You are an AI assistant tasked with monitoring a meeting transcription in real-t
    - Ensure you have sufficient context (at least 2-3 exchanges on the unrelated topic) before determining something is off-topic.
    - Update the topic status whenever there's a significant shift in discussion, even if it remains on-topic.
 """
+
+
+HISTORY_SUMMARY_PROMPT = """
+You maintain a running summary of a meeting for an AI assistant that monitors it in real-time.
+
+You will receive the current summary (possibly empty) followed by older parts of the meeting transcription and the assistant's actions that no longer fit in its context window.
+
+Update the summary so that it:
+- Keeps every fact, decision, commitment and open question that may matter later in the meeting.
+- Keeps which agenda or checklist items were already discussed or marked as fulfilled, and any topic warnings or tips already sent.
+- Drops greetings, filler and repetitions.
+- Stays concise: at most a few short paragraphs or bullet points.
+
+Return only the updated summary.
+"""
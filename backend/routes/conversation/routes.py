@@ -1,22 +1,40 @@
 import asyncio
-import base64
 import json
+import logging
 import os
 import traceback
+from typing import Optional
 
 import websockets
 from dotenv import load_dotenv
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from core.log_config import SAMPLED
+from core.scheduler import current_session
 from routes.conversation.agent import (
     AgendaAgent,
     ConversationTipsAgent,
     EngagementAgent,
     OfftopicAgent,
 )
+from routes.conversation.audio import AudioCoalescer
+from routes.conversation.sessions import (
+    SESSION_LIMIT_CLOSE_CODE,
+    Session,
+    SessionLimitReached,
+    session_manager,
+)
+from routes.conversation.transcript import TranscriptAssembler, TranscriptLog
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Realtime transcription endpoint, overridable to point at a local stand-in
+OPENAI_REALTIME_URL = os.environ.get(
+    "OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime?intent=transcription"
+)
+
 conversation_router = APIRouter(prefix="/conversation", tags=["conversation"])
 
 
@@ -24,24 +42,50 @@ conversation_router = APIRouter(prefix="/conversation", tags=["conversation"])
 async def transcribe_audio(websocket: WebSocket):
     await websocket.accept()
 
-    agents = [
-        AgendaAgent(websocket),
-        EngagementAgent(websocket),
-        OfftopicAgent(websocket),
-        ConversationTipsAgent(websocket),
-    ]
+    try:
+        session = session_manager.open()
+    except SessionLimitReached as e:
+        logger.warning("Rejecting transcription session: %s", e)
+        await websocket.send_json({"error": str(e)})
+        await websocket.close(code=SESSION_LIMIT_CLOSE_CODE)
+        return
 
-    for agent in agents:
-        asyncio.create_task(agent.process_transcripts())
+    try:
+        await run_session(websocket, session)
+    finally:
+        # Cancel every agent and receiver task started for this connection
+        await session_manager.close(session)
+
+
+@conversation_router.get("/sessions")
+async def session_stats():
+    """Live counts of transcription sessions and their tasks."""
+    return session_manager.stats()
 
+
+async def run_session(websocket: WebSocket, session: Session):
     openai_api_key = os.environ.get("OPENAI_API_KEY")
     if not openai_api_key:
         await websocket.send_json({"error": "OpenAI API key not found"})
         await websocket.close()
         return
 
+    # Single copy of the meeting transcript, read by every agent
+    transcript_log = TranscriptLog()
+    agents = [
+        AgendaAgent(websocket, transcript_log),
+        EngagementAgent(websocket, transcript_log),
+        OfftopicAgent(websocket, transcript_log),
+        ConversationTipsAgent(websocket, transcript_log),
+    ]
+
+    # Model runs of this session's agents share one fairness slot
+    current_session.set(session.id)
+    for agent in agents:
+        session.spawn(agent.process_transcripts(), name=type(agent).__name__)
+
     # OpenAI WebSocket URL for real-time transcription
-    openai_url = "wss://api.openai.com/v1/realtime?intent=transcription"
+    openai_url = OPENAI_REALTIME_URL
 
     try:
         headers = {
@@ -49,20 +93,22 @@ async def transcribe_audio(websocket: WebSocket):
             "OpenAI-Beta": "realtime=v1",
         }
 
-        print(f"Connecting to OpenAI at {openai_url}")
+        logger.info("Connecting to OpenAI at %s", openai_url)
         # Connect to OpenAI
         async with websockets.connect(
             openai_url, additional_headers=headers
         ) as openai_ws:
-            print("Connected to OpenAI WebSocket")
-            await handle_connection(websocket, openai_ws, agents)
+            logger.info("Connected to OpenAI WebSocket")
+            await handle_connection(
+                websocket, openai_ws, agents, transcript_log, session
+            )
 
     except Exception as e:
         error_msg = f"Error: {str(e)}"
         # Only log full traceback for non-connection-closed errors
         if not isinstance(e, websockets.ConnectionClosedOK):
             error_msg += f"\n{traceback.format_exc()}"
-        print(error_msg)  # Print to server logs
+        logger.error(error_msg)
 
         # Check if the websocket is still open before trying to send/close
         if not websocket.client_state.DISCONNECTED:
@@ -70,8 +116,11 @@ async def transcribe_audio(websocket: WebSocket):
             await websocket.close()
 
 
-async def handle_connection(websocket, openai_ws, agents):
+async def handle_connection(
+    websocket, openai_ws, agents, transcript_log, session: Optional[Session] = None
+):
     """Handle the connection between client and OpenAI."""
+    spawn = session.spawn if session else asyncio.create_task
 
     # Send session configuration to OpenAI
     session_config = {
@@ -94,12 +143,17 @@ async def handle_connection(websocket, openai_ws, agents):
 
     try:
         await openai_ws.send(json.dumps(session_config))
-        print("Sent session configuration to OpenAI")
+        logger.info("Sent session configuration to OpenAI")
     except Exception as e:
-        print(f"Error sending session configuration: {e}")
+        logger.error("Error sending session configuration: %s", e)
         await websocket.send_json({"error": f"Failed to configure session: {str(e)}"})
         return
 
+    # Speaker ("host"/"guest") the client reports for the audio being sent
+    active_speaker = None
+    # Turns transcription deltas into partial and final transcript segments
+    assembler = TranscriptAssembler(transcript_log)
+
     # Task to receive messages from OpenAI and forward to client
     async def receive_from_openai():
         try:
@@ -113,7 +167,7 @@ async def handle_connection(websocket, openai_ws, agents):
 
                     # Handle different event types
                     if event_type == "transcription_session.created":
-                        print(f"Transcription session created: {data}")
+                        logger.info("Transcription session created: %s", data)
                         await websocket.send_json(
                             {
                                 "status": "Session created",
@@ -122,44 +176,68 @@ async def handle_connection(websocket, openai_ws, agents):
                         )
 
                     elif event_type == "transcription_session.updated":
-                        print(f"Transcription session updated: {data}")
+                        logger.info("Transcription session updated: %s", data)
                         await websocket.send_json(
                             {"status": "Session configuration updated"}
                         )
 
-                    # elif (
-                    #     event_type
-                    #     == "conversation.item.input_audio_transcription.delta"
-                    # ):
-                    #     delta = data.get("delta", "")
-                    #     if delta:
-                    #         current_transcript += delta
-                    #         await websocket.send_json(
-                    #             {"text": current_transcript, "is_final": False}
-                    #         )
+                    elif event_type in (
+                        "input_audio_buffer.speech_started",
+                        "input_audio_buffer.committed",
+                    ):
+                        # Transcripts arrive seconds after the audio, by when
+                        # the client may have switched speakers
+                        assembler.start(data.get("item_id"), speaker=active_speaker)
+                        await websocket.send_text(message)
+
+                    elif (
+                        event_type
+                        == "conversation.item.input_audio_transcription.delta"
+                    ):
+                        delta = data.get("delta", "")
+                        if delta:
+                            assembler.add_delta(
+                                data.get("item_id"), delta, speaker=active_speaker
+                            )
+                        # Forwarded to the client as before
+                        await websocket.send_text(message)
 
                     elif (
                         event_type
                         == "conversation.item.input_audio_transcription.completed"
                     ):
                         # Final transcription
-                        # print(f"Final transcription: {data}")
+                        logger.debug("Final transcription: %s", data)
                         final_transcript = data.get("transcript", "")
-                        if final_transcript:
-                            for agent in agents:
-                                await agent.add_transcript(final_transcript)
-                            # await websocket.send_json(
-                            #     {"text": final_transcript, "is_final": True}
-                            # )
+                        assembler.complete(
+                            data.get("item_id"),
+                            final_transcript,
+                            speaker=active_speaker,
+                        )
+                        # await websocket.send_json(
+                        #     {"text": final_transcript, "is_final": True}
+                        # )
+
+                    elif (
+                        event_type
+                        == "conversation.item.input_audio_transcription.failed"
+                    ):
+                        logger.warning(
+                            "Transcription of %s failed: %s",
+                            data.get("item_id"),
+                            (data.get("error") or {}).get("message"),
+                        )
+                        assembler.fail(data.get("item_id"))
+                        await websocket.send_text(message)
 
                     elif event_type == "input_audio_buffer.speech_stopped":
-                        print("Speech stopped detected")
+                        logger.debug("Speech stopped detected", extra=SAMPLED)
                         await websocket.send_json({"status": "Speech stopped detected"})
 
                     elif event_type == "error":
                         error_info = data.get("error", {})
                         error_msg = f"Error from OpenAI: {error_info.get('message', 'Unknown error')}"
-                        print(error_msg)
+                        logger.error(error_msg)
                         await websocket.send_json({"error": error_msg})
 
                     else:
@@ -181,99 +259,54 @@ async def handle_connection(websocket, openai_ws, agents):
                 )
 
     # Start receiving task
-    openai_task = asyncio.create_task(receive_from_openai())
+    openai_task = spawn(receive_from_openai(), name="openai_receiver")
 
-    # Listen for audio data from client and forward to OpenAI
+    async def handle_text(message_data):
+        """Handle a control message (e.g. agenda information) from the client."""
+        nonlocal active_speaker
+        try:
+            json_data = json.loads(message_data)
+        except json.JSONDecodeError:
+            logger.warning("Received non-JSON text: %.200s", message_data)
+            return
+
+        # Handle agenda information
+        if json_data.get("type") == "agenda_info" and "agenda" in json_data:
+            logger.info("Received agenda information")
+            for agent in agents:
+                await agent.add_agenda_info(json_data["agenda"])
+            await websocket.send_json({"status": "Agenda information received"})
+
+        # Handle speaker metadata, e.g. from a per-participant audio channel
+        elif json_data.get("type") == "speaker_info":
+            active_speaker = json_data.get("user_type")
+
+    # Coalesce client audio frames into fewer, larger upstream messages
+    audio_coalescer = AudioCoalescer(openai_ws.send)
+    audio_flush_task = spawn(audio_coalescer.run(), name="audio_flush")
+
+    # Listen for audio data and control messages from the client. A single
+    # receive() call returns whichever frame arrives next, text or binary,
+    # so frames are dispatched as soon as they land without polling.
     try:
         while True:
-            try:
-                # Try to receive different types of messages
-                message_type = None
-                message_data = None
+            message = await websocket.receive()
 
-                # First check if there's a text message (for agenda info)
-                try:
-                    message_data = await asyncio.wait_for(
-                        websocket.receive_text(), timeout=0.01
-                    )
-                    message_type = "text"
-                except (asyncio.TimeoutError, KeyError):
-                    # No text message available, try binary
-                    pass
-
-                # If no text message, try binary
-                if message_type is None:
-                    try:
-                        message_data = await websocket.receive_bytes()
-                        message_type = "binary"
-                    except Exception as e:
-                        # If this fails too, it might be a connection issue
-                        print(f"Error receiving message: {e}")
-                        await asyncio.sleep(0.01)
-                        continue
-
-                # Process the message based on its type
-                if message_type == "text":
-                    try:
-                        json_data = json.loads(message_data)
-
-                        # Handle agenda information
-                        if (
-                            json_data.get("type") == "agenda_info"
-                            and "agenda" in json_data
-                        ):
-                            print("Received agenda information")
-                            for agent in agents:
-                                await agent.add_agenda_info(json_data["agenda"])
-                            await websocket.send_json(
-                                {"status": "Agenda information received"}
-                            )
-                    except json.JSONDecodeError:
-                        print(f"Received non-JSON text: {message_data}")
-
-                elif message_type == "binary":
-                    # Process binary audio data
-                    # For the transcription API, audio data must be sent as base64 in a JSON message
-                    # Convert binary audio data to base64
-                    base64_audio = base64.b64encode(message_data).decode("utf-8")
-
-                    # Format audio data for OpenAI transcription API
-                    audio_message = {
-                        "type": "input_audio_buffer.append",
-                        "audio": base64_audio,
-                    }
-
-                    # Send JSON audio message to OpenAI
-                    await openai_ws.send(json.dumps(audio_message))
+            if message["type"] == "websocket.disconnect":
+                logger.info("Client disconnected")
+                break
 
-                # Add a small yield to the event loop to allow other tasks to run
-                await asyncio.sleep(0.01)
+            try:
+                if message.get("bytes") is not None:
+                    await audio_coalescer.push(message["bytes"])
+                elif message.get("text") is not None:
+                    await handle_text(message["text"])
 
-            except websockets.ConnectionClosedOK:
-                print("OpenAI connection closed normally")
-                break
-            except WebSocketDisconnect:
-                print("Client disconnected")
+            except websockets.ConnectionClosed as e:
+                logger.info("OpenAI connection closed: %s", e)
                 break
-            except RuntimeError as e:
-                # Check for the specific disconnect error
-                if (
-                    'Cannot call "receive" once a disconnect message has been received.'
-                    in str(e)
-                ):
-                    print("WebSocket already disconnected, stopping receive loop.")
-                    break
-                else:
-                    print(f"RuntimeError: {e}")
-                    # Only try to send error if still connected
-                    if websocket.client_state.name == "CONNECTED":
-                        await websocket.send_json({"error": str(e)})
-                    break
             except Exception as e:
-                import traceback
-
-                traceback.print_exc()
-                print(f"Error processing message: {e}")
+                logger.exception("Error processing message: %s", e)
                 # Only try to send error if still connected
                 if websocket.client_state.name == "CONNECTED":
                     await websocket.send_json(
@@ -282,9 +315,15 @@ async def handle_connection(websocket, openai_ws, agents):
                 continue
     except WebSocketDisconnect:
         # Client disconnected
-        print("Client disconnected")
+        logger.info("Client disconnected")
     finally:
         # Clean up
+        audio_flush_task.cancel()
+        try:
+            await audio_coalescer.flush()
+        except Exception:
+            pass
+        logger.info("Audio forwarding stats: %s", audio_coalescer.stats())
         openai_task.cancel()
         try:
             await openai_ws.close()
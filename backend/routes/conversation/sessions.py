@@ -0,0 +1,91 @@
+import asyncio
+import itertools
+import logging
+import os
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+# Transcription sessions served concurrently by one process; further
+# connections are rejected until a session ends
+MAX_TRANSCRIBE_SESSIONS = int(os.environ.get("MAX_TRANSCRIBE_SESSIONS", "50"))
+
+# Close code sent to rejected clients ("try again later")
+SESSION_LIMIT_CLOSE_CODE = 1013
+
+
+class SessionLimitReached(Exception):
+    pass
+
+
+class Session:
+    """Owner of the background tasks of one transcription connection."""
+
+    def __init__(self, session_id: int):
+        self.id = session_id
+        self.tasks: set[asyncio.Task] = set()
+
+    def spawn(
+        self, coro: Coroutine[Any, Any, Any], name: Optional[str] = None
+    ) -> asyncio.Task:
+        """Start a task that is cancelled when the session closes."""
+        task = asyncio.create_task(coro, name=f"session-{self.id}:{name or 'task'}")
+        self.tasks.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(
+                "Session %s task %s failed: %s",
+                self.id,
+                task.get_name(),
+                task.exception(),
+                exc_info=task.exception(),
+            )
+
+    async def cancel(self):
+        """Cancel every task of the session and wait for them to unwind."""
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class SessionManager:
+    """Track live transcription sessions and cap how many run at once."""
+
+    def __init__(self, max_sessions: int = MAX_TRANSCRIBE_SESSIONS):
+        self.max_sessions = max_sessions
+        self.sessions: dict[int, Session] = {}
+        self.ids = itertools.count(1)
+        self.opened = 0
+        self.rejected = 0
+
+    def open(self) -> Session:
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            raise SessionLimitReached(
+                f"Server is at capacity ({self.max_sessions} sessions), try again later"
+            )
+        session = Session(next(self.ids))
+        self.sessions[session.id] = session
+        self.opened += 1
+        return session
+
+    async def close(self, session: Session):
+        self.sessions.pop(session.id, None)
+        await session.cancel()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "active_sessions": len(self.sessions),
+            "active_tasks": sum(len(s.tasks) for s in self.sessions.values()),
+            "max_sessions": self.max_sessions,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+session_manager = SessionManager()
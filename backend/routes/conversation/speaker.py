@@ -0,0 +1,134 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Optional
+
+# Minimum confidence for a local host/guest label; below it the turn is
+# escalated to the Engagement Agent LLM
+SPEAKER_CONFIDENCE_THRESHOLD = float(
+    os.environ.get("SPEAKER_CONFIDENCE_THRESHOLD", "0.8")
+)
+
+USER_TYPES = ("host", "guest")
+
+# Cue words and bigrams typical of the person running the meeting
+# (facilitating, presenting)
+HOST_CUES = [
+    "agenda",
+    "next item",
+    "move on",
+    "moving on",
+    "let's",
+    "for joining",
+    "welcome",
+    "any questions",
+    "summarize",
+    "recap",
+    "next steps",
+    "our solution",
+    "our platform",
+    "our product",
+    "demo",
+    "we offer",
+    "tell us",
+    "walk you",
+    "your needs",
+]
+
+# Cue words and bigrams typical of the invited side (describing their needs,
+# asking about the offer)
+GUEST_CUES = [
+    "we currently",
+    "our challenge",
+    "our problem",
+    "struggle",
+    "we need",
+    "looking for",
+    "budget",
+    "how much",
+    "does it",
+    "can your",
+    "your product",
+    "your solution",
+    "your platform",
+    "pricing",
+    "integrate with",
+]
+
+# Weight of a seed cue, in pseudo-observations
+CUE_WEIGHT = 3
+# Probability that a turn comes from the same speaker as the previous one
+CONTINUITY_PRIOR = 0.6
+
+WORD_RE = re.compile(r"[a-z']+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words and word bigrams."""
+    words = WORD_RE.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class SpeakerAttributor:
+    """
+    Local host/guest classifier for transcript turns.
+
+    A small naive Bayes model over word and bigram features, seeded with
+    facilitation and customer cue phrases and updated with every label the
+    session confirms (explicit speaker metadata or an LLM verdict). Turns it
+    cannot label confidently are left for the LLM.
+    """
+
+    def __init__(self, threshold: float = SPEAKER_CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        self.counts = {user_type: Counter() for user_type in USER_TYPES}
+        self.totals = {user_type: 0 for user_type in USER_TYPES}
+        self.vocabulary: set[str] = set()
+        self.last_user_type: Optional[str] = None
+
+        for user_type, cues in (("host", HOST_CUES), ("guest", GUEST_CUES)):
+            self._add(user_type, cues, CUE_WEIGHT)
+
+    def _add(self, user_type: str, tokens: list[str], weight: int = 1):
+        for token in tokens:
+            self.counts[user_type][token] += weight
+        self.totals[user_type] += weight * len(tokens)
+        self.vocabulary.update(tokens)
+
+    def probability_host(self, text: str) -> float:
+        host_denominator = self.totals["host"] + len(self.vocabulary) + 1
+        guest_denominator = self.totals["guest"] + len(self.vocabulary) + 1
+
+        log_odds = 0.0
+        for token in tokenize(text):
+            if token not in self.vocabulary:
+                # Unseen tokens carry no evidence either way
+                continue
+            log_odds += math.log((self.counts["host"][token] + 1) / host_denominator)
+            log_odds -= math.log((self.counts["guest"][token] + 1) / guest_denominator)
+
+        if self.last_user_type is not None:
+            prior = math.log(CONTINUITY_PRIOR / (1 - CONTINUITY_PRIOR))
+            log_odds += prior if self.last_user_type == "host" else -prior
+
+        return 1 / (1 + math.exp(-log_odds))
+
+    def classify(self, text: str) -> tuple[Optional[str], float]:
+        """
+        Return (user_type, confidence). user_type is None when the confidence
+        is below the threshold and the turn should be escalated.
+        """
+        p_host = self.probability_host(text)
+        user_type = "host" if p_host >= 0.5 else "guest"
+        confidence = max(p_host, 1 - p_host)
+        if confidence < self.threshold:
+            return None, confidence
+        return user_type, confidence
+
+    def learn(self, text: str, user_type: str):
+        """Record a confirmed label for a turn."""
+        if user_type not in self.counts:
+            return
+        self._add(user_type, tokenize(text))
+        self.last_user_type = user_type
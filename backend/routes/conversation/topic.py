@@ -0,0 +1,79 @@
+import os
+from collections import deque
+from typing import Optional
+
+from routes.conversation.checkpoints import ChecklistIndex
+
+# Set to 0 to ask the model about every transcript batch
+OFFTOPIC_TRACKER = os.environ.get("OFFTOPIC_TRACKER", "1") != "0"
+# Best score against the agenda items below which a segment counts as unrelated
+OFFTOPIC_THRESHOLD = float(os.environ.get("OFFTOPIC_THRESHOLD", "0.2"))
+# Unrelated segments in a row before the discussion is taken to be off-topic,
+# the "3+ exchanges" of the prompt; the same window must be mostly related
+# again before it is back on-topic
+OFFTOPIC_WINDOW = int(os.environ.get("OFFTOPIC_WINDOW", "3"))
+
+
+class TopicTracker:
+    """
+    Local, per-session view of whether the meeting is on its agenda.
+
+    Every transcript segment is scored against the agenda items and its
+    best score kept in a sliding window of the last `window` segments. The
+    meeting goes off-topic once the whole window is unrelated, and comes back
+    once most of it is related, so a brief tangent or a single stray word
+    doesn't flip the state. `relevant_item` follows the best matching item
+    (1-based, as in the prompt) while on-topic.
+    """
+
+    def __init__(
+        self,
+        items: list[str],
+        threshold: float = OFFTOPIC_THRESHOLD,
+        window: int = OFFTOPIC_WINDOW,
+    ):
+        self.index = ChecklistIndex(items, threshold=threshold, embeddings=False)
+        self.threshold = threshold
+        self.window: deque[bool] = deque(maxlen=window)
+        self.is_offtopic = False
+        self.relevant_item: Optional[int] = None
+
+        # Metrics
+        self.observed = 0
+        self.changes = 0
+
+    def observe(self, text: str) -> bool:
+        """Score a segment, returning whether the tracked state changed."""
+        self.observed += 1
+        scores = self.index.scores(text)
+        best = max(scores, default=0.0)
+        related = best >= self.threshold
+        self.window.append(related)
+
+        is_offtopic = self.is_offtopic
+        if len(self.window) == self.window.maxlen and not any(self.window):
+            is_offtopic = True
+        elif sum(self.window) * 2 > len(self.window):
+            is_offtopic = False
+
+        relevant_item = self.relevant_item
+        if is_offtopic:
+            relevant_item = None
+        elif related:
+            relevant_item = scores.index(best) + 1
+
+        if (is_offtopic, relevant_item) == (self.is_offtopic, self.relevant_item):
+            return False
+        self.is_offtopic, self.relevant_item = is_offtopic, relevant_item
+        self.changes += 1
+        return True
+
+    def reset(self, is_offtopic: bool):
+        """Take over the model's verdict and start a new window from it."""
+        self.window.clear()
+        self.is_offtopic = is_offtopic
+        if is_offtopic:
+            self.relevant_item = None
+
+    def stats(self) -> dict[str, int]:
+        return {"observed": self.observed, "changes": self.changes}
@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Publish the partial transcript of an utterance still being spoken at every
+# sentence end, and at the latest every N words (0 disables either)
+PARTIAL_TRANSCRIPT_SENTENCES = os.environ.get(
+    "PARTIAL_TRANSCRIPT_SENTENCES", "true"
+).lower() in ("1", "true", "yes")
+PARTIAL_TRANSCRIPT_WORDS = int(os.environ.get("PARTIAL_TRANSCRIPT_WORDS", "20"))
+
+# Sentence-ending punctuation, possibly closed by a quote or bracket, then a space
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s")
+
+
+class TranscriptSegment(BaseModel):
+    id: int
+    timestamp: float
+    text: str
+    # "host" or "guest" when known from channel/diarization metadata
+    speaker: Optional[str] = None
+    # Transcription item the text belongs to; an utterance published while it
+    # was still being spoken spans several segments, the last one final
+    item_id: Optional[str] = None
+    final: bool = True
+
+
+def join_partials(segments: list[TranscriptSegment]) -> list[TranscriptSegment]:
+    """Merge consecutive segments of the same utterance into one."""
+    joined: list[TranscriptSegment] = []
+    for segment in segments:
+        previous = joined[-1] if joined else None
+        if (
+            previous is not None
+            and segment.item_id is not None
+            and previous.item_id == segment.item_id
+            and not previous.final
+        ):
+            joined[-1] = previous.model_copy(
+                update={
+                    "text": " ".join(filter(None, (previous.text, segment.text))),
+                    "speaker": segment.speaker or previous.speaker,
+                    "final": segment.final,
+                }
+            )
+        else:
+            joined.append(segment)
+    return joined
+
+
+class TranscriptLog:
+    """
+    Append-only log of the transcripts of one meeting session.
+
+    The log holds the only full copy of the meeting; agents read it through
+    their own TranscriptCursor, so an agent attached mid-meeting can replay
+    from any position. Besides final segments, TranscriptAssembler appends
+    partial segments (final=False) for an utterance still being spoken; the
+    segments of one utterance share its item_id and together hold its text
+    exactly once, its final segment carrying only what the partials didn't.
+    Cursors reading with `complete_only` stop before trailing partials and
+    return them with the final segment once the utterance completes;
+    join_partials merges each utterance back into a single segment.
+    """
+
+    def __init__(self):
+        self.segments: list[TranscriptSegment] = []
+        self._appended = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def append(
+        self,
+        text: str,
+        speaker: Optional[str] = None,
+        item_id: Optional[str] = None,
+        final: bool = True,
+    ) -> TranscriptSegment:
+        segment = TranscriptSegment(
+            id=len(self.segments),
+            timestamp=time.time(),
+            text=text,
+            speaker=speaker,
+            item_id=item_id,
+            final=final,
+        )
+        self.segments.append(segment)
+
+        # Wake up everyone waiting on the previous event and start a new one
+        appended, self._appended = self._appended, asyncio.Event()
+        appended.set()
+        return segment
+
+    async def wait_past(self, position: int, timeout: Optional[float] = None) -> bool:
+        """Wait until the log grows past `position`. Returns False on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while len(self.segments) <= position:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._appended.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def cursor(self, position: Optional[int] = None) -> "TranscriptCursor":
+        """Create a cursor at `position`, or at the end of the log if omitted."""
+        if position is None:
+            position = len(self.segments)
+        return TranscriptCursor(self, position)
+
+
+class TranscriptCursor:
+    """Read position of a single reader in a TranscriptLog."""
+
+    def __init__(self, log: TranscriptLog, position: int = 0):
+        self.log = log
+        self.position = position
+
+    def pending(self) -> int:
+        return len(self.log) - self.position
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until there is at least one unread segment."""
+        return await self.log.wait_past(self.position, timeout)
+
+    def read(self, complete_only: bool = False) -> list[TranscriptSegment]:
+        """
+        Return all unread segments and advance the cursor past them. With
+        `complete_only`, stop after the last segment that ends an utterance.
+        """
+        end = len(self.log)
+        if complete_only:
+            while end > self.position and not self.log.segments[end - 1].final:
+                end -= 1
+        segments = self.log.segments[self.position : end]
+        self.position = end
+        return segments
+
+
+class Utterance:
+    def __init__(self, speaker: Optional[str] = None):
+        self.text = ""
+        # Characters of `text` already published as partial segments
+        self.published = 0
+        # Speaker when the audio was captured, not when its text arrives
+        self.speaker = speaker
+
+
+class TranscriptAssembler:
+    """
+    Builds transcripts from the realtime transcription deltas, keyed by item_id.
+
+    The text of an utterance still being spoken is published to the log at
+    sentence ends and every `max_words` words as partial segments, so agents
+    can react before the turn is over. The completed event then publishes
+    the rest of the utterance as its final segment; if transcription fails
+    instead, an empty final segment closes what was published. An utterance takes the
+    speaker given to start(), when its speech began, over the one current
+    when its text arrives.
+    """
+
+    def __init__(
+        self,
+        log: TranscriptLog,
+        sentences: bool = PARTIAL_TRANSCRIPT_SENTENCES,
+        max_words: int = PARTIAL_TRANSCRIPT_WORDS,
+    ):
+        self.log = log
+        self.sentences = sentences
+        self.max_words = max_words
+        self.utterances: dict[str, Utterance] = {}
+
+    def start(self, item_id: str, speaker: Optional[str] = None):
+        """Record who is speaking as the speech of an item starts."""
+        if item_id is not None and item_id not in self.utterances:
+            self.utterances[item_id] = Utterance(speaker)
+
+    def add_delta(self, item_id: str, delta: str, speaker: Optional[str] = None):
+        utterance = self.utterances.get(item_id)
+        if utterance is None:
+            utterance = self.utterances[item_id] = Utterance(speaker)
+        utterance.text += delta
+        speaker = utterance.speaker
+
+        boundary = self._boundary(utterance.text[utterance.published :])
+        if boundary:
+            text = utterance.text[utterance.published : utterance.published + boundary]
+            utterance.published += boundary
+            if text.strip():
+                self.log.append(
+                    text.strip(), speaker=speaker, item_id=item_id, final=False
+                )
+
+    def _boundary(self, pending: str) -> int:
+        """Length of the unpublished text to publish now, or 0 to wait."""
+        end = 0
+        if self.sentences:
+            for match in SENTENCE_END.finditer(pending):
+                end = match.end()
+        if self.max_words:
+            # Only count words followed by a space, the last one may be cut off
+            words = list(re.finditer(r"\S+\s", pending[end:]))
+            if len(words) >= self.max_words:
+                end += words[-1].end()
+        return end
+
+    def complete(
+        self, item_id: Optional[str], transcript: str, speaker: Optional[str] = None
+    ) -> Optional[TranscriptSegment]:
+        """Publish the final transcript of an item, minus what is already out."""
+        utterance = self.utterances.pop(item_id, None)
+        if utterance is not None:
+            speaker = utterance.speaker
+        if utterance is None or not utterance.published:
+            if not transcript:
+                return None
+            return self.log.append(transcript, speaker=speaker, item_id=item_id)
+
+        # The completed transcript usually extends the deltas word for word;
+        # when it was revised, only the words after the revision are new
+        published = utterance.text[: utterance.published].split()
+        words = transcript.split()
+        common = 0
+        while (
+            common < min(len(published), len(words))
+            and published[common] == words[common]
+        ):
+            common += 1
+        if common < len(published):
+            logger.debug(
+                "Transcript of %s revised after %d published words",
+                item_id,
+                common,
+            )
+        # An empty final segment still marks the utterance as complete
+        return self.log.append(
+            " ".join(words[common:]),
+            speaker=speaker,
+            item_id=item_id,
+        )
+
+    def fail(self, item_id: Optional[str]) -> Optional[TranscriptSegment]:
+        """Forget an item whose transcription failed, closing its partials."""
+        utterance = self.utterances.pop(item_id, None)
+        if utterance is None or not utterance.published:
+            return None
+        # Readers waiting for the utterance to complete get its partials
+        return self.log.append("", speaker=utterance.speaker, item_id=item_id)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark latency of the agenda /chat endpoint with stubbed models.
+
+The guardrail and AgendaCreator agents are given StubModels with fixed
+latencies, then chat_with_agenda is timed for on-topic requests, where the
+SDK runs the input guardrail alongside the regeneration, and off-topic ones,
+where the tripped guardrail cancels it. The baseline is the previous
+handler, which built both agents on every request and called Runner.run
+directly.
+
+Run from backend/:  python -m tests.bench_agenda_chat
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+from agents import (
+    Agent,
+    GuardrailFunctionOutput,
+    InputGuardrailTripwireTriggered,
+    Runner,
+    input_guardrail,
+    set_tracing_disabled,
+)
+
+from routes.agenda import routes
+from routes.agenda.model import Agenda, ChatRequest, IsAgendaTopic, Message
+from routes.agenda.prompts import AGENDA_CREATION_PROMPT
+from tests.stub_model import StubModel
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_agenda_chat")
+
+SAMPLE_AGENDA = Agenda(
+    title="Sales Strategy Meeting with MedNova Health",
+    checklist=["Present the patient flow analytics demo", "Agree on pilot scope"],
+    time_plan=[
+        {"start": "00:00", "end": "00:30", "content": "Demo"},
+        {"start": "00:30", "end": "01:00", "content": "Pilot discussion"},
+    ],
+    preparation_tips=["Prepare ROI figures for the pilot"],
+    participants_insights=[
+        {"participant": "Emily Chen", "insight": "Focused on procurement costs"}
+    ],
+)
+
+
+def guardrail_responder(system_instructions, input, tools, output_schema):
+    last_message = input[-1]["content"] if isinstance(input, list) else input
+    return json.dumps(
+        {"is_about_agenda": "agenda" in last_message.lower(), "reasoning": "stub"}
+    )
+
+
+def agenda_responder(system_instructions, input, tools, output_schema):
+    return SAMPLE_AGENDA.model_dump_json()
+
+
+def baseline_handler(guardrail_model, agenda_model):
+    """The previous chat_with_agenda, with the stub models swapped in."""
+
+    async def chat_with_agenda(chat_request: ChatRequest):
+        user_messages = [
+            {
+                "role": "user",
+                "content": "Here is the current agenda: "
+                + json.dumps(chat_request.agenda.model_dump()),
+            }
+        ]
+        for message in chat_request.messages:
+            user_messages.append({"role": message.role, "content": message.content})
+
+        guardrail_agent = Agent(
+            name="Guardrail check",
+            instructions=routes.guardrail_agent.instructions,
+            output_type=IsAgendaTopic,
+            model=guardrail_model,
+        )
+
+        @input_guardrail
+        async def agenda_guardrail(ctx, agent, input):
+            result = await Runner.run(guardrail_agent, input, context=ctx.context)
+            return GuardrailFunctionOutput(
+                output_info=result.final_output,
+                tripwire_triggered=not result.final_output.is_about_agenda,
+            )
+
+        agenda_agent = Agent(
+            name="AgendaCreator",
+            model=agenda_model,
+            instructions=AGENDA_CREATION_PROMPT,
+            tools=[],
+            output_type=Agenda,
+            input_guardrails=[agenda_guardrail],
+        )
+        try:
+            result = await Runner.run(starting_agent=agenda_agent, input=user_messages)
+            return result.final_output
+        except InputGuardrailTripwireTriggered:
+            return chat_request.agenda
+
+    return chat_with_agenda
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def measure(label, handler, chat_request, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await handler(chat_request)
+        latencies.append(time.perf_counter() - start)
+    logger.info(
+        "%-28s p50=%7.1f ms  p95=%7.1f ms",
+        label,
+        statistics.median(latencies) * 1000,
+        percentile(latencies, 95) * 1000,
+    )
+
+
+async def run(iterations: int, guardrail_latency: float, agenda_latency: float):
+    set_tracing_disabled(True)
+    guardrail_model = StubModel(
+        guardrail_responder, latency=guardrail_latency, jitter=guardrail_latency / 5
+    )
+    agenda_model = StubModel(
+        agenda_responder, latency=agenda_latency, jitter=agenda_latency / 5
+    )
+    routes.guardrail_agent.model = guardrail_model
+    routes.chat_agenda_agent.model = agenda_model
+    baseline = baseline_handler(guardrail_model, agenda_model)
+
+    on_topic = ChatRequest(
+        agenda=SAMPLE_AGENDA,
+        messages=[Message(content="Add a Q&A slot to the agenda")],
+    )
+    off_topic = ChatRequest(
+        agenda=SAMPLE_AGENDA,
+        messages=[Message(content="What is the weather like today?")],
+    )
+
+    logger.info(
+        "Stub latency: guardrail %.0f ms, agenda %.0f ms, %d iterations",
+        guardrail_latency * 1000,
+        agenda_latency * 1000,
+        iterations,
+    )
+    await measure("baseline on-topic", baseline, on_topic, iterations)
+    await measure("on-topic", routes.chat_with_agenda, on_topic, iterations)
+    await measure("baseline off-topic", baseline, off_topic, iterations)
+    await measure("off-topic", routes.chat_with_agenda, off_topic, iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--guardrail-latency", type=float, default=0.4)
+    parser.add_argument("--agenda-latency", type=float, default=1.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations, args.guardrail_latency, args.agenda_latency))
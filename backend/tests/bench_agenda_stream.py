@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark time-to-first-content of the streaming agenda endpoint.
+
+AgendaCreator is given a streaming StubModel, then POST /agenda/stream is
+consumed event by event and compared with the blocking POST /agenda/.
+
+Run from backend/:  python -m tests.bench_agenda_stream
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+from agents import set_tracing_disabled
+from fastapi import Response
+
+from routes.agenda import routes
+from routes.agenda.model import AgendaForm
+from tests.bench_agenda_chat import agenda_responder
+from tests.stub_model import StubModel
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_agenda_stream")
+
+
+async def run(iterations: int, latency: float):
+    set_tracing_disabled(True)
+    routes.agenda_agent.model = StubModel(agenda_responder, latency=latency)
+
+    blocking, first_content, streamed = [], [], []
+    for iteration in range(iterations):
+        # A distinct title per request keeps the agenda cache out of the way
+        form = AgendaForm(title=f"Bench {iteration}", purpose="Plan the pilot")
+
+        start = time.perf_counter()
+        await routes.upload_agenda(Response(), form)
+        blocking.append(time.perf_counter() - start)
+
+        form = AgendaForm(title=f"Bench stream {iteration}", purpose="Plan the pilot")
+        start = time.perf_counter()
+        response = await routes.stream_agenda(form)
+        first = None
+        async for line in response.body_iterator:
+            event = json.loads(line)
+            if first is None and event["type"] == "section":
+                first = time.perf_counter() - start
+        first_content.append(first)
+        streamed.append(time.perf_counter() - start)
+
+    logger.info("Stub latency %.0f ms, %d iterations", latency * 1000, iterations)
+    logger.info(
+        "POST /agenda/        p50 first content %7.1f ms",
+        statistics.median(blocking) * 1000,
+    )
+    logger.info(
+        "POST /agenda/stream  p50 first content %7.1f ms, p50 complete %7.1f ms",
+        statistics.median(first_content) * 1000,
+        statistics.median(streamed) * 1000,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations, args.latency))
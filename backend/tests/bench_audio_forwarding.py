@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark audio forwarding from the /conversation/transcribe client socket
+to the OpenAI realtime socket.
+
+Runs handle_connection against a local FakeRealtimeServer and an in-memory
+client websocket, then reports forwarded frames/s and per-frame latency
+(client frame received -> audio arriving upstream). Set AUDIO_COALESCE_MS
+to compare coalescing windows.
+
+Run from backend/:  python -m tests.bench_audio_forwarding
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import websockets
+
+from routes.conversation.routes import handle_connection
+from routes.conversation.transcript import TranscriptLog
+from tests.fake_realtime import FakeRealtimeServer
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_audio_forwarding")
+
+RATE = 24000
+CHUNK = 1024  # samples per frame, as sent by the frontend
+FRAME_BYTES = CHUNK * 2  # 16-bit mono PCM
+
+
+class FakeClientWebSocket:
+    """Minimal stand-in for the Starlette WebSocket handed to the endpoint."""
+
+    class _State:
+        name = "CONNECTED"
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.client_state = self._State()
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def receive_text(self):
+        return (await self.receive())["text"]
+
+    async def receive_bytes(self):
+        return (await self.receive())["bytes"]
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        pass
+
+    def push_bytes(self, data: bytes):
+        self.incoming.put_nowait({"type": "websocket.receive", "bytes": data})
+
+    def disconnect(self):
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run(frames: int, realtime: bool):
+    server = await FakeRealtimeServer().start()
+    sent_at = {}
+    latencies = []
+    received = 0
+
+    def on_audio(audio, received_at):
+        # Frames may be coalesced or split across appends, so a frame counts
+        # as forwarded once its last byte has arrived upstream
+        nonlocal received
+        received += len(audio)
+        while len(latencies) < received // FRAME_BYTES:
+            latencies.append(received_at - sent_at[len(latencies)])
+
+    server.on_audio = on_audio
+    client = FakeClientWebSocket()
+
+    async with websockets.connect(server.url) as openai_ws:
+        session = asyncio.create_task(
+            handle_connection(client, openai_ws, [], TranscriptLog())
+        )
+
+        start = time.perf_counter()
+        for seq in range(frames):
+            sent_at[seq] = time.perf_counter()
+            client.push_bytes(bytes(FRAME_BYTES))
+            if realtime:
+                await asyncio.sleep(CHUNK / RATE)
+            elif seq % 64 == 0:
+                await asyncio.sleep(0)
+
+        # Wait until the fake server has seen every frame
+        while server.audio_bytes < frames * FRAME_BYTES:
+            if time.perf_counter() - start > 60:
+                logger.error("Timed out waiting for forwarded audio")
+                break
+            await asyncio.sleep(0.001)
+        elapsed = time.perf_counter() - start
+
+        client.disconnect()
+        await session
+
+    await server.stop()
+
+    mode = "real-time pacing" if realtime else "burst"
+    logger.info("Mode: %s, frames: %d", mode, frames)
+    logger.info("Forwarded frames/s: %.1f", len(latencies) / elapsed)
+    logger.info("Upstream append messages: %d", server.append_messages)
+    if latencies:
+        logger.info(
+            "Per-frame latency ms: p50=%.2f p95=%.2f p99=%.2f max=%.2f",
+            statistics.median(latencies) * 1000,
+            percentile(latencies, 95) * 1000,
+            percentile(latencies, 99) * 1000,
+            max(latencies) * 1000,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help="Pace frames at the microphone rate instead of sending a burst",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.frames, args.realtime))
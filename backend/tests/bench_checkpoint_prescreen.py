@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local checklist pre-screen in front of AgendaAgent.
+
+Replays labelled sample meetings utterance by utterance through the
+CheckpointPrescreen of each meeting's checklist. An utterance passing the
+pre-screen starts a model run, which is assumed to report every item
+fulfilled since the previous run, as the agent's tool call would. Reported
+per threshold, with and without the n-gram vectors: recall (items reported
+by a run at the utterance fulfilling them), items reported eventually and
+how late, precision (runs at a fulfilling utterance) and model runs saved
+compared to running on every utterance.
+
+Run from backend/:  python -m tests.bench_checkpoint_prescreen
+"""
+
+import argparse
+import logging
+
+from routes.conversation.checkpoints import CheckpointPrescreen
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_checkpoint_prescreen")
+
+# (checklist items, [(utterance, number of the item it fulfils or None)])
+MEETINGS = [
+    (
+        [
+            "Agree on the pilot scope",
+            "Discuss pricing for the pilot",
+            "Schedule a follow-up technical meeting",
+            "Identify the decision makers",
+        ],
+        [
+            ("Thanks everyone for joining, let's start with introductions.", None),
+            ("I'm Dana, I run operations at the hospital.", None),
+            ("Did anyone catch the game last night?", None),
+            ("It was a great match, went to overtime.", None),
+            ("Patient flow is our biggest problem right now.", None),
+            ("The emergency department is overloaded most evenings.", None),
+            (
+                "So for the pilot we'd start with two departments, emergency and radiology.",
+                1,
+            ),
+            ("Okay, two departments for three months works for us as the scope.", None),
+            ("What would the pilot cost us?", None),
+            (
+                "We can offer a reduced price of twelve thousand for the three month pilot.",
+                2,
+            ),
+            ("That fits our budget.", None),
+            ("Who else needs to sign off on this on your side?", None),
+            ("Our CFO and the head of IT make the final call.", 4),
+            (
+                "Could our engineers meet yours next Tuesday to go through the integration?",
+                3,
+            ),
+            ("Tuesday at ten works, I'll send an invite.", None),
+            ("Great, thanks everyone.", None),
+        ],
+    ),
+    (
+        [
+            "Review last sprint's results",
+            "Decide on the release date",
+            "Assign owners for the open bugs",
+            "Agree on the hiring plan",
+        ],
+        [
+            ("Morning all, coffee is in the kitchen.", None),
+            ("Let's look back at the last sprint first.", None),
+            (
+                "We closed eighteen of twenty stories and the sprint results look solid.",
+                1,
+            ),
+            ("The search feature slipped because of the API change.", None),
+            ("Anyone been to the new ramen place downstairs?", None),
+            ("Yes, the broth is excellent.", None),
+            ("For the release, I propose we ship on March third.", None),
+            ("Agreed, March third it is, that's the release date.", 2),
+            ("There are five bugs still open in the tracker.", None),
+            ("Priya takes the login bugs and Marco owns the export ones.", 3),
+            ("I can also take the crash on startup.", None),
+            ("On headcount, we want two backend engineers this quarter.", None),
+            ("So the plan is to hire two backend engineers and one designer.", 4),
+            ("Sounds good, let's wrap up.", None),
+        ],
+    ),
+    (
+        [
+            "Understand the customer's current workflow",
+            "Demo the analytics dashboard",
+            "Agree on next steps",
+        ],
+        [
+            ("Hi, thanks for making the time today.", None),
+            ("How was your trip?", None),
+            ("Long flight, but fine.", None),
+            ("Can you walk me through how your team handles reports today?", None),
+            (
+                "Right now everything goes through spreadsheets that we email around every week.",
+                1,
+            ),
+            ("That takes about a day of someone's time.", None),
+            ("Let me share my screen and show you the dashboard.", None),
+            ("Here you can see live analytics per department, updated every hour.", 2),
+            ("That looks much nicer than our spreadsheets.", None),
+            ("The weather here has been awful all week.", None),
+            ("Tell me about it, it rained every day.", None),
+            ("As next steps, I'll send a proposal and you'll loop in your manager.", 3),
+            ("Perfect, talk soon.", None),
+        ],
+    ),
+]
+
+
+def run(threshold: float, embeddings: bool, max_skipped: int):
+    utterances = runs = on_time = detected = fulfilling = late_by = 0
+    for items, transcript in MEETINGS:
+        prescreen = CheckpointPrescreen(
+            items, threshold=threshold, embeddings=embeddings, max_skipped=max_skipped
+        )
+        # Item -> utterance number it was fulfilled at, until a run sees it
+        waiting = {}
+        for position, (text, item) in enumerate(transcript):
+            utterances += 1
+            if item is not None:
+                fulfilling += 1
+                waiting[item] = position
+            if not prescreen.should_run(text):
+                continue
+            runs += 1
+            # The run sees the whole history, so it reports every waiting item
+            for waiting_item, fulfilled_at in waiting.items():
+                detected += 1
+                on_time += fulfilled_at == position
+                late_by += position - fulfilled_at
+                prescreen.fulfilled.add(waiting_item)
+            waiting.clear()
+    return {
+        "recall": on_time / fulfilling,
+        "eventual": detected / fulfilling,
+        "late_by": late_by / detected if detected else 0.0,
+        "precision": on_time / runs if runs else 1.0,
+        "saved": 1 - runs / utterances,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--thresholds", type=float, nargs="+", default=[0.2, 0.3, 0.4, 0.5]
+    )
+    parser.add_argument("--max-skipped", type=int, default=5)
+    args = parser.parse_args()
+
+    for embeddings in (False, True):
+        for threshold in args.thresholds:
+            result = run(threshold, embeddings, args.max_skipped)
+            logger.info(
+                "%-15s threshold %.2f: recall %.2f (%.2f eventually, %.1f "
+                "utterances late), precision %.2f, %2.0f%% runs saved",
+                "words + n-grams" if embeddings else "words",
+                threshold,
+                result["recall"],
+                result["eventual"],
+                result["late_by"],
+                result["precision"],
+                result["saved"] * 100,
+            )
+
+
+if __name__ == "__main__":
+    main()
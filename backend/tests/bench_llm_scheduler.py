@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark the LLM scheduler under a burst of runs from many meetings.
+
+Every session submits a batch of low-priority runs (conversation tips) and
+then high-priority runs (off-topic, checkpoints) at once, against a
+StubModel and a rate-limited scheduler. High-priority runs should overtake
+the backlog, and stale low-priority runs should be dropped.
+
+Run from backend/:  python -m tests.bench_llm_scheduler
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from agents import Agent, set_tracing_disabled
+
+from core.scheduler import LLMScheduler, Priority, RequestExpired
+from tests.bench_audio_forwarding import percentile
+from tests.stub_model import StubModel
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_llm_scheduler")
+
+
+async def run(sessions: int, runs: int, rate: float, concurrency: int, latency: float):
+    set_tracing_disabled(True)
+    agent = Agent(name="Bench", model=StubModel(lambda *_: "ok", latency=latency))
+    scheduler = LLMScheduler(rate=rate, burst=concurrency, max_concurrency=concurrency)
+
+    latencies = {priority: [] for priority in Priority}
+    per_session = {session: [] for session in range(sessions)}
+    dropped = {priority: 0 for priority in Priority}
+
+    async def submit(session: int, priority: Priority, deadline: float):
+        start = time.perf_counter()
+        try:
+            await scheduler.run(
+                agent,
+                "hello",
+                priority=priority,
+                session=session,
+                deadline_seconds=deadline,
+            )
+        except RequestExpired:
+            dropped[priority] += 1
+            return
+        elapsed = time.perf_counter() - start
+        latencies[priority].append(elapsed)
+        if priority == Priority.HIGH:
+            per_session[session].append(elapsed)
+
+    # Tips from every session are queued first, then the urgent runs arrive
+    low = [
+        asyncio.create_task(submit(session, Priority.LOW, deadline=5))
+        for session in range(sessions)
+        for _ in range(runs)
+    ]
+    await asyncio.sleep(0)
+    high = [
+        asyncio.create_task(submit(session, Priority.HIGH, deadline=10))
+        for session in range(sessions)
+        for _ in range(runs)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*low, *high)
+    total = time.perf_counter() - start
+
+    logger.info(
+        "%d sessions x %d runs per class, %.0f runs/s, %d concurrent, %.0f ms model",
+        sessions,
+        runs,
+        rate,
+        concurrency,
+        latency * 1000,
+    )
+    for priority in (Priority.HIGH, Priority.LOW):
+        values = sorted(latencies[priority])
+        logger.info(
+            "%-6s completed %4d dropped %4d  p50=%7.0f ms  p95=%7.0f ms",
+            priority.name,
+            len(values),
+            dropped[priority],
+            percentile(values, 50) * 1000 if values else 0,
+            percentile(values, 95) * 1000 if values else 0,
+        )
+    # Round-robin keeps every session's urgent runs close to each other
+    firsts = sorted(min(values) for values in per_session.values() if values)
+    if firsts:
+        logger.info(
+            "First HIGH run per session: earliest %.0f ms, latest %.0f ms",
+            firsts[0] * 1000,
+            firsts[-1] * 1000,
+        )
+    logger.info("Finished in %.1f s, scheduler stats %s", total, scheduler.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(
+        run(args.sessions, args.runs, args.rate, args.concurrency, args.latency)
+    )
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local topic tracker in front of OfftopicAgent.
+
+Replays labelled sample meetings utterance by utterance, one transcript
+batch each, through the TopicTracker of each meeting's checklist, the way
+OfftopicAgent uses it: the model is only asked when the tracker goes
+off-topic, and is assumed to answer with the label of that utterance;
+other state changes are sent to the client directly. Reported per window
+size: model runs compared to one per batch, direct status updates, false
+alarms (model runs outside an off-topic stretch), off-topic stretches
+caught and how many utterances after they started.
+
+Run from backend/:  python -m tests.bench_offtopic_tracker
+"""
+
+import argparse
+import logging
+
+from routes.conversation.topic import TopicTracker
+from tests.bench_checkpoint_prescreen import MEETINGS as CHECKPOINT_MEETINGS
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_offtopic_tracker")
+
+# (checklist items, [(utterance, whether it is part of an off-topic stretch)]).
+# The checkpoint meetings only have brief tangents, which are not off-topic.
+MEETINGS = [
+    (items, [(text, False) for text, _ in transcript])
+    for items, transcript in CHECKPOINT_MEETINGS
+] + [
+    (
+        [
+            "Review the migration timeline",
+            "Agree on the rollback plan",
+            "Assign owners for the database cutover",
+        ],
+        [
+            ("Let's get going, first the migration timeline.", False),
+            ("The migration starts on the twelfth and should take two weeks.", False),
+            ("The timeline depends on the vendor delivering the new servers.", False),
+            ("Speaking of vendors, did you see their booth at the conference?", True),
+            ("Yes, they had a coffee bar and a live band.", True),
+            ("The band was surprisingly good, mostly jazz covers.", True),
+            ("I went to the evening party too, it ran until midnight.", True),
+            ("The food there was better than last year.", True),
+            (
+                "Okay, back to it, what's the rollback plan if the migration fails?",
+                False,
+            ),
+            (
+                "We keep the old cluster running for a week so rollback is instant.",
+                False,
+            ),
+            ("Agreed, that rollback plan works for me.", False),
+            ("Who owns the database cutover?", False),
+            ("Sam owns the cutover and Lee backs him up.", False),
+            ("Thanks, that's everything.", False),
+        ],
+    ),
+    (
+        [
+            "Present the quarterly sales numbers",
+            "Discuss the marketing budget",
+        ],
+        [
+            ("Quarterly sales came in at four point two million.", False),
+            ("That's up eight percent on the quarter before.", False),
+            ("My daughter just started school this week.", True),
+            ("Oh nice, how is she finding it?", True),
+            ("She loves it, especially the art classes.", True),
+            ("My son wants to take up painting as well.", True),
+            ("So for marketing, how much budget do we have next quarter?", False),
+            ("We're asking for a budget of three hundred thousand.", False),
+            ("That cost seems high, can we bring it down?", False),
+            ("We'll send a revised budget tomorrow.", False),
+        ],
+    ),
+]
+
+
+def run(threshold: float, window: int):
+    batches = runs = direct = false_alarms = caught = late_by = stretches = 0
+    for items, transcript in MEETINGS:
+        tracker = TopicTracker(items, threshold=threshold, window=window)
+        reported = (False, None)
+        # Position the current off-topic stretch started at, until caught
+        stretch_start = None
+        for position, (text, offtopic) in enumerate(transcript):
+            batches += 1
+            if offtopic and (position == 0 or not transcript[position - 1][1]):
+                stretches += 1
+                stretch_start = position
+            tracker.observe(text)
+            topic = (tracker.is_offtopic, tracker.relevant_item)
+            if topic == reported:
+                continue
+            if tracker.is_offtopic:
+                runs += 1
+                if not offtopic:
+                    false_alarms += 1
+                elif stretch_start is not None:
+                    caught += 1
+                    late_by += position - stretch_start
+                    stretch_start = None
+                tracker.reset(offtopic)
+            else:
+                direct += 1
+            reported = (tracker.is_offtopic, tracker.relevant_item)
+    return {
+        "batches": batches,
+        "runs": runs,
+        "direct": direct,
+        "false_alarms": false_alarms,
+        "caught": caught,
+        "stretches": stretches,
+        "late_by": late_by / caught if caught else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--windows", type=int, nargs="+", default=[2, 3, 4])
+    args = parser.parse_args()
+
+    for window in args.windows:
+        result = run(args.threshold, window)
+        logger.info(
+            "window %d: %d model runs for %d batches, %d direct updates, "
+            "%d false alarms, %d/%d off-topic stretches caught %.1f utterances in",
+            window,
+            result["runs"],
+            result["batches"],
+            result["direct"],
+            result["false_alarms"],
+            result["caught"],
+            result["stretches"],
+            result["late_by"],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark how much earlier agents see speech with partial transcripts.
+
+Replays monologues as transcription deltas arriving at --words-per-second,
+with the completed event --finalize-delay seconds after the last word, and
+feeds them to a TranscriptAssembler on a simulated clock. For every word it
+reports how long after it was transcribed an agent could read it: agents
+taking partial transcripts read at the assembler's boundaries, the others
+only once the utterance completes. Also reported is the number of segments
+per utterance, the most runs a partial agent can make for it.
+
+Run from backend/:  python -m tests.bench_partial_transcripts
+"""
+
+import argparse
+import logging
+
+from routes.conversation.transcript import TranscriptAssembler, TranscriptLog
+from tests.bench_audio_forwarding import percentile
+from tests.fake_realtime import SAMPLE_TRANSCRIPTS
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_partial_transcripts")
+
+
+def monologues(sentences: int) -> list[str]:
+    """Utterances of `sentences` consecutive sample lines each."""
+    lines = SAMPLE_TRANSCRIPTS
+    return [
+        " ".join(lines[(start + i) % len(lines)] for i in range(sentences))
+        for start in range(len(lines))
+    ]
+
+
+def run(
+    utterances: list[str],
+    words_per_second: float,
+    finalize_delay: float,
+    sentences: bool,
+    max_words: int,
+):
+    partial_lags, final_lags, segments_per_utterance = [], [], []
+    for index, text in enumerate(utterances):
+        log = TranscriptLog()
+        assembler = TranscriptAssembler(log, sentences=sentences, max_words=max_words)
+        item_id = f"item_{index}"
+        words = text.split(" ")
+        spoken_at = [i / words_per_second for i in range(len(words))]
+
+        # Words visible to partial agents, and when they became visible
+        visible = 0
+        for i, word in enumerate(words):
+            assembler.add_delta(item_id, word + " ")
+            published = sum(len(s.text.split()) for s in log.segments)
+            partial_lags.extend(
+                spoken_at[i] - spoken_at[w] for w in range(visible, published)
+            )
+            visible = published
+
+        completed_at = spoken_at[-1] + finalize_delay
+        assembler.complete(item_id, text)
+        partial_lags.extend(
+            completed_at - spoken_at[w] for w in range(visible, len(words))
+        )
+        final_lags.extend(completed_at - at for at in spoken_at)
+        segments_per_utterance.append(len([s for s in log.segments if s.text]))
+    return partial_lags, final_lags, segments_per_utterance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sentences", type=int, default=4, help="Per monologue")
+    parser.add_argument("--words-per-second", type=float, default=2.5)
+    parser.add_argument("--finalize-delay", type=float, default=1.0)
+    parser.add_argument("--max-words", type=int, default=20)
+    parser.add_argument(
+        "--no-sentence-boundaries", action="store_true", help="Only cut every N words"
+    )
+    args = parser.parse_args()
+
+    partial, final, segments = run(
+        monologues(args.sentences),
+        args.words_per_second,
+        args.finalize_delay,
+        not args.no_sentence_boundaries,
+        args.max_words,
+    )
+    for name, lags in (("completed only", final), ("partial", partial)):
+        logger.info(
+            "%-15s word readable after p50 %.1f s, p95 %.1f s, max %.1f s",
+            name,
+            percentile(lags, 50),
+            percentile(lags, 95),
+            max(lags),
+        )
+    logger.info(
+        "%.1f segments per utterance on average",
+        sum(segments) / len(segments),
+    )
+
+
+if __name__ == "__main__":
+    main()
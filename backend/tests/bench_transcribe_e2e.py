@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Replay WAV files through /conversation/transcribe and time the agents.
+
+The app is served in-process by uvicorn with the realtime socket pointed at
+FakeRealtimeServer and the agents SDK pointed at FakeResponsesServer, so the
+whole path runs offline and deterministically. For every message an agent
+sends to the client, the latency is measured from the oldest completed
+transcript that agent had not answered yet.
+
+WAV files are converted to 24 kHz mono pcm16. Without files, a synthetic
+tone is streamed instead.
+
+Run from backend/:  python -m tests.bench_transcribe_e2e [meeting.wav ...]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import wave
+
+import numpy as np
+import uvicorn
+import websockets
+from agents import set_default_openai_client, set_tracing_disabled
+
+from tests.bench_audio_forwarding import percentile
+from tests.fake_realtime import FakeRealtimeServer
+from tests.fake_responses import FakeResponsesServer
+from tests.stub_model import StubModel
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_transcribe_e2e")
+for name in ("websockets", "httpx", "httpx2"):
+    logging.getLogger(name).setLevel(logging.WARNING)
+
+RATE = 24000
+CHUNK = 1024  # samples per frame, as sent by the frontend
+
+SAMPLE_AGENDA = {
+    "title": "MedNova pilot",
+    "checklist_items": [
+        "Introductions",
+        "Understand patient flow pain points",
+        "Demo the analytics dashboard",
+        "Agree pilot scope and pricing",
+    ],
+}
+
+# First key of each agent's client messages
+OUTPUT_KEYS = {
+    "checkpoint_fulfilled": "AgendaAgent",
+    "words_count": "EngagementAgent",
+    "is_offtopic": "OfftopicAgent",
+    "new_conversation_tip": "ConversationTipsAgent",
+    "new_checkpoint_content": "ConversationTipsAgent",
+}
+
+
+def meeting_responder(system_instructions, input, tools, output_schema):
+    """Answer each agent with a call to its client-facing tool."""
+    if output_schema:
+        # Guardrails
+        return json.dumps({"is_wrong": False, "reasoning": "Relevant to the meeting"})
+    names = {tool["name"] if isinstance(tool, dict) else tool.name for tool in tools}
+    if "send_via_websocket" in names:
+        return [("send_via_websocket", {"checkpoint_fulfilled": 1})]
+    if "send_topic_status" in names:
+        return [("send_topic_status", {"is_offtopic": False, "topic_summary": "Pilot"})]
+    if "send_conversation_tip_via_websocket" in names:
+        return [
+            (
+                "send_conversation_tip_via_websocket",
+                {"new_conversation_tip": "Ask who signs off on the pilot budget."},
+            )
+        ]
+    if "send_via_websocket_words_count" in names:
+        # Label every numbered chunk of the escalation
+        chunks = re.findall(r"^(\d+)\. ", input[-1]["content"], re.MULTILINE)
+        return [
+            (
+                "send_via_websocket_words_count",
+                {"chunk": int(chunk), "user_type": "host"},
+            )
+            for chunk in chunks
+        ]
+    # History summarizer
+    return "The meeting covered introductions and the pilot."
+
+
+def load_wav(path: str) -> bytes:
+    """Read a WAV file as 24 kHz mono pcm16."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+    audio = samples.reshape(-1, channels).mean(axis=1)
+    if rate != RATE:
+        positions = np.arange(0, len(audio), rate / RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio)
+    return audio.astype(np.int16).tobytes()
+
+
+def synthetic_audio(seconds: float) -> bytes:
+    """A tone loud enough to count as speech for FakeRealtimeServer."""
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16).tobytes()
+
+
+async def replay(url: str, audio: bytes, speed: float, drain: float, outputs: list):
+    async with websockets.connect(url) as websocket:
+
+        async def receive():
+            async for message in websocket:
+                try:
+                    data = json.loads(message)
+                except json.JSONDecodeError:
+                    continue
+                for key, agent in OUTPUT_KEYS.items():
+                    if key in data:
+                        outputs.append((agent, time.perf_counter()))
+                        break
+
+        receiver = asyncio.create_task(receive())
+        await websocket.send(
+            json.dumps({"type": "agenda_info", "agenda": SAMPLE_AGENDA})
+        )
+
+        frame_bytes = CHUNK * 2
+        start = time.perf_counter()
+        for index, offset in enumerate(range(0, len(audio), frame_bytes)):
+            await websocket.send(audio[offset : offset + frame_bytes])
+            # Pace against the clock so send overhead doesn't accumulate
+            target = start + (index + 1) * CHUNK / RATE / speed
+            await asyncio.sleep(max(0, target - time.perf_counter()))
+
+        # Let the last transcripts and agent runs finish
+        deadline = time.perf_counter() + drain
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        receiver.cancel()
+
+
+async def run(files, seconds, speed, latency, jitter, segment_ms, drain):
+    audio = b"".join(load_wav(path) for path in files) or synthetic_audio(seconds)
+
+    transcripts = []
+    realtime = await FakeRealtimeServer(segment_ms=segment_ms).start()
+    realtime.on_transcript = lambda item_id, text, sent_at: transcripts.append(sent_at)
+
+    responses = await FakeResponsesServer(
+        StubModel(meeting_responder, latency=latency, jitter=jitter)
+    ).start()
+    set_default_openai_client(responses.client())
+    set_tracing_disabled(True)
+    os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY", "sk-fake")
+
+    from main import app
+    from routes.conversation import routes
+
+    routes.OPENAI_REALTIME_URL = realtime.url
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+    )
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    url = f"ws://127.0.0.1:{port}/api/conversation/transcribe"
+
+    outputs = []
+    try:
+        await replay(url, audio, speed, drain, outputs)
+    finally:
+        server.should_exit = True
+        await serve_task
+        await responses.stop()
+        await realtime.stop()
+
+    # Each output answers every transcript its agent had not answered yet
+    answered = {agent: 0 for agent in set(OUTPUT_KEYS.values())}
+    latencies = {agent: [] for agent in answered}
+    for agent, received_at in outputs:
+        index = answered[agent]
+        if index >= len(transcripts) or transcripts[index] > received_at:
+            continue
+        latencies[agent].append(received_at - transcripts[index])
+        answered[agent] = sum(1 for sent_at in transcripts if sent_at <= received_at)
+
+    logger.info(
+        "Audio %.1f s at %.1fx, %d transcripts, %d model requests, model latency %.0f ms",
+        len(audio) / 2 / RATE,
+        speed,
+        len(transcripts),
+        responses.requests,
+        latency * 1000,
+    )
+    for agent, values in sorted(latencies.items()):
+        if not values:
+            logger.info("%-22s no output", agent)
+            continue
+        logger.info(
+            "%-22s outputs %3d  p50=%7.0f ms  p95=%7.0f ms  p99=%7.0f ms",
+            agent,
+            len(values),
+            percentile(values, 50) * 1000,
+            percentile(values, 95) * 1000,
+            percentile(values, 99) * 1000,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="*", help="16-bit WAV files to replay")
+    parser.add_argument(
+        "--seconds", type=float, default=30, help="Synthetic audio length"
+    )
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed")
+    parser.add_argument("--latency", type=float, default=0.5, help="Model latency")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--segment-ms", type=int, default=3000)
+    parser.add_argument("--drain", type=float, default=8.0)
+    args = parser.parse_args()
+    asyncio.run(
+        run(
+            args.files,
+            args.seconds,
+            args.speed,
+            args.latency,
+            args.jitter,
+            args.segment_ms,
+            args.drain,
+        )
+    )
@@ -0,0 +1,187 @@
+"""
+Local stand-in for the OpenAI realtime transcription socket.
+
+It accepts the same connection the backend opens in
+routes/conversation/routes.py, answers the session handshake and records
+every `input_audio_buffer.append` it receives, so the transcribe path can be
+exercised without network access or an API key.
+
+Audio is cut into fixed-length segments instead of running real VAD, which
+keeps runs deterministic. Each segment with speech-level energy produces the
+same events as the real service: `input_audio_buffer.speech_started`,
+`speech_stopped` and `committed`, then after `transcription_delay` the
+transcription deltas and `conversation.item.input_audio_transcription.completed`
+with the next line of `transcripts`. Silent segments produce no transcript.
+"""
+
+import asyncio
+import base64
+import itertools
+import json
+import time
+
+import numpy as np
+import websockets
+
+# 24 kHz pcm16 mono, as configured by the backend
+BYTES_PER_SECOND = 24000 * 2
+
+# RMS level (of 32768) below which a segment counts as silence
+SPEECH_RMS = 300
+
+SAMPLE_TRANSCRIPTS = [
+    "Thanks everyone for joining, let's start with a quick round of introductions.",
+    "Our main goal today is to agree on the pilot scope and the pricing.",
+    "Patient flow is our biggest problem, the emergency department is overloaded.",
+    "Could you walk us through how the analytics dashboard would work for us?",
+    "By the way, did anyone watch the game last night? It was incredible.",
+    "Let's get back to the pilot, we would start with two departments.",
+    "What would the pricing look like for a three month pilot?",
+    "We can offer a reduced pilot price and convert to an annual licence.",
+]
+
+
+class FakeRealtimeServer:
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 0,
+        segment_ms: int = 3000,
+        transcription_delay: float = 0.3,
+        transcripts: list[str] | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.server = None
+        # Audio length of one speech turn, and the time taken to transcribe it
+        self.segment_ms = segment_ms
+        self.transcription_delay = transcription_delay
+        self.transcripts = transcripts or SAMPLE_TRANSCRIPTS
+        # Number of `input_audio_buffer.append` messages received
+        self.append_messages = 0
+        # Total bytes of decoded PCM audio received
+        self.audio_bytes = 0
+        # Number of completed transcription events sent
+        self.transcripts_sent = 0
+        # Optional callback called with (decoded_audio, received_at) per append
+        self.on_audio = None
+        # Optional callback called with (item_id, transcript, sent_at)
+        self.on_transcript = None
+        self.item_ids = itertools.count(1)
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await websockets.serve(self.handler, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handler(self, websocket):
+        segment_bytes = BYTES_PER_SECOND * self.segment_ms // 1000
+        buffer = bytearray()
+        lines = itertools.cycle(self.transcripts)
+        pending = set()
+
+        async def send(event: dict):
+            await websocket.send(json.dumps(event))
+
+        async def transcribe(item_id: str, text: str):
+            await asyncio.sleep(self.transcription_delay)
+            for word in text.split(" "):
+                await send(
+                    {
+                        "type": "conversation.item.input_audio_transcription.delta",
+                        "item_id": item_id,
+                        "content_index": 0,
+                        "delta": word + " ",
+                    }
+                )
+            sent_at = time.perf_counter()
+            await send(
+                {
+                    "type": "conversation.item.input_audio_transcription.completed",
+                    "item_id": item_id,
+                    "content_index": 0,
+                    "transcript": text,
+                }
+            )
+            self.transcripts_sent += 1
+            if self.on_transcript:
+                self.on_transcript(item_id, text, sent_at)
+
+        async def commit(audio: bytes):
+            samples = np.frombuffer(audio[: len(audio) // 2 * 2], dtype=np.int16)
+            if not len(samples):
+                return
+            if np.sqrt(np.mean(samples.astype(np.float64) ** 2)) < SPEECH_RMS:
+                return
+            item_id = f"item_{next(self.item_ids)}"
+            await send(
+                {"type": "input_audio_buffer.speech_started", "item_id": item_id}
+            )
+            await send(
+                {"type": "input_audio_buffer.speech_stopped", "item_id": item_id}
+            )
+            await send({"type": "input_audio_buffer.committed", "item_id": item_id})
+            task = asyncio.create_task(transcribe(item_id, next(lines)))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        await send(
+            {
+                "type": "transcription_session.created",
+                "session": {"id": "sess_fake"},
+            }
+        )
+        try:
+            async for message in websocket:
+                received_at = time.perf_counter()
+                data = json.loads(message)
+                event_type = data.get("type")
+
+                if event_type == "transcription_session.update":
+                    await send(
+                        {
+                            "type": "transcription_session.updated",
+                            "session": data.get("session", {}),
+                        }
+                    )
+                elif event_type == "input_audio_buffer.append":
+                    audio = base64.b64decode(data["audio"])
+                    self.append_messages += 1
+                    self.audio_bytes += len(audio)
+                    if self.on_audio:
+                        self.on_audio(audio, received_at)
+
+                    buffer.extend(audio)
+                    while len(buffer) >= segment_bytes:
+                        await commit(bytes(buffer[:segment_bytes]))
+                        del buffer[:segment_bytes]
+                elif event_type == "input_audio_buffer.commit":
+                    await commit(bytes(buffer))
+                    buffer.clear()
+                elif event_type == "input_audio_buffer.clear":
+                    buffer.clear()
+                    await send({"type": "input_audio_buffer.cleared"})
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+async def main():
+    server = await FakeRealtimeServer(port=8765).start()
+    print(f"Fake realtime server listening on {server.url}")
+    await server.server.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
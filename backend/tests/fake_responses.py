@@ -0,0 +1,93 @@
+"""
+Local stand-in for the OpenAI Responses API.
+
+Serves POST /v1/responses with the replies of a StubModel, so agents that
+name a real model ("gpt-4.1") can be run unchanged over HTTP, with the
+StubModel's latency, by pointing the SDK at it:
+
+    server = await FakeResponsesServer(StubModel(responder, latency=0.5)).start()
+    set_default_openai_client(server.client())
+"""
+
+import asyncio
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from openai import AsyncOpenAI
+
+from tests.stub_model import StubModel
+
+
+class FakeResponsesServer:
+    def __init__(self, model: StubModel, host: str = "127.0.0.1", port: int = 0):
+        self.model = model
+        self.host = host
+        self.port = port
+        self.server = None
+        self.serve_task = None
+        # Number of requests served
+        self.requests = 0
+
+        self.app = FastAPI()
+        self.app.post("/v1/responses")(self.create_response)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def client(self) -> AsyncOpenAI:
+        return AsyncOpenAI(base_url=self.url, api_key="sk-fake", max_retries=0)
+
+    async def start(self):
+        config = uvicorn.Config(
+            self.app, host=self.host, port=self.port, log_level="warning"
+        )
+        self.server = uvicorn.Server(config)
+        self.serve_task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            await asyncio.sleep(0.01)
+        self.port = self.server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self.server:
+            self.server.should_exit = True
+            await self.serve_task
+
+    async def create_response(self, request: Request):
+        body = await request.json()
+        self.requests += 1
+
+        text_format = (body.get("text") or {}).get("format") or {}
+        output_schema = (
+            text_format if text_format.get("type") == "json_schema" else None
+        )
+
+        await asyncio.sleep(self.model.latency + random.uniform(0, self.model.jitter))
+        output = self.model.respond(
+            body.get("instructions"),
+            body.get("input"),
+            body.get("tools") or [],
+            output_schema,
+        )
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model", "stub"),
+            "status": "completed",
+            "output": [item.model_dump() for item in output],
+            "parallel_tool_calls": True,
+            "tool_choice": body.get("tool_choice", "auto"),
+            "tools": body.get("tools") or [],
+            "usage": {
+                "input_tokens": 0,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": 0,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": 0,
+            },
+        }
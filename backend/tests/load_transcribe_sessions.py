@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Load test for /api/conversation/transcribe session handling.
+
+The app is served in-process by uvicorn and pointed at FakeRealtimeServer.
+Waves of concurrent client sessions connect, stream some audio and
+disconnect; afterwards no session, task or memory may be left behind.
+Connections beyond MAX_TRANSCRIBE_SESSIONS must be rejected cleanly.
+
+Run from backend/:  python -m tests.load_transcribe_sessions
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import tracemalloc
+
+import uvicorn
+import websockets
+
+from tests.fake_realtime import FakeRealtimeServer
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("load_transcribe_sessions")
+logging.getLogger("websockets").setLevel(logging.WARNING)
+
+# 20 ms of pcm16 silence at 24 kHz
+FRAME = bytes(960)
+
+
+async def client_session(url: str, frames: int) -> bool:
+    """Open a session, stream audio and hang up. Returns whether it was served."""
+    async with websockets.connect(url) as websocket:
+        # The first message is either the upstream handshake or a rejection
+        first = json.loads(await websocket.recv())
+        if "error" in first:
+            return False
+        for _ in range(frames):
+            await websocket.send(FRAME)
+            await asyncio.sleep(0.02)
+    return True
+
+
+async def settle(session_manager, timeout: float = 10.0):
+    """Wait until the server has torn down every session."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while session_manager.sessions and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.2)
+    gc.collect()
+
+
+async def run(sessions: int, waves: int, frames: int, max_growth_kb: int):
+    realtime = await FakeRealtimeServer().start()
+    os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY", "sk-fake")
+
+    from main import app
+    from routes.conversation import routes
+    from routes.conversation.sessions import SESSION_LIMIT_CLOSE_CODE
+
+    routes.OPENAI_REALTIME_URL = realtime.url
+    session_manager = routes.session_manager
+    session_manager.max_sessions = sessions
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    url = f"ws://127.0.0.1:{port}/api/conversation/transcribe"
+
+    tracemalloc.start()
+    baseline_tasks = None
+    baseline_memory = None
+    try:
+        for wave in range(waves):
+            results = await asyncio.gather(
+                *(client_session(url, frames) for _ in range(sessions))
+            )
+            await settle(session_manager)
+
+            stats = session_manager.stats()
+            tasks = len(asyncio.all_tasks())
+            memory = tracemalloc.get_traced_memory()[0]
+            logger.info(
+                "Wave %d: %d/%d served, %d live sessions, %d tasks, %.0f KB traced",
+                wave + 1,
+                sum(results),
+                sessions,
+                stats["active_sessions"],
+                tasks,
+                memory / 1024,
+            )
+            assert all(results), "sessions under the limit must be served"
+            assert stats["active_sessions"] == 0 and stats["active_tasks"] == 0
+
+            # The first wave warms up imports and caches
+            if baseline_memory is None:
+                baseline_tasks, baseline_memory = tasks, memory
+                continue
+            assert tasks <= baseline_tasks, f"tasks leaked: {tasks - baseline_tasks}"
+            growth = (memory - baseline_memory) / 1024
+            assert growth < max_growth_kb, f"memory grew by {growth:.0f} KB"
+
+        # One more session than the limit: exactly one is turned away
+        async def hold():
+            async with websockets.connect(url) as websocket:
+                first = json.loads(await websocket.recv())
+                if "error" in first:
+                    await websocket.wait_closed()
+                    return websocket.close_code
+                await asyncio.sleep(0.5)
+                return None
+
+        codes = await asyncio.gather(*(hold() for _ in range(sessions + 1)))
+        rejected = [code for code in codes if code is not None]
+        logger.info("Over the limit: %d rejected with %s", len(rejected), rejected)
+        assert rejected == [SESSION_LIMIT_CLOSE_CODE]
+        await settle(session_manager)
+        logger.info("Session stats: %s", session_manager.stats())
+        logger.info("Upstream received %d append messages", realtime.append_messages)
+    finally:
+        tracemalloc.stop()
+        server.should_exit = True
+        await serve_task
+        await realtime.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--waves", type=int, default=5)
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--max-growth-kb", type=int, default=512)
+    args = parser.parse_args()
+    asyncio.run(run(args.sessions, args.waves, args.frames, args.max_growth_kb))
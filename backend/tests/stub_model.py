@@ -0,0 +1,153 @@
+"""
+Stub model for the openai-agents SDK with configurable latency.
+
+Instead of calling OpenAI, StubModel sleeps for the configured latency and
+answers with whatever its responder returns, so agent flows can be timed
+deterministically and offline. Assign it to an agent's `model`, or hand out
+instances from StubModelProvider via RunConfig(model_provider=...).
+"""
+
+import asyncio
+import json
+import random
+import uuid
+from typing import Any, Callable, Optional
+
+from agents import Model, ModelProvider, ModelResponse, Usage
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseCreatedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+)
+
+# Called with (system_instructions, input, tools, output_schema); returns the
+# final text, or a list of (tool_name, arguments) calls to make first
+Responder = Callable[..., Any]
+
+
+def message(text: str) -> ResponseOutputMessage:
+    return ResponseOutputMessage(
+        id=f"msg_{uuid.uuid4().hex}",
+        content=[ResponseOutputText(annotations=[], text=text, type="output_text")],
+        role="assistant",
+        status="completed",
+        type="message",
+    )
+
+
+def function_call(name: str, arguments: dict[str, Any]) -> ResponseFunctionToolCall:
+    return ResponseFunctionToolCall(
+        id=f"fc_{uuid.uuid4().hex}",
+        call_id=f"call_{uuid.uuid4().hex}",
+        name=name,
+        arguments=json.dumps(arguments),
+        type="function_call",
+        status="completed",
+    )
+
+
+def has_tool_output(input: Any) -> bool:
+    """Whether the model already got tool results in this turn."""
+    if isinstance(input, str) or not input:
+        return False
+    last = input[-1]
+    return isinstance(last, dict) and last.get("type") == "function_call_output"
+
+
+class StubModel(Model):
+    def __init__(
+        self,
+        responder: Responder,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        stream_chunks: int = 20,
+    ):
+        self.responder = responder
+        self.latency = latency
+        self.jitter = jitter
+        # Streamed text is split into this many deltas spread over the latency
+        self.stream_chunks = stream_chunks
+        self.calls = 0
+
+    def respond(self, system_instructions, input, tools, output_schema) -> list:
+        self.calls += 1
+        if has_tool_output(input):
+            # Tool results are in; finish the turn
+            return [message("done")]
+        reply = self.responder(system_instructions, input, tools, output_schema)
+        if isinstance(reply, list):
+            return [function_call(name, args) for name, args in reply]
+        return [message(reply)]
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        **kwargs,
+    ) -> ModelResponse:
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        output = self.respond(system_instructions, input, tools, output_schema)
+        return ModelResponse(output=output, usage=Usage(), response_id=None)
+
+    async def stream_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        **kwargs,
+    ):
+        output = self.respond(system_instructions, input, tools, output_schema)
+        response = Response.model_construct(
+            id=f"resp_{uuid.uuid4().hex}", output=output, usage=None
+        )
+        sequence = 0
+        yield ResponseCreatedEvent.model_construct(
+            response=response, sequence_number=sequence, type="response.created"
+        )
+
+        delay = (self.latency + random.uniform(0, self.jitter)) / self.stream_chunks
+        for index, item in enumerate(output):
+            if not isinstance(item, ResponseOutputMessage):
+                await asyncio.sleep(delay * self.stream_chunks)
+                continue
+            text = item.content[0].text
+            size = max(1, -(-len(text) // self.stream_chunks))
+            for start in range(0, len(text), size):
+                await asyncio.sleep(delay)
+                sequence += 1
+                yield ResponseTextDeltaEvent.model_construct(
+                    content_index=0,
+                    delta=text[start : start + size],
+                    item_id=item.id,
+                    output_index=index,
+                    sequence_number=sequence,
+                    logprobs=[],
+                    type="response.output_text.delta",
+                )
+
+        yield ResponseCompletedEvent.model_construct(
+            response=response, sequence_number=sequence + 1, type="response.completed"
+        )
+
+
+class StubModelProvider(ModelProvider):
+    """Return the same StubModel for every model name."""
+
+    def __init__(self, model: StubModel):
+        self.model = model
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return self.model
@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+from routes.conversation.agent import (
+    AgendaAgent,
+    EngagementAgent,
+    OfftopicAgent,
+    TranscriptionAgent,
+)
+from routes.conversation.history import ChatHistory
+from routes.conversation.transcript import TranscriptLog
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+def test_staleness_counts_from_the_oldest_unread_segment():
+    async def scenario():
+        log = TranscriptLog()
+        agent = TranscriptionAgent(FakeWebSocket(), log)
+        agent.debounce_seconds = 1
+        agent.max_staleness_seconds = 0.5
+        # Arrived 0.4 s ago, while the previous run was in flight
+        log.append("First").timestamp = time.time() - 0.4
+
+        async def keep_talking():
+            while True:
+                await asyncio.sleep(0.05)
+                log.append("More")
+
+        talking = asyncio.create_task(keep_talking())
+        started = time.perf_counter()
+        try:
+            segments = await agent.next_batch()
+        finally:
+            talking.cancel()
+        return segments, time.perf_counter() - started
+
+    segments, elapsed = asyncio.run(scenario())
+    assert segments[0].text == "First"
+    # The debounce window keeps being renewed, only the staleness bound ends it
+    assert 0.05 <= elapsed < 0.3
+
+
+def test_engagement_agent_keeps_no_chat_history():
+    async def scenario():
+        websocket = FakeWebSocket()
+        log = TranscriptLog()
+        agent = EngagementAgent(websocket, log)
+        task = asyncio.create_task(agent.process_transcripts())
+        try:
+            for number in range(300):
+                log.append(f"Utterance number {number}", speaker="host")
+                await asyncio.sleep(0)
+            async with asyncio.timeout(5):
+                while len(websocket.sent) < 300:
+                    await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+        assert agent.chat_history.turns == []
+        assert all(data["user_type"] == "host" for data in websocket.sent)
+
+    asyncio.run(scenario())
+
+
+def test_offtopic_agent_bounds_history_without_model_runs(monkeypatch):
+    async def summarize(history, evicted_text):
+        return f"{history.summary}\n{evicted_text}".strip()
+
+    monkeypatch.setattr(ChatHistory, "summarize", summarize)
+
+    async def scenario():
+        websocket = FakeWebSocket()
+        log = TranscriptLog()
+        agent = OfftopicAgent(websocket, log)
+        # One batch per segment
+        agent.debounce_seconds = agent.max_staleness_seconds = 0
+        await agent.add_agenda_info(
+            {"title": "Planning", "checklist_items": ["Review the migration timeline"]}
+        )
+        task = asyncio.create_task(agent.process_transcripts())
+        try:
+            for number in range(30):
+                log.append(f"The migration timeline slips by {number} days.")
+                async with asyncio.timeout(5):
+                    while agent.transcript.pending():
+                        await asyncio.sleep(0.01)
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+        # On-topic all along, so the model never ran
+        assert agent.tracker.is_offtopic is False
+        assert len(agent.chat_history.turns) <= agent.history_max_turns
+        assert "slips by 0 days" in agent.chat_history.summary
+
+    asyncio.run(scenario())
+
+
+def test_agenda_agent_bounds_history_of_skipped_batches(monkeypatch):
+    async def summarize(history, evicted_text):
+        return f"{history.summary}\n{evicted_text}".strip()
+
+    monkeypatch.setattr(ChatHistory, "summarize", summarize)
+
+    async def scenario():
+        log = TranscriptLog()
+        agent = AgendaAgent(FakeWebSocket(), log)
+        agent.debounce_seconds = agent.max_staleness_seconds = 0
+        await agent.add_agenda_info(
+            {"title": "Planning", "checklist_items": ["Agree on the rollback plan"]}
+        )
+        # Never force a model run
+        agent.prescreen.max_skipped = 0
+        task = asyncio.create_task(agent.process_transcripts())
+        try:
+            for number in range(30):
+                log.append(f"The band at the party played song number {number}.")
+                async with asyncio.timeout(5):
+                    while agent.transcript.pending():
+                        await asyncio.sleep(0.01)
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+        # No checklist item came up, so the pre-screen skipped every batch
+        assert agent.prescreen.checked == 30
+        assert agent.prescreen.matched == 0
+        assert len(agent.chat_history.turns) <= agent.history_max_turns
+
+    asyncio.run(scenario())
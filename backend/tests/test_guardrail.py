@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from agents import Agent, set_tracing_disabled
+
+from routes.conversation.guardrail import Guardrail, IsWrong, render_metrics
+from tests.stub_model import StubModel
+
+set_tracing_disabled(True)
+
+
+def make_guardrail(prefilter=False, latency=0.0):
+    """Guardrail whose model flags content mentioning "harmful"."""
+
+    def responder(system_instructions, input, tools, output_schema):
+        text = input if isinstance(input, str) else input[-1]["content"]
+        return json.dumps({"is_wrong": "harmful" in text, "reasoning": "stub"})
+
+    model = StubModel(responder, latency=latency)
+    agent = Agent(name="Guardrail check", output_type=IsWrong, model=model)
+    return Guardrail("test", agent, prefilter=prefilter), model
+
+
+def test_verdicts_are_cached_by_normalized_text():
+    async def scenario():
+        guardrail, model = make_guardrail()
+        assert await guardrail.is_wrong("Ask about the budget.") is False
+        assert await guardrail.is_wrong("  ask ABOUT the budget ") is False
+        assert await guardrail.is_wrong("Something harmful") is True
+        assert await guardrail.is_wrong("something harmful!") is True
+        return guardrail, model
+
+    guardrail, model = asyncio.run(scenario())
+    assert model.calls == 2
+    assert guardrail.stats()["cache_hits"] == 2
+    assert guardrail.stats()["hit_rate"] == 0.5
+
+
+def test_identical_checks_in_flight_share_one_model_call():
+    async def scenario():
+        guardrail, model = make_guardrail(latency=0.05)
+        verdicts = await asyncio.gather(
+            *(guardrail.is_wrong("Ask about the budget") for _ in range(5))
+        )
+        return guardrail, model, verdicts
+
+    guardrail, model, verdicts = asyncio.run(scenario())
+    assert verdicts == [False] * 5
+    assert model.calls == 1
+    assert guardrail.stats()["model_calls"] == 1
+    assert guardrail.stats()["cache_hits"] == 4
+
+
+def test_prefilter_only_blocks():
+    async def scenario():
+        guardrail, model = make_guardrail(prefilter=True)
+        assert await guardrail.is_wrong("That idea is stupid") is True
+        # No blocked term, so the model still decides
+        assert await guardrail.is_wrong("Ask about the budget") is False
+        return guardrail, model
+
+    guardrail, model = asyncio.run(scenario())
+    assert model.calls == 1
+    assert guardrail.stats()["prefilter_blocked"] == 1
+
+
+def test_counters_are_rendered_per_guardrail():
+    text = render_metrics()
+    assert "# TYPE guardrail_checks_total counter" in text
+    assert 'guardrail_model_calls_total{guardrail="checkpoint"} ' in text
+    assert 'guardrail_cache_hits_total{guardrail="conversation_tip"} ' in text
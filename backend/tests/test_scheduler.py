@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from core.scheduler import LLMScheduler, Priority, RequestExpired
+
+
+def make_scheduler():
+    # A generous rate limit, so only the single slot decides the order
+    return LLMScheduler(rate=1000, burst=1000, max_concurrency=1)
+
+
+async def hold(scheduler, release):
+    async with scheduler.slot():
+        await release.wait()
+
+
+def test_higher_priority_is_served_first():
+    async def scenario():
+        scheduler = make_scheduler()
+        order = []
+
+        async def take(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, release))
+        await asyncio.sleep(0.01)
+        waiters = [
+            asyncio.create_task(take(priority.name, priority))
+            for priority in (Priority.LOW, Priority.NORMAL, Priority.HIGH)
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order
+
+    assert asyncio.run(scenario()) == ["HIGH", "NORMAL", "LOW"]
+
+
+def test_sessions_take_turns_within_a_priority():
+    async def scenario():
+        scheduler = make_scheduler()
+        order = []
+
+        async def take(name, session):
+            async with scheduler.slot(session=session):
+                order.append(name)
+
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, release))
+        await asyncio.sleep(0.01)
+        waiters = [
+            asyncio.create_task(take(name, name[0]))
+            for name in ("a1", "a2", "a3", "b1", "b2")
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order
+
+    assert asyncio.run(scenario()) == ["a1", "b1", "a2", "b2", "a3"]
+
+
+def test_request_expires_at_its_deadline():
+    async def scenario():
+        scheduler = make_scheduler()
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, release))
+        await asyncio.sleep(0.01)
+        with pytest.raises(RequestExpired):
+            async with scheduler.slot(deadline_seconds=0.05):
+                pass
+        release.set()
+        await holder
+        # The expired request never took the slot, the next one gets it
+        async with scheduler.slot(deadline_seconds=0.05):
+            assert scheduler.running == 1
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.expired == 1
+    assert scheduler.running == 0
+
+
+def test_cancelled_requests_release_the_slot():
+    async def scenario():
+        scheduler = make_scheduler()
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, release))
+        await asyncio.sleep(0.01)
+
+        # Cancelled while queued
+        waiter = asyncio.create_task(hold(scheduler, release))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        # Cancelled while holding the slot
+        holder.cancel()
+        await asyncio.gather(holder, waiter, return_exceptions=True)
+
+        async with scheduler.slot(deadline_seconds=0.05):
+            assert scheduler.running == 1
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.running == 0
+    assert scheduler.expired == 0
+
+
+def test_nested_slot_does_not_wait_for_a_second_slot():
+    async def scenario():
+        scheduler = make_scheduler()
+        async with scheduler.slot():
+            async with scheduler.slot(deadline_seconds=0.05):
+                return scheduler.running
+
+    assert asyncio.run(scenario()) == 1
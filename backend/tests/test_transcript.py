@@ -0,0 +1,84 @@
+from routes.conversation.transcript import (
+    TranscriptAssembler,
+    TranscriptLog,
+    join_partials,
+)
+
+
+def test_utterance_keeps_the_speaker_its_speech_started_with():
+    log = TranscriptLog()
+    assembler = TranscriptAssembler(log, sentences=True, max_words=0)
+    assembler.start("item_1", speaker="host")
+    # The client switched speakers before the transcript of item_1 arrived
+    assembler.add_delta("item_1", "First sentence. And ", speaker="guest")
+    assembler.complete("item_1", "First sentence. And more.", speaker="guest")
+
+    assert [(segment.text, segment.speaker) for segment in log.segments] == [
+        ("First sentence.", "host"),
+        ("And more.", "host"),
+    ]
+
+
+def test_utterance_without_start_takes_the_current_speaker():
+    log = TranscriptLog()
+    assembler = TranscriptAssembler(log)
+    assembler.complete("item_1", "Hello there.", speaker="guest")
+
+    assert log.segments[0].speaker == "guest"
+    assert assembler.utterances == {}
+
+
+def test_completed_transcript_extending_the_deltas_adds_only_the_rest():
+    log = TranscriptLog()
+    assembler = TranscriptAssembler(log, sentences=True, max_words=0)
+    assembler.add_delta("item_1", "We ship on Monday. Then ")
+    assembler.complete("item_1", "We ship on Monday. Then we rest.")
+
+    assert [(segment.text, segment.final) for segment in log.segments] == [
+        ("We ship on Monday.", False),
+        ("Then we rest.", True),
+    ]
+
+
+def test_revised_transcript_only_adds_words_after_the_revision():
+    log = TranscriptLog()
+    assembler = TranscriptAssembler(log, sentences=True, max_words=0)
+    assembler.add_delta("item_1", "We ship on Monday. Then ")
+    # The final transcript changed a published word
+    assembler.complete("item_1", "We ship on Tuesday. Then we rest.")
+
+    assert [segment.text for segment in log.segments] == [
+        "We ship on Monday.",
+        "Tuesday. Then we rest.",
+    ]
+
+
+def test_failed_item_closes_its_partials():
+    log = TranscriptLog()
+    cursor = log.cursor()
+    assembler = TranscriptAssembler(log, sentences=True, max_words=0)
+    assembler.add_delta("item_1", "We ship on Monday. Then ")
+    assert cursor.read(complete_only=True) == []
+
+    assembler.fail("item_1")
+
+    assert assembler.utterances == {}
+    segments = cursor.read(complete_only=True)
+    assert [(segment.text, segment.final) for segment in segments] == [
+        ("We ship on Monday.", False),
+        ("", True),
+    ]
+    assert [segment.text for segment in join_partials(segments)] == [
+        "We ship on Monday."
+    ]
+
+
+def test_failed_item_without_partials_adds_nothing():
+    log = TranscriptLog()
+    assembler = TranscriptAssembler(log)
+    assembler.start("item_1", speaker="host")
+    assembler.add_delta("item_1", "We ship")
+
+    assert assembler.fail("item_1") is None
+    assert assembler.utterances == {}
+    assert len(log) == 0
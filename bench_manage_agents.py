@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark answering frontend messages in manage_agents with a stubbed model.
+
+Several conversations send messages at random intervals and every model run
+takes --run-time seconds. The old recv loop answered each message in turn;
+the ConversationPool runs conversations side by side, up to --in-flight at
+once, and answers the messages that arrived during a run together. Reported
+are the number of model runs and how long messages waited for their answer.
+
+Run from the repository root:
+    python bench_manage_agents.py
+    python bench_manage_agents.py --conversations 20 --in-flight 8
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from manage_agents import ConversationPool
+
+
+def arrivals(conversations: int, messages: int, interval: float, seed: int):
+    """(offset, conversation, message) for every message, in arrival order."""
+    rng = random.Random(seed)
+    events = []
+    for conversation in range(conversations):
+        at = 0.0
+        for index in range(messages):
+            at += rng.expovariate(1 / interval)
+            events.append(
+                (at, f"conversation-{conversation}", f"{conversation}:{index}")
+            )
+    return sorted(events)
+
+
+async def replay(events, handle):
+    """Call handle(conversation, message) at each message's arrival time."""
+    arrived_at = {}
+    start = time.perf_counter()
+    for at, conversation, message in events:
+        delay = start + at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        arrived_at[message] = time.perf_counter()
+        handle(conversation, message)
+    return arrived_at
+
+
+async def run_sequential(events, run_time: float):
+    """The old recv loop: one model run per message, one at a time."""
+    # Messages wait in the socket buffer while a run is in progress
+    inbox = asyncio.Queue()
+    answered_at = {}
+    runs = 0
+
+    async def loop():
+        nonlocal runs
+        while True:
+            message = await inbox.get()
+            runs += 1
+            await asyncio.sleep(run_time)
+            answered_at[message] = time.perf_counter()
+            inbox.task_done()
+
+    reader = asyncio.create_task(loop())
+    arrived_at = await replay(events, lambda _, message: inbox.put_nowait(message))
+    await inbox.join()
+    reader.cancel()
+    return runs, arrived_at, answered_at
+
+
+async def run_pool(events, run_time: float, in_flight: int):
+    answered_at = {}
+
+    async def respond(key, history):
+        await asyncio.sleep(run_time)
+        now = time.perf_counter()
+        for item in history:
+            answered_at.setdefault(item["content"], now)
+        return history
+
+    pool = ConversationPool(respond, in_flight)
+    arrived_at = await replay(events, pool.submit)
+    await pool.join()
+    return pool.runs, arrived_at, answered_at
+
+
+def report(name: str, runs: int, arrived_at: dict, answered_at: dict):
+    waits = sorted(answered_at[message] - arrived_at[message] for message in arrived_at)
+    print(
+        f"{name}: {runs} model runs, answer after "
+        f"p50 {statistics.median(waits):.2f} s, "
+        f"p95 {waits[int(len(waits) * 0.95) - 1]:.2f} s, max {waits[-1]:.2f} s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=10, help="Per conversation")
+    parser.add_argument(
+        "--interval", type=float, default=2.0, help="Mean seconds between messages"
+    )
+    parser.add_argument("--run-time", type=float, default=1.0, help="Seconds per run")
+    parser.add_argument("--in-flight", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    events = arrivals(args.conversations, args.messages, args.interval, args.seed)
+    print(
+        f"{len(events)} messages from {args.conversations} conversations, "
+        f"{args.run_time} s per model run"
+    )
+    report("sequential", *asyncio.run(run_sequential(events, args.run_time)))
+    report(
+        f"pool of {args.in_flight}",
+        *asyncio.run(run_pool(events, args.run_time, args.in_flight)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark agent-to-UI delivery through WebSocketManager across relay restarts.
+
+Starts the relay from websocket_server.py in-process with one frontend that
+reconnects as soon as the relay is back. A WebSocketManager sends messages at
+a steady rate while the relay is stopped and restarted, and the frontend
+records when each one arrives. Reported are messages lost and duplicated,
+delivery latency percentiles, the number of frames used per message, and
+the messages the manager sent again after a reconnect or dropped from its
+buffer.
+
+Run from the repository root:
+    python bench_websocket_manager.py
+    python bench_websocket_manager.py --rate 500 --restarts 5 --downtime 1
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import sys
+import time
+
+import websockets
+
+import websocket_server
+from log_config import setup_logging
+from websocket_manager import WebSocketManager
+
+
+async def frontend(
+    url: str, received: dict[int, float], duplicates: list, stop: asyncio.Event
+):
+    """Record the arrival time of every agent message, reconnecting right away."""
+    while not stop.is_set():
+        try:
+            async with websockets.connect(url) as websocket:
+                await websocket.send(json.dumps({"from": "frontend", "type": "ping"}))
+                async for frame in websocket:
+                    arrived_at = time.perf_counter()
+                    data = json.loads(frame)
+                    if data.get("type") == "batch":
+                        messages = data["messages"]
+                    else:
+                        messages = [data]
+                    for message in messages:
+                        if "content" in message and message.get("from") == "agent":
+                            seq = int(message["content"].split()[0])
+                            if seq in received:
+                                duplicates.append(seq)
+                            else:
+                                received[seq] = arrived_at
+        except (OSError, websockets.exceptions.WebSocketException):
+            await asyncio.sleep(0.01)
+
+
+async def run(messages: int, rate: float, restarts: int, downtime: float):
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+    url = f"ws://localhost:{port}"
+    server = await websockets.serve(websocket_server.echo, "localhost", port)
+
+    received = {}
+    duplicates = []
+    stop = asyncio.Event()
+    reader = asyncio.create_task(frontend(url, received, duplicates, stop))
+    manager = WebSocketManager(url)
+    await manager.connect(timeout=5)
+    while not websocket_server.frontend_clients:
+        await asyncio.sleep(0.01)
+
+    sent_at = {}
+
+    async def send():
+        for seq in range(messages):
+            sent_at[seq] = time.perf_counter()
+            await manager.send(f"{seq} update")
+            await asyncio.sleep(1 / rate)
+
+    async def restart():
+        nonlocal server
+        duration = messages / rate
+        for _ in range(restarts):
+            await asyncio.sleep(duration / (restarts + 1))
+            server.close()
+            await server.wait_closed()
+            await asyncio.sleep(downtime)
+            server = await websockets.serve(websocket_server.echo, "localhost", port)
+
+    await asyncio.gather(send(), restart())
+    # Give the last messages time to arrive
+    deadline = time.perf_counter() + 5
+    while len(received) < messages and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    stop.set()
+    await manager.close()
+    server.close()
+    await server.wait_closed()
+    reader.cancel()
+
+    latencies = sorted(received[seq] - sent_at[seq] for seq in received)
+    return {
+        "lost": messages - len(received),
+        "duplicates": len(duplicates),
+        "resent": manager.resent,
+        "dropped": manager.dropped,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "max": latencies[-1],
+        "frames": manager.frames_sent,
+        "reconnects": manager.reconnects,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200, help="Messages per second")
+    parser.add_argument("--restarts", type=int, default=3)
+    parser.add_argument("--downtime", type=float, default=0.5, help="Seconds down")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    setup_logging(args.log_level)
+    result = asyncio.run(run(args.messages, args.rate, args.restarts, args.downtime))
+    print(
+        f"{args.messages} messages at {args.rate:.0f}/s, {args.restarts} relay "
+        f"restarts of {args.downtime} s: {result['lost']} lost, "
+        f"{result['duplicates']} duplicated, {result['resent']} resent, "
+        f"{result['dropped']} dropped from the buffer, latency "
+        f"p50 {result['p50'] * 1000:.1f} ms, p99 {result['p99'] * 1000:.1f} ms, "
+        f"max {result['max'] * 1000:.0f} ms, {result['frames']} frames, "
+        f"{result['reconnects']} reconnects",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Benchmark message throughput of the relay in websocket_server.py.
+
+Starts the relay in-process and connects agent and frontend clients. By
+default frontends send to the agents; with --broadcast the agents send to
+every frontend. Throughput is reported as messages delivered per second.
+--slow adds frontends that never read, which must not hold back the rest.
+--rooms spreads the clients round-robin over that many meeting sessions, so
+each message only reaches the receivers in the sender's room. --workers runs
+the relay as that many processes joined by the backplane instead, in which
+case evictions are not counted.
+Log output goes to stdout; redirect it to a file or /dev/null as in
+production.
+
+Run from the repository root:
+    python bench_websocket_server.py --log-level DEBUG --sample-every 1
+    python bench_websocket_server.py --broadcast --frontends 1000 --slow 10
+    python bench_websocket_server.py --broadcast --agents 10 --frontends 1000 --rooms 10
+    python bench_websocket_server.py --broadcast --agents 10 --frontends 1000 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import websockets
+
+import websocket_server
+from log_config import settings as logging_settings, setup_logging
+
+
+def make_message(sender: str, index: int, seq: int, size: int) -> str:
+    content = f"{sender} {index} says hello number {seq} "
+    return json.dumps(
+        {
+            "from": sender,
+            "type": "transcript",
+            "content": content.ljust(size, "."),
+        }
+    )
+
+
+def hello(sender: str, room: int) -> str:
+    return json.dumps({"from": sender, "type": "hello", "session_id": f"room-{room}"})
+
+
+def serve_relay(workers: int, port: int, backplane_path: str, log_settings: dict):
+    setup_logging(**log_settings)
+    asyncio.run(
+        websocket_server.serve_workers(workers, "localhost", port, backplane_path)
+    )
+
+
+async def start_relay(workers: int):
+    """Start the relay in worker mode from a separate process."""
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+    backplane_path = os.path.join(tempfile.mkdtemp(), "backplane.sock")
+    relay = multiprocessing.get_context("spawn").Process(
+        target=serve_relay,
+        # Same log level and sampling as this process
+        args=(workers, port, backplane_path, dict(logging_settings)),
+    )
+    relay.start()
+
+    url = f"ws://localhost:{port}"
+    while True:
+        try:
+            async with websockets.connect(url):
+                break
+        except OSError:
+            await asyncio.sleep(0.1)
+    # The first worker is up, give the others time to bind the port too
+    await asyncio.sleep(2)
+    return relay, url
+
+
+async def connect(url: str, sender: str, room: int, workers: int, **kwargs):
+    websocket = await websockets.connect(url, **kwargs)
+    await websocket.send(hello(sender, room))
+    if workers:
+        # The worker answers once it has registered the client
+        await websocket.send(json.dumps({"from": sender, "type": "ping"}))
+        await websocket.recv()
+    return websocket
+
+
+async def run(
+    messages: int,
+    agents: int,
+    frontends: int,
+    broadcast: bool,
+    slow: int,
+    size: int,
+    rooms: int = 1,
+    workers: int = 0,
+):
+    if workers:
+        relay, url = await start_relay(workers)
+    else:
+        server = await websockets.serve(websocket_server.echo, "localhost", 0)
+        url = f"ws://localhost:{server.sockets[0].getsockname()[1]}"
+
+    # Room of every client, assigned round-robin
+    room_of = {}
+    agent_sockets = []
+    for index in range(agents):
+        websocket = await connect(url, "agent", index % rooms, workers)
+        agent_sockets.append(websocket)
+        room_of[websocket] = index % rooms
+    if workers:
+        # Let room subscriptions reach the hub before frontends say hello
+        await asyncio.sleep(0.5)
+    frontend_sockets = []
+    for index in range(frontends + slow):
+        websocket = await connect(url, "frontend", index % rooms, workers, max_queue=1)
+        frontend_sockets.append(websocket)
+        room_of[websocket] = index % rooms
+    readers, slow_sockets = frontend_sockets[:frontends], frontend_sockets[frontends:]
+
+    def in_room(sockets, room):
+        return sum(1 for websocket in sockets if room_of[websocket] == room)
+
+    # Wait until the relay has registered everyone
+    if workers:
+        await asyncio.sleep(0.5)
+    while not workers and (
+        len(websocket_server.agent_clients) < agents
+        or len(websocket_server.frontend_clients) < frontends + slow
+    ):
+        await asyncio.sleep(0.01)
+
+    if broadcast:
+        senders, receivers, sender = agent_sockets, readers, "agent"
+        extra = {}
+    else:
+        senders, receivers, sender = readers, agent_sockets, "frontend"
+        # The frontends' hello messages reach the agents too
+        extra = {room: in_room(frontend_sockets, room) for room in range(rooms)}
+    # Messages each receiver gets from the senders in its room
+    expected = {
+        room: messages * in_room(senders, room) + extra.get(room, 0)
+        for room in range(rooms)
+    }
+
+    async def drain(websocket):
+        received = 0
+        while received < expected[room_of[websocket]]:
+            await websocket.recv()
+            received += 1
+
+    async def send(websocket, index):
+        for seq in range(messages):
+            await websocket.send(make_message(sender, index, seq, size))
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(drain(websocket) for websocket in receivers),
+        *(send(websocket, index) for index, websocket in enumerate(senders)),
+    )
+    elapsed = time.perf_counter() - start
+    delivered = messages * sum(
+        in_room(senders, room_of[websocket]) for websocket in receivers
+    )
+
+    # Only known when the relay runs in this process
+    evicted = None
+    if not workers:
+        evicted = sum(
+            1
+            for websocket in slow_sockets
+            if websocket not in websocket_server.outboxes
+        )
+    for websocket in agent_sockets + frontend_sockets:
+        await websocket.close()
+    if workers:
+        relay.terminate()
+        relay.join()
+    else:
+        server.close()
+        await server.wait_closed()
+    return delivered / elapsed, elapsed, evicted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--agents", type=int, default=1)
+    parser.add_argument("--frontends", type=int, default=1)
+    parser.add_argument(
+        "--broadcast", action="store_true", help="Send from agents to frontends"
+    )
+    parser.add_argument("--slow", type=int, default=0, help="Frontends never reading")
+    parser.add_argument("--size", type=int, default=100, help="Message content size")
+    parser.add_argument("--rooms", type=int, default=1, help="Meeting sessions")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Relay processes, 0 for in-process"
+    )
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--sample-every", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_logging(args.log_level, sample_every=args.sample_every)
+    rate, elapsed, evicted = asyncio.run(
+        run(
+            args.messages,
+            args.agents,
+            args.frontends,
+            args.broadcast,
+            args.slow,
+            args.size,
+            args.rooms,
+            args.workers,
+        )
+    )
+    # Reported on stderr so it stays visible when stdout is redirected
+    print(
+        f"log level {args.log_level}, 1 in {args.sample_every} sampled, "
+        f"{args.agents} agents, {args.frontends} frontends ({args.slow} slow) "
+        f"in {args.rooms} rooms, {args.workers or 'in-process'} workers: "
+        f"{rate:.0f} messages/s delivered in {elapsed:.2f} s, "
+        f"{'n/a' if evicted is None else evicted} slow frontends evicted",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import asyncio
 import json
+import logging
+import os
 
 from agents import (
     Agent,
@@ -11,17 +13,21 @@ from agents import (
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
+from log_config import setup_logging
 from websocket_manager import WebSocketManager
 
 load_dotenv()
 
+logger = logging.getLogger("manage_agents")
+
 
 # Define the function tool for sending messages via WebSocket
 @function_tool
 async def send_via_websocket(ctx: RunContextWrapper, message: str) -> str:
     """Send a message through the WebSocket connection."""
     websocket_manager = ctx.context["websocket_manager"]
-    return await websocket_manager.send(message)
+    # Only the frontend of the conversation being answered receives it
+    return await websocket_manager.send(message, to=ctx.context.get("conversation"))
 
 
 triage_agent = Agent(
@@ -34,18 +40,106 @@ triage_agent = Agent(
 )
 
 
-# Helper function to wait for the WebSocket server to be available
-async def wait_for_server(websocket_uri, timeout=5):
-    start_time = asyncio.get_event_loop().time()
-    while True:
+# Model runs in flight at once, across all conversations
+MAX_IN_FLIGHT_RUNS = int(os.environ.get("MAX_IN_FLIGHT_RUNS", "4"))
+
+# Seconds an idle conversation keeps its history before it is forgotten
+CONVERSATION_IDLE_TTL = float(os.environ.get("CONVERSATION_IDLE_TTL", "1800"))
+
+# Conversation of messages the relay stamped no sender on; its replies go to
+# every frontend in the room
+DEFAULT_CONVERSATION = None
+
+
+def conversation_key(data):
+    """The relay stamps each frontend message with its connection's id."""
+    return data.get("sender") or DEFAULT_CONVERSATION
+
+
+class Conversation:
+    def __init__(self):
+        self.history = []
+        # Inputs received while a run for this conversation was in progress
+        self.pending = []
+        self.task = None
+        # Scheduled eviction while the conversation is idle
+        self.expiry = None
+
+
+class ConversationPool:
+    """
+    Runs the agent for several conversations at once.
+
+    Runs of one conversation happen one after the other, in arrival order.
+    Messages arriving while its run is in progress are answered together by
+    its next run, and at most `max_in_flight` runs happen at once overall.
+    A conversation left idle for `idle_ttl` seconds is forgotten.
+    """
+
+    def __init__(
+        self, run, max_in_flight=MAX_IN_FLIGHT_RUNS, idle_ttl=CONVERSATION_IDLE_TTL
+    ):
+        # Called with a conversation's key and history, returns the updated history
+        self.run = run
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.idle_ttl = idle_ttl
+        self.conversations = {}
+        self.runs = 0
+        self.coalesced = 0
+        self.evicted = 0
+
+    def submit(self, key, user_input):
+        conversation = self.conversations.get(key)
+        if conversation is None:
+            conversation = self.conversations[key] = Conversation()
+        if conversation.expiry is not None:
+            conversation.expiry.cancel()
+            conversation.expiry = None
+        conversation.pending.append(user_input)
+        if conversation.task is None:
+            conversation.task = asyncio.create_task(self._drain(key, conversation))
+
+    def _evict(self, key, conversation):
+        if self.conversations.get(key) is conversation and conversation.task is None:
+            del self.conversations[key]
+            self.evicted += 1
+
+    async def _drain(self, key, conversation):
         try:
-            websocket_manager = WebSocketManager(websocket_uri)
-            await websocket_manager.connect()
-            return websocket_manager
-        except Exception as e:
-            if asyncio.get_event_loop().time() - start_time > timeout:
-                raise TimeoutError(f"Could not connect to WebSocket server: {e}")
-            await asyncio.sleep(0.1)
+            while conversation.pending:
+                inputs, conversation.pending = conversation.pending, []
+                conversation.history.extend(
+                    {"content": user_input, "role": "user"} for user_input in inputs
+                )
+                self.runs += 1
+                self.coalesced += len(inputs) - 1
+                try:
+                    async with self.slots:
+                        conversation.history = await self.run(key, conversation.history)
+                except Exception:
+                    logger.exception("Error answering conversation %s", key)
+        finally:
+            conversation.task = None
+            conversation.expiry = asyncio.get_running_loop().call_later(
+                self.idle_ttl, self._evict, key, conversation
+            )
+
+    async def join(self):
+        """Wait until every conversation is idle."""
+        while tasks := [c.task for c in self.conversations.values() if c.task]:
+            await asyncio.gather(*tasks)
+
+
+# Helper function to wait for the WebSocket server to be available. The
+# manager keeps reconnecting on its own after this
+async def wait_for_server(websocket_uri, timeout=5):
+    websocket_manager = WebSocketManager(websocket_uri)
+    try:
+        await websocket_manager.connect(timeout)
+    except TimeoutError:
+        await websocket_manager.close()
+        raise
+    return websocket_manager
 
 
 async def main():
@@ -57,24 +151,26 @@ async def main():
         print("Make sure the WebSocket server is running on port 8765")
         return
 
-    context = {"websocket_manager": websocket_manager}
-    history = []
+    async def respond(key, history):
+        # Replies sent by the run are addressed to the conversation's frontend
+        context = {"websocket_manager": websocket_manager, "conversation": key}
+        result = await Runner.run(triage_agent, history, context=context)
+        print(result.final_output)
+        return result.to_input_list()
+
+    pool = ConversationPool(respond)
     print("Agent connected and running. Waiting for frontend messages...")
     try:
         await websocket_manager.send("Agent ready")
         while True:
-            msg = await websocket_manager.websocket.recv()
+            msg = await websocket_manager.recv()
             try:
                 data = json.loads(msg)
                 if data.get("from") == "frontend":
                     user_input = data.get("content", "")
                     if user_input:
-                        history.append({"content": user_input, "role": "user"})
-                        result = await Runner.run(
-                            triage_agent, history, context=context
-                        )
-                        print(result.final_output)
-                        history = result.to_input_list()
+                        # Answered in the background, the loop keeps reading
+                        pool.submit(conversation_key(data), user_input)
                 # Ignore messages not from frontend
             except Exception as e:
                 print(f"Error processing message: {e}")
@@ -85,4 +181,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(main())
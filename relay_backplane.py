@@ -0,0 +1,250 @@
+"""
+Cross-process pub/sub for running websocket_server.py as several workers.
+
+Each worker only holds its own connections, so a message for a room is also
+published on the backplane and delivered by every other worker that has
+members in that room. Workers subscribe to a room while they have members in
+it, and the hub tells a worker whether any other worker shares each of its
+rooms, so messages of a room living on a single worker never leave it. A
+member joining on a new worker misses what the room's other workers send in
+the moment before the hub's notice reaches them.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable
+
+logger = logging.getLogger("relay_backplane")
+
+# Recipients of a published message within the room
+AGENTS = 0
+FRONTENDS = 1
+
+# Frame kinds, followed by the room id and (for PUBLISH) the payload
+SUBSCRIBE = 1
+UNSUBSCRIBE = 2
+PUBLISH = 3
+# Hub to worker: whether other workers are subscribed to the room (target 1)
+# or not anymore (target 0)
+SHARED = 4
+
+# kind, target, room id length, payload length
+HEADER = struct.Struct("!BBHI")
+
+# Called with (room_id, target, payload) for messages from other workers
+Deliver = Callable[[str, int, str], Awaitable[None]]
+
+
+def encode(kind: int, room_id: str, target: int = AGENTS, payload: str = "") -> bytes:
+    room = room_id.encode("utf-8")
+    data = payload.encode("utf-8")
+    return HEADER.pack(kind, target, len(room), len(data)) + room + data
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[int, int, bytes, bytes]:
+    """Read one frame and return (kind, target, room, payload) as raw bytes."""
+    kind, target, room_length, payload_length = HEADER.unpack(
+        await reader.readexactly(HEADER.size)
+    )
+    body = await reader.readexactly(room_length + payload_length)
+    return kind, target, body[:room_length], body[room_length:]
+
+
+class Backplane(ABC):
+    """Carries room messages between relay workers."""
+
+    @abstractmethod
+    async def start(self, deliver: Deliver):
+        pass
+
+    @abstractmethod
+    def subscribe(self, room_id: str):
+        pass
+
+    @abstractmethod
+    def unsubscribe(self, room_id: str):
+        pass
+
+    @abstractmethod
+    async def publish(self, room_id: str, target: int, payload: str):
+        """Send to the other workers with members in the room, if there are any."""
+
+    @abstractmethod
+    async def wait_closed(self):
+        """Return once the worker is cut off from the other workers."""
+
+    @abstractmethod
+    async def close(self):
+        pass
+
+
+class BackplaneHub:
+    """
+    Unix socket server the workers connect to. Forwards every published frame
+    to the other connections subscribed to its room.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.server = None
+        # Room id (raw bytes) -> writers of the workers subscribed to it
+        self.subscribers: dict[bytes, set[asyncio.StreamWriter]] = {}
+        # Connection handlers, cancelled on stop()
+        self.handlers: set[asyncio.Task] = set()
+        self.forwarded = 0
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self.handle, self.path)
+        return self
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            for task in self.handlers:
+                task.cancel()
+            await asyncio.gather(*self.handlers, return_exceptions=True)
+            await self.server.wait_closed()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        rooms = set()
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            while True:
+                kind, target, room, payload = await read_frame(reader)
+                if kind == SUBSCRIBE:
+                    rooms.add(room)
+                    subscribers = self.subscribers.setdefault(room, set())
+                    subscribers.add(writer)
+                    if len(subscribers) == 2:
+                        # The room just became shared, for both workers
+                        self._notify(room, subscribers, True)
+                    elif len(subscribers) > 2:
+                        self._notify(room, [writer], True)
+                elif kind == UNSUBSCRIBE:
+                    rooms.discard(room)
+                    self._remove(room, writer)
+                elif kind == PUBLISH:
+                    await self._forward(room, writer, target, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # The hub is stopping
+            pass
+        finally:
+            self.handlers.discard(task)
+            for room in rooms:
+                self._remove(room, writer)
+            writer.close()
+
+    def _remove(self, room: bytes, writer: asyncio.StreamWriter):
+        subscribers = self.subscribers.get(room)
+        if subscribers is not None and writer in subscribers:
+            subscribers.discard(writer)
+            if not subscribers:
+                del self.subscribers[room]
+            elif len(subscribers) == 1:
+                # The last worker left in the room keeps its messages
+                self._notify(room, subscribers, False)
+
+    def _notify(self, room: bytes, writers, shared: bool):
+        frame = HEADER.pack(SHARED, int(shared), len(room), 0) + room
+        for writer in writers:
+            if not writer.is_closing():
+                writer.write(frame)
+
+    async def _forward(
+        self,
+        room: bytes,
+        sender: asyncio.StreamWriter,
+        target: int,
+        payload: bytes,
+    ):
+        recipients = [
+            writer for writer in self.subscribers.get(room, ()) if writer is not sender
+        ]
+        if not recipients:
+            return
+        frame = HEADER.pack(PUBLISH, target, len(room), len(payload)) + room + payload
+        for writer in recipients:
+            writer.write(frame)
+        self.forwarded += len(recipients)
+        for writer in recipients:
+            try:
+                # Slow workers push back on the publisher rather than buffering
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+
+class UnixSocketBackplane(Backplane):
+    """Worker side of BackplaneHub; needs no service outside the relay."""
+
+    def __init__(self, path: str, connect_timeout: float = 10.0):
+        self.path = path
+        self.connect_timeout = connect_timeout
+        self.reader = None
+        self.writer = None
+        self.receiver = None
+        # Rooms other workers have members in too, as told by the hub
+        self.shared: set[str] = set()
+        self.skipped = 0
+
+    async def start(self, deliver: Deliver):
+        # The hub may still be starting up
+        deadline = asyncio.get_running_loop().time() + self.connect_timeout
+        while True:
+            try:
+                self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionError):
+                if asyncio.get_running_loop().time() > deadline:
+                    raise
+                await asyncio.sleep(0.05)
+        self.receiver = asyncio.create_task(self._receive(deliver))
+
+    async def _receive(self, deliver: Deliver):
+        try:
+            while True:
+                kind, target, room, payload = await read_frame(self.reader)
+                if kind == SHARED:
+                    if target:
+                        self.shared.add(room.decode("utf-8"))
+                    else:
+                        self.shared.discard(room.decode("utf-8"))
+                    continue
+                await deliver(room.decode("utf-8"), target, payload.decode("utf-8"))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logger.error("Lost connection to the backplane hub at %s", self.path)
+
+    def subscribe(self, room_id: str):
+        self.writer.write(encode(SUBSCRIBE, room_id))
+
+    def unsubscribe(self, room_id: str):
+        self.shared.discard(room_id)
+        if not self.writer.is_closing():
+            self.writer.write(encode(UNSUBSCRIBE, room_id))
+
+    async def publish(self, room_id: str, target: int, payload: str):
+        if room_id not in self.shared:
+            # No other worker has members in the room
+            self.skipped += 1
+            return
+        self.writer.write(encode(PUBLISH, room_id, target, payload))
+        await self.writer.drain()
+
+    async def wait_closed(self):
+        await asyncio.shield(self.receiver)
+
+    async def close(self):
+        if self.receiver:
+            self.receiver.cancel()
+        if self.writer:
+            self.writer.close()
@@ -0,0 +1,9 @@
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_backend_copy_is_identical():
+    with open(os.path.join(ROOT, "log_config.py")) as relay:
+        with open(os.path.join(ROOT, "backend", "core", "log_config.py")) as backend:
+            assert relay.read() == backend.read()
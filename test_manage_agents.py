@@ -0,0 +1,93 @@
+import asyncio
+
+from manage_agents import DEFAULT_CONVERSATION, ConversationPool, conversation_key
+
+
+async def echo(key, history):
+    return history
+
+
+def test_idle_conversation_is_evicted():
+    async def scenario():
+        pool = ConversationPool(echo, idle_ttl=0.05)
+        pool.submit("a", "hello")
+        await pool.join()
+        assert "a" in pool.conversations
+
+        await asyncio.sleep(0.1)
+        assert pool.conversations == {}
+        assert pool.evicted == 1
+
+    asyncio.run(scenario())
+
+
+def test_new_message_keeps_conversation_and_history():
+    async def scenario():
+        pool = ConversationPool(echo, idle_ttl=0.05)
+        pool.submit("a", "hello")
+        await pool.join()
+
+        await asyncio.sleep(0.03)
+        pool.submit("a", "again")
+        await pool.join()
+        # The first eviction was cancelled by the new message
+        await asyncio.sleep(0.03)
+        conversation = pool.conversations["a"]
+        assert [item["content"] for item in conversation.history] == [
+            "hello",
+            "again",
+        ]
+
+        await asyncio.sleep(0.05)
+        assert pool.conversations == {}
+
+    asyncio.run(scenario())
+
+
+def test_busy_conversation_is_not_evicted():
+    async def scenario():
+        started = asyncio.Event()
+        done = asyncio.Event()
+
+        async def slow(key, history):
+            started.set()
+            await done.wait()
+            return history
+
+        pool = ConversationPool(slow, idle_ttl=0.01)
+        pool.submit("a", "hello")
+        await started.wait()
+        await asyncio.sleep(0.05)
+        assert "a" in pool.conversations
+
+        done.set()
+        await pool.join()
+        await asyncio.sleep(0.05)
+        assert pool.conversations == {}
+
+    asyncio.run(scenario())
+
+
+def test_runs_answer_the_sender_of_their_conversation():
+    async def scenario():
+        answered = {}
+
+        async def record(key, history):
+            answered[key] = [item["content"] for item in history]
+            return history
+
+        pool = ConversationPool(record)
+        for data in (
+            {"from": "frontend", "content": "one", "sender": "a"},
+            {"from": "frontend", "content": "two", "sender": "b"},
+            {"from": "frontend", "content": "three"},
+        ):
+            pool.submit(conversation_key(data), data["content"])
+        await pool.join()
+        assert answered == {
+            "a": ["one"],
+            "b": ["two"],
+            DEFAULT_CONVERSATION: ["three"],
+        }
+
+    asyncio.run(scenario())
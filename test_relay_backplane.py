@@ -0,0 +1,43 @@
+import asyncio
+import os
+import tempfile
+
+from relay_backplane import AGENTS, BackplaneHub, UnixSocketBackplane
+
+
+def test_only_rooms_shared_with_another_worker_are_published():
+    async def scenario():
+        path = os.path.join(tempfile.mkdtemp(), "backplane.sock")
+        hub = await BackplaneHub(path).start()
+        delivered = []
+
+        async def deliver(room_id, target, payload):
+            delivered.append((room_id, payload))
+
+        first, second = UnixSocketBackplane(path), UnixSocketBackplane(path)
+        await first.start(deliver)
+        await second.start(deliver)
+        try:
+            first.subscribe("room")
+            await asyncio.sleep(0.05)
+            await first.publish("room", AGENTS, "alone")
+
+            second.subscribe("room")
+            await asyncio.sleep(0.05)
+            await first.publish("room", AGENTS, "shared")
+            await asyncio.sleep(0.05)
+
+            second.unsubscribe("room")
+            await asyncio.sleep(0.05)
+            await first.publish("room", AGENTS, "alone again")
+            await asyncio.sleep(0.05)
+        finally:
+            await first.close()
+            await second.close()
+            await hub.stop()
+        return hub, first, delivered
+
+    hub, first, delivered = asyncio.run(scenario())
+    assert delivered == [("room", "shared")]
+    assert hub.forwarded == 1
+    assert first.skipped == 2
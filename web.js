@@ -53,25 +53,11 @@ document.addEventListener('DOMContentLoaded', () => {
 				const message = JSON.parse(event.data);
 				console.log('Message from server:', message);
 
-				switch (message.type) {
-					case 'update':
-						// Updates from the server
-						addMessage(message.content, 'update');
-						break;
-					case 'response':
-						// Response to a specific query
-						addMessage(`Response: ${message.content}`, 'response');
-						break;
-					case 'error':
-						// Error messages
-						addMessage(`Error: ${message.content}`, 'error');
-						break;
-					case 'pong':
-					case 'ping':
-						// Ignore keepalive messages in UI
-						break;
-					default:
-						addMessage(`Received: ${message.content}`, 'unknown');
+				if (message.type === 'batch') {
+					// Several agent messages sent together in one frame
+					message.messages.forEach(handleMessage);
+				} else {
+					handleMessage(message);
 				}
 			} catch (e) {
 				console.error('Error parsing message:', e);
@@ -79,6 +65,29 @@ document.addEventListener('DOMContentLoaded', () => {
 			}
 		});
 
+		function handleMessage(message) {
+			switch (message.type) {
+				case 'update':
+					// Updates from the server
+					addMessage(message.content, 'update');
+					break;
+				case 'response':
+					// Response to a specific query
+					addMessage(`Response: ${message.content}`, 'response');
+					break;
+				case 'error':
+					// Error messages
+					addMessage(`Error: ${message.content}`, 'error');
+					break;
+				case 'pong':
+				case 'ping':
+					// Ignore keepalive messages in UI
+					break;
+				default:
+					addMessage(`Received: ${message.content}`, 'unknown');
+			}
+		}
+
 		// Connection closed
 		socket.addEventListener('close', (event) => {
 			console.log('Disconnected from WebSocket server', event);
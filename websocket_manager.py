@@ -1,36 +1,271 @@
 import asyncio
 import json
+import logging
+import os
+import random
+from collections import deque
+
 import websockets
 
+logger = logging.getLogger("websocket_manager")
+
+# Delay before the first reconnect attempt, doubled after every failure
+RECONNECT_MIN_DELAY = float(os.environ.get("RECONNECT_MIN_DELAY", "0.1"))
+RECONNECT_MAX_DELAY = float(os.environ.get("RECONNECT_MAX_DELAY", "5"))
+# Protocol-level pings; a relay that doesn't answer in time is reconnected to
+HEARTBEAT_INTERVAL = float(os.environ.get("HEARTBEAT_INTERVAL", "20"))
+HEARTBEAT_TIMEOUT = float(os.environ.get("HEARTBEAT_TIMEOUT", "20"))
+# Messages kept until the relay acknowledges them; beyond it the oldest queued
+# message is dropped (and counted) to make room for the newest
+OUTBOUND_BUFFER_SIZE = int(os.environ.get("OUTBOUND_BUFFER_SIZE", "1000"))
+# Queued messages sent together in one frame
+MAX_BATCH = int(os.environ.get("MAX_BATCH", "50"))
+
+# Relay keepalives and acknowledgements, never handed to recv()
+KEEPALIVE_TYPES = ("ping", "pong")
+ACK_TYPE = "ack"
+
+
 # WebSocketManager class to handle persistent WebSocket connection
 class WebSocketManager:
-    def __init__(self, uri):
+    """
+    Connection to the relay that survives relay restarts.
+
+    send() only queues the message; a background task writes the queue to the
+    relay, several waiting messages in one "batch" frame. Every message
+    carries a sequence number and stays buffered until the relay acknowledges
+    it; when the connection drops it is re-established with exponential
+    backoff and the unacknowledged messages are sent again, in order, ahead of
+    the queue. Delivery to the relay is at least once: a message whose ack was
+    lost with the connection is sent twice. A message addressed `to` a
+    frontend's sender id only reaches that frontend. Incoming messages are
+    read with recv().
+    """
+
+    def __init__(
+        self,
+        uri,
+        origin="agent",
+        session_id=None,
+        buffer_size=OUTBOUND_BUFFER_SIZE,
+        max_batch=MAX_BATCH,
+    ):
         self.uri = uri
+        self.origin = origin
+        self.session_id = session_id
+        self.max_batch = max_batch
+        self.buffer_size = buffer_size
         self.websocket = None
+        # Messages not written yet, and messages written but not acknowledged
+        self.outbound = deque()
+        self.unacked = deque()
+        self.next_seq = 0
+        self.acked_seq = -1
+        self.inbound = asyncio.Queue()
+        self.pending = asyncio.Event()
+        self.connected = asyncio.Event()
+        self.task = None
+        self.closed = False
+        self.reconnects = 0
+        self.dropped = 0
+        self.resent = 0
+        self.frames_sent = 0
+        self.messages_sent = 0
+
+    async def connect(self, timeout=None):
+        """Start the connection task and wait until the relay is reachable."""
+        self._start()
+        try:
+            await asyncio.wait_for(self.connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Could not connect to WebSocket at {self.uri}"
+            ) from None
 
-    async def connect(self):
-        self.websocket = await websockets.connect(self.uri)
-        print(f"Connected to WebSocket at {self.uri}")
+    def _start(self):
+        if self.task is None:
+            self.closed = False
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        delay = RECONNECT_MIN_DELAY
+        while not self.closed:
+            try:
+                websocket = await websockets.connect(
+                    self.uri,
+                    ping_interval=HEARTBEAT_INTERVAL,
+                    ping_timeout=HEARTBEAT_TIMEOUT,
+                )
+            except (OSError, websockets.exceptions.WebSocketException) as e:
+                # Jittered so restarted relays aren't hit by every agent at once
+                wait = delay * random.uniform(0.5, 1)
+                logger.warning(
+                    "Could not connect to %s (%s), retrying in %.2f s",
+                    self.uri,
+                    e,
+                    wait,
+                )
+                await asyncio.sleep(wait)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                continue
 
-    async def send(self, message):
-        if self.websocket is None:
-            await self.connect()
+            delay = RECONNECT_MIN_DELAY
+            try:
+                # The relay identifies the client by its first message
+                await websocket.send(
+                    json.dumps(
+                        {
+                            "from": self.origin,
+                            "type": "ping",
+                            "session_id": self.session_id,
+                        }
+                    )
+                )
+                self.websocket = websocket
+                self.connected.set()
+                logger.info("Connected to WebSocket at %s", self.uri)
+                await self._serve(websocket)
+            except websockets.exceptions.ConnectionClosed:
+                pass
+            except Exception as e:
+                logger.error("WebSocket connection failed: %s", e)
+            finally:
+                self.connected.clear()
+                self.websocket = None
+                self._requeue_unacked()
+                await websocket.close()
+            if not self.closed:
+                self.reconnects += 1
+                logger.warning("Lost connection to %s, reconnecting", self.uri)
+
+    async def _serve(self, websocket):
+        """Read and write until the connection drops."""
+        tasks = [
+            asyncio.create_task(self._read(websocket)),
+            asyncio.create_task(self._write(websocket)),
+        ]
         try:
-            # Format the message as a JSON object with content field and origin
-            json_message = json.dumps({
-                "content": message,
-                "from": "agent"
-            })
-            await self.websocket.send(json_message)
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # The writer puts an unsent batch back before the next connection
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(
+                result, websockets.exceptions.ConnectionClosed
+            ):
+                logger.error("WebSocket connection failed: %s", result)
+
+    async def _read(self, websocket):
+        async for message in websocket:
+            try:
+                data = json.loads(message)
+                message_type = data.get("type")
+            except (json.JSONDecodeError, AttributeError):
+                message_type = None
+            if message_type == ACK_TYPE:
+                self._ack(data.get("seq"))
+            elif message_type not in KEEPALIVE_TYPES:
+                self.inbound.put_nowait(message)
+
+    def _ack(self, seq):
+        """Forget every message up to `seq`, the relay has them."""
+        if not isinstance(seq, int):
+            return
+        self.acked_seq = max(self.acked_seq, seq)
+        while self.unacked and self.unacked[0]["seq"] <= seq:
+            self.unacked.popleft()
+
+    def _requeue_unacked(self):
+        """Put messages the relay never acknowledged back ahead of the queue."""
+        if self.unacked:
+            self.resent += len(self.unacked)
+            self.outbound.extendleft(reversed(self.unacked))
+            self.unacked.clear()
+            self.pending.set()
+
+    async def _write(self, websocket):
+        while True:
+            await self.pending.wait()
+            # Let messages queued in the same tick go out in the same frame
+            await asyncio.sleep(0)
+            while self.outbound:
+                # A frame only holds messages for the same recipient, which
+                # the relay routes it by
+                to = self.outbound[0].get("to")
+                batch = []
+                while (
+                    self.outbound
+                    and len(batch) < self.max_batch
+                    and self.outbound[0].get("to") == to
+                ):
+                    batch.append(self.outbound.popleft())
+                if len(batch) == 1:
+                    frame = batch[0]
+                else:
+                    frame = {
+                        "from": self.origin,
+                        "type": "batch",
+                        "seq": batch[-1]["seq"],
+                        "messages": batch,
+                    }
+                    if to is not None:
+                        frame["to"] = to
+                # Whether or not the write completes, the batch waits for its
+                # ack and goes out again after a reconnect without one
+                self.unacked.extend(batch)
+                await websocket.send(json.dumps(frame))
+                self.frames_sent += 1
+                self.messages_sent += len(batch)
+            self.pending.clear()
+
+    async def send(self, message, to=None):
+        """Queue a message for the room, or only for the frontend `to` names."""
+        self._start()
+        if len(self.outbound) + len(self.unacked) >= self.buffer_size:
+            # Unacknowledged messages may already be on screen, so the oldest
+            # message not written yet makes room
+            if self.outbound:
+                self.outbound.popleft()
+            else:
+                self.unacked.popleft()
+            self.dropped += 1
+            logger.warning("Outbound buffer full, dropping the oldest message")
+        # Format the message as a JSON object with content field and origin
+        item = {"content": message, "from": self.origin, "seq": self.next_seq}
+        if to is not None:
+            item["to"] = to
+        self.outbound.append(item)
+        self.next_seq += 1
+        self.pending.set()
+        if self.connected.is_set():
             return f"Message sent: {message}"
-        except Exception as e:
-            print(f"Error sending message: {e}")
-            return f"Error sending message: {e}"
+        return f"Message queued until the connection is back: {message}"
+
+    async def recv(self):
+        """Next message from the relay, across reconnects."""
+        self._start()
+        return await self.inbound.get()
 
-    async def close(self):
-        if self.websocket:
+    async def close(self, flush_timeout=1.0):
+        """Give queued messages `flush_timeout` seconds to go out, then close."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + flush_timeout
+        while (
+            (self.outbound or self.unacked)
+            and self.connected.is_set()
+            and loop.time() < deadline
+        ):
+            await asyncio.sleep(0.01)
+        self.closed = True
+        if self.task:
+            self.task.cancel()
             try:
-                await self.websocket.close()
-                print("WebSocket connection closed")
+                await self.task
+            except asyncio.CancelledError:
+                pass
             except Exception as e:
-                print(f"Error closing WebSocket: {e}")
+                logger.error("Error closing WebSocket: %s", e)
+            self.task = None
+        logger.info("WebSocket connection closed")
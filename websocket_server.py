@@ -1,32 +1,222 @@
 import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import uuid
 import websockets
 import json
 import time
 
+from log_config import SAMPLED, settings as logging_settings, setup_logging
+from relay_backplane import (
+    AGENTS,
+    FRONTENDS,
+    Backplane,
+    BackplaneHub,
+    UnixSocketBackplane,
+)
+
+logger = logging.getLogger("websocket_server")
+
 # Sets to keep track of frontend and agent connections
 frontend_clients = set()
 agent_clients = set()
 
+# Clients that don't name a session in their first message share this room
+DEFAULT_ROOM = "default"
+
+
+class Room:
+    """Frontends and agents of one meeting session; messages stay inside it."""
+
+    def __init__(self):
+        self.frontends = set()
+        self.agents = set()
+
+    def __bool__(self):
+        return bool(self.frontends or self.agents)
+
+
+# Room id -> members, and each client's room id
+rooms = {}
+client_rooms = {}
+# Id stamped as "sender" on each frontend's messages, and the frontend by id.
+# Agents address their replies to it in "to"
+client_ids = {}
+frontends_by_id = {}
+
+# Relay processes sharing the port. With more than one, each worker holds its
+# own clients and rooms are joined up through the backplane
+RELAY_WORKERS = int(os.environ.get("RELAY_WORKERS", "1"))
+# Unix socket of the backplane hub run by the parent process
+BACKPLANE_PATH = os.environ.get(
+    "BACKPLANE_PATH", os.path.join(tempfile.gettempdir(), "websocket_server.sock")
+)
+
+# Set in worker processes only
+backplane = None
+
+
+def join(websocket, origin, room_id):
+    room = rooms.get(room_id)
+    if room is None:
+        room = rooms[room_id] = Room()
+        if backplane is not None:
+            backplane.subscribe(room_id)
+    client_rooms[websocket] = room_id
+    if origin == "agent":
+        agent_clients.add(websocket)
+        room.agents.add(websocket)
+    else:
+        frontend_clients.add(websocket)
+        room.frontends.add(websocket)
+        # Unique across workers, the reply may come through another one
+        client_ids[websocket] = uuid.uuid4().hex
+        frontends_by_id[client_ids[websocket]] = websocket
+
+
+def leave(websocket):
+    agent_clients.discard(websocket)
+    frontend_clients.discard(websocket)
+    frontends_by_id.pop(client_ids.pop(websocket, None), None)
+    room_id = client_rooms.pop(websocket, None)
+    room = rooms.get(room_id)
+    if room is not None:
+        room.agents.discard(websocket)
+        room.frontends.discard(websocket)
+        if not room:
+            del rooms[room_id]
+            if backplane is not None:
+                backplane.unsubscribe(room_id)
+
+
 PING_INTERVAL = 50  # seconds
 
+# Messages buffered per client. When a client's outbox is full the sender is
+# held back for up to SLOW_CONSUMER_TIMEOUT seconds, then the client is evicted
+OUTBOX_SIZE = int(os.environ.get("OUTBOX_SIZE", "256"))
+SLOW_CONSUMER_TIMEOUT = float(os.environ.get("SLOW_CONSUMER_TIMEOUT", "2"))
+SLOW_CONSUMER_CLOSE_CODE = 1008
+
+
+class Outbox:
+    """Bounded queue of outgoing messages, written to one client by its own task."""
+
+    def __init__(self, websocket, size=OUTBOX_SIZE):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(size)
+        self.task = asyncio.create_task(self.run())
+
+    def put(self, message):
+        """Queue a message; returns False when the outbox is full."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def put_wait(self, message, timeout):
+        """Wait for room in the outbox; returns False if none came in time."""
+        try:
+            await asyncio.wait_for(self.queue.put(message), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send(message)
+            except websockets.exceptions.ConnectionClosed:
+                return
+
+    def close(self):
+        self.task.cancel()
+
+
+# Outbox of every connected client
+outboxes = {}
+# Close handshakes of evicted clients still in progress
+closing = set()
+
+
+async def send(websocket, message):
+    """Queue a message for one client, evicting it if it stays too far behind."""
+    outbox = outboxes.get(websocket)
+    if outbox is None or outbox.put(message):
+        return
+    if not await outbox.put_wait(message, SLOW_CONSUMER_TIMEOUT):
+        evict(websocket)
+
+
+async def broadcast(clients, message):
+    """Queue an already serialized message for every client in `clients`."""
+    behind = []
+    for websocket in list(clients):
+        outbox = outboxes.get(websocket)
+        if outbox is not None and not outbox.put(message):
+            behind.append(websocket)
+    # Only clients with a full outbox are waited on, all at once
+    if behind:
+        await asyncio.gather(*(send(websocket, message) for websocket in behind))
+
+
+def frontend_recipients(room, to):
+    """The room's frontends, or only the one a reply is addressed to."""
+    if to is None:
+        return room.frontends
+    frontend = frontends_by_id.get(to)
+    return (frontend,) if frontend in room.frontends else ()
+
+
+def evict(websocket):
+    """Disconnect a client whose outbox is full so it can't hold back others."""
+    leave(websocket)
+    outbox = outboxes.pop(websocket, None)
+    if outbox is not None:
+        outbox.close()
+    logger.warning(
+        "Evicting slow client, outbox full for %.1f s", SLOW_CONSUMER_TIMEOUT
+    )
+
+    task = asyncio.create_task(
+        websocket.close(SLOW_CONSUMER_CLOSE_CODE, "Slow consumer")
+    )
+    closing.add(task)
+    task.add_done_callback(closing.discard)
+
 
 async def echo(websocket):
     origin = None
     try:
-        # Wait for the first message to identify the client type
+        # Wait for the first message to identify the client type and the
+        # meeting session it belongs to
         first_message = await websocket.recv()
         try:
             first_data = json.loads(first_message)
             origin = first_data.get("from", "frontend")
+            room_id = str(first_data.get("session_id") or DEFAULT_ROOM)
         except Exception:
             origin = "frontend"
+            room_id = DEFAULT_ROOM
 
+        outboxes[websocket] = Outbox(websocket)
+        join(websocket, origin, room_id)
         if origin == "agent":
-            agent_clients.add(websocket)
-            print(f"Agent connected. Total agents: {len(agent_clients)}")
+            logger.info(
+                "Agent connected to room %s. Total agents: %d",
+                room_id,
+                len(agent_clients),
+            )
         else:
-            frontend_clients.add(websocket)
-            print(f"Frontend connected. Total frontends: {len(frontend_clients)}")
+            logger.info(
+                "Frontend connected to room %s. Total frontends: %d",
+                room_id,
+                len(frontend_clients),
+            )
 
         # Process the first message
         await process_message(websocket, first_message, origin)
@@ -34,16 +224,20 @@ async def echo(websocket):
         async for message in websocket:
             await process_message(websocket, message, origin)
     except websockets.exceptions.ConnectionClosed:
-        print("Connection closed")
+        logger.info("Connection closed")
     except Exception as e:
-        print(f"Error in echo handler: {e}")
+        logger.error("Error in echo handler: %s", e)
     finally:
+        outbox = outboxes.pop(websocket, None)
+        if outbox is not None:
+            outbox.close()
+        leave(websocket)
         if origin == "agent":
-            agent_clients.discard(websocket)
-            print(f"Agent disconnected. Total agents: {len(agent_clients)}")
+            logger.info("Agent disconnected. Total agents: %d", len(agent_clients))
         else:
-            frontend_clients.discard(websocket)
-            print(f"Frontend disconnected. Total frontends: {len(frontend_clients)}")
+            logger.info(
+                "Frontend disconnected. Total frontends: %d", len(frontend_clients)
+            )
 
 
 async def process_message(websocket, message, origin):
@@ -51,43 +245,68 @@ async def process_message(websocket, message, origin):
         data = json.loads(message)
         msg_from = data.get("from", origin)
         msg_type = data.get("type")
-        print(f"Received message from {msg_from}: {data}")
+        logger.debug("Received message from %s: %s", msg_from, data, extra=SAMPLED)
 
         if msg_type == "ping":
             response = {"type": "pong", "content": "keepalive"}
-            await websocket.send(json.dumps(response))
+            await send(websocket, json.dumps(response))
+            return
+
+        # Only the peers in the sender's room receive the message
+        room_id = client_rooms.get(websocket)
+        room = rooms.get(room_id)
+        if room is None:
+            # Sender was evicted while this message was in flight
             return
 
+        if msg_from == "frontend":
+            # Lets agents keep the frontend's conversation apart from others
+            # in the room and address their replies to it
+            data["sender"] = client_ids.get(websocket)
+
+        # Serialized once, whatever the number of recipients
+        payload = json.dumps(data)
+
         # Route based on origin, but do NOT forward pings/pongs to agent
         if msg_from == "frontend" and msg_type != "ping":
-            # Forward only non-ping messages to all agents
-            for agent_ws in agent_clients.copy():
-                print(f"Forwarding message to agent: {data}")
-                try:
-                    await agent_ws.send(json.dumps(data))
-                except Exception:
-                    agent_clients.discard(agent_ws)
+            # Forward only non-ping messages to the room's agents
+            logger.debug(
+                "Forwarding %s message to %d agents",
+                msg_type,
+                len(room.agents),
+                extra=SAMPLED,
+            )
+            await broadcast(room.agents, payload)
+            if backplane is not None:
+                await backplane.publish(room_id, AGENTS, payload)
         elif msg_from == "agent":
-            # Forward to all frontends (UI will filter pings/pongs)
-            for frontend_ws in frontend_clients.copy():
-                try:
-                    await frontend_ws.send(json.dumps(data))
-                except Exception:
-                    frontend_clients.discard(frontend_ws)
+            # Forward to the room's frontends (UI will filter pings/pongs),
+            # or to the one frontend it answers
+            to = data.get("to")
+            recipients = frontend_recipients(room, to)
+            await broadcast(recipients, payload)
+            if backplane is not None and (to is None or not recipients):
+                # The addressed frontend may be connected to another worker
+                await backplane.publish(room_id, FRONTENDS, payload)
+            if isinstance(data.get("seq"), int):
+                # Lets the agent forget the messages up to this one
+                await send(websocket, json.dumps({"type": "ack", "seq": data["seq"]}))
         else:
             # Unknown origin, echo back
-            await websocket.send(
-                json.dumps({"type": "error", "content": "Unknown message origin."})
+            await send(
+                websocket,
+                json.dumps({"type": "error", "content": "Unknown message origin."}),
             )
     except json.JSONDecodeError:
-        print(f"Received non-JSON message: {message}")
-        await websocket.send(
+        logger.warning("Received non-JSON message: %.200s", message)
+        await send(
+            websocket,
             json.dumps(
                 {
                     "type": "error",
                     "content": "Invalid message format. Please send JSON.",
                 }
-            )
+            ),
         )
 
 
@@ -95,27 +314,99 @@ async def ping_clients():
     while True:
         await asyncio.sleep(PING_INTERVAL)
         # Ping all frontend clients
-        for ws in list(frontend_clients):
-            try:
-                await ws.send(
-                    json.dumps(
-                        {"type": "ping", "content": "keepalive", "from": "server"}
-                    )
-                )
-            except Exception:
-                frontend_clients.discard(ws)
+        await broadcast(
+            frontend_clients,
+            json.dumps({"type": "ping", "content": "keepalive", "from": "server"}),
+        )
+
+
+async def deliver(room_id, target, payload):
+    """Hand a message published by another worker to this worker's room members."""
+    room = rooms.get(room_id)
+    if room is None:
+        return
+    if target == AGENTS:
+        await broadcast(room.agents, payload)
+    else:
+        await broadcast(
+            frontend_recipients(room, json.loads(payload).get("to")), payload
+        )
 
 
-async def start_websocket_server():
-    server = await websockets.serve(echo, "localhost", 8765)
-    print("WebSocket server started on ws://localhost:8765")
+async def start_websocket_server(
+    host="localhost", port=8765, worker_backplane: Backplane = None
+):
+    global backplane
+    if worker_backplane is not None:
+        backplane = worker_backplane
+        await backplane.start(deliver)
+    # Workers share the port and the kernel spreads connections across them
+    server = await websockets.serve(echo, host, port, reuse_port=backplane is not None)
+    logger.info("WebSocket server started on ws://%s:%d", host, port)
     # Start the ping task
     asyncio.create_task(ping_clients())
-    await server.wait_closed()
+    if backplane is None:
+        await server.wait_closed()
+    else:
+        # A worker cut off from the others exits and is restarted by the parent
+        await backplane.wait_closed()
+        raise ConnectionError("Lost the relay backplane")
+
+
+def run_worker(host, port, backplane_path, log_settings):
+    setup_logging(**log_settings)
+    asyncio.run(start_websocket_server(host, port, UnixSocketBackplane(backplane_path)))
+
+
+def start_worker(host, port, backplane_path):
+    worker = multiprocessing.get_context("spawn").Process(
+        target=run_worker,
+        # Spawned workers log with the parent's level and sampling
+        args=(host, port, backplane_path, dict(logging_settings)),
+        daemon=True,
+    )
+    worker.start()
+    return worker
+
+
+async def serve_workers(
+    workers=RELAY_WORKERS, host="localhost", port=8765, backplane_path=BACKPLANE_PATH
+):
+    """Run the backplane hub and `workers` relay processes, restarting any that die."""
+    # Stop the workers too when the parent is asked to stop
+    stopping = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+    hub = await BackplaneHub(backplane_path).start()
+    processes = [start_worker(host, port, backplane_path) for _ in range(workers)]
+    logger.info("Started %d relay workers", workers)
+    try:
+        while not stopping.is_set():
+            try:
+                await asyncio.wait_for(stopping.wait(), 1)
+                break
+            except asyncio.TimeoutError:
+                pass
+            for index, process in enumerate(processes):
+                if not process.is_alive():
+                    logger.error(
+                        "Relay worker exited with code %s, restarting", process.exitcode
+                    )
+                    processes[index] = start_worker(host, port, backplane_path)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        await hub.stop()
+    logger.info("Relay workers stopped")
 
 
 def main():
-    asyncio.run(start_websocket_server())
+    setup_logging()
+    if RELAY_WORKERS > 1:
+        asyncio.run(serve_workers())
+    else:
+        asyncio.run(start_websocket_server())
 
 
 def keep_running():
@@ -123,8 +414,8 @@ def keep_running():
         try:
             main()
         except Exception as e:
-            print(
-                f"WebSocket server crashed with error: {e}. Restarting in 2 seconds..."
+            logger.error(
+                "WebSocket server crashed with error: %s. Restarting in 2 seconds...", e
             )
             time.sleep(2)
 